@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Point at a local stub server with FOOTBALL_DATA_API_BASE=http://127.0.0.1:8000/v4
+API_BASE = os.environ.get("FOOTBALL_DATA_API_BASE", "https://api.football-data.org/v4")
+
+# football-data.org free tier quota
+REQUESTS_PER_MINUTE = 10
+# Seconds before retrying a failed connection, doubled on each retry
+ERROR_BACKOFF = 2
+
+# ---------------- RATE LIMITER ----------------
+
+class TokenBucket:
+    # Callers queue up in acquire() and are released one token at a time,
+    # so bursts get spaced out instead of running into 429s.
+
+    def __init__(self, rate_per_minute=REQUESTS_PER_MINUTE, capacity=None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = float(self.capacity)
+        self.blocked_until = 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._queue = threading.Lock()   # one waiter at a time
+        self._state = threading.Lock()   # protects tokens / blocked_until
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        waited = 0.0
+        with self._queue:
+            while True:
+                with self._state:
+                    now = self._clock()
+                    self._refill(now)
+                    if now < self.blocked_until:
+                        wait = self.blocked_until - now
+                    elif self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    else:
+                        wait = (1 - self.tokens) / self.rate
+                self._sleep(wait)
+                waited += wait
+
+    def available(self):
+        with self._state:
+            now = self._clock()
+            self._refill(now)
+            if now < self.blocked_until:
+                return 0
+            return int(self.tokens)
+
+    def sync(self, available, reset_seconds):
+        # Trust the server's view of the quota over our own estimate
+        with self._state:
+            now = self._clock()
+            self._refill(now)
+            if available is not None:
+                self.tokens = min(self.tokens, float(available))
+                if available <= 0 and reset_seconds is not None:
+                    self.blocked_until = max(self.blocked_until, now + reset_seconds)
+
+    def block_for(self, seconds):
+        with self._state:
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, self._clock() + seconds)
+
+
+def _header_int(headers, name):
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _size(response):
+    # Bytes on the wire (compressed when the server gzips), else the body
+    return _header_int(response.headers, "Content-Length") or len(response.content)
+
+# ---------------- API CLIENT ----------------
+
+class ApiClient:
+    # One pooled keep-alive session shared by every fetch in the process
+
+    def __init__(self, base_url=API_BASE, rate_per_minute=REQUESTS_PER_MINUTE,
+                 max_retries=3, pool_size=10, timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self.bucket = TokenBucket(rate_per_minute)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0, "waited": 0.0, "bytes": 0, "not_modified": 0,
+                      "saved_bytes": 0}
+        # Server's last word on the quota: (requests left, reset seconds, when)
+        self.quota = (None, None, None)
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def get(self, path, api_key, params=None, headers=None):
+        url = self.base_url + path
+        headers = {"X-Auth-Token": api_key, **(headers or {})}
+        response = None
+        for attempt in range(self.max_retries + 1):
+            self._count("waited", self.bucket.acquire())
+            try:
+                response = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                # Dropped connection or timeout: back off and try again,
+                # None once the retries are used up
+                print(f"API Error: {e}")
+                self._count("errors")
+                response = None
+                if attempt < self.max_retries:
+                    self.bucket.block_for(ERROR_BACKOFF * 2 ** attempt)
+                continue
+            self._count("requests")
+            self._count("bytes", _size(response))
+
+            available = _header_int(response.headers, "X-Requests-Available-Minute")
+            reset = _header_int(response.headers, "X-RequestCounter-Reset")
+            self.bucket.sync(available, reset)
+            self.quota = (available, reset, time.monotonic())
+
+            if response.status_code != 429:
+                return response
+
+            # Over quota: wait for the counter reset and try again
+            self._count("throttled")
+            self.bucket.block_for(reset if reset is not None else 60)
+        return response
+
+    def get_json(self, path, api_key, params=None):
+        response = self.get(path, api_key, params=params)
+        if response is None or response.status_code != 200:
+            return None
+        return response.json()
+
+    def get_conditional(self, path, api_key, validators=None, full_size=None):
+        # Revalidates with the ETag / Last-Modified of an earlier response.
+        # Returns (status code, JSON or None, validators, bytes); on 304 the
+        # caller's stored copy is still current. full_size is what a full
+        # download would cost, to count the bytes saved.
+        validators = validators or {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        response = self.get(path, api_key, headers=headers)
+        if response is None:
+            return None, None, validators, 0
+        size = _size(response)
+        if response.status_code == 304:
+            self._count("not_modified")
+        if full_size and response.status_code in (200, 304):
+            self._count("saved_bytes", max(0, full_size - size))
+        fresh = {key: response.headers[header] for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+                 if response.headers.get(header)}
+        data = response.json() if response.status_code == 200 else None
+        return response.status_code, data, fresh or validators, size
+
+    def usage(self, since=None):
+        # Requests / bytes since an earlier usage() snapshot, for per-sync reports
+        with self._stats_lock:
+            now = {key: self.stats[key] for key in ("requests", "bytes", "not_modified", "saved_bytes")}
+        return {key: value - (since or {}).get(key, 0) for key, value in now.items()}
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ApiClient()
+        return _client
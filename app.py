@@ -1,26 +1,24 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 from logic import (
     expected_goals,
-    match_probabilities,
     calibrated_strength_diff,
     suggest_handicap,
     asian_handicap_ev,
-    fair_odds_from_prob,
+    handicap_fair_odds,
     calculate_stake,
+    EV_THRESHOLD,
     get_bankroll,
     save_bet,
-    settle_last_bet
+    open_bets,
+    settle_bet
 )
+from prob_table import probabilities
 from config import FOOTBALL_DATA_API_KEY
 
 # --- ML Model Integration ---
-import joblib
-import numpy as np
-import os
-MODEL_PATH = 'data/random_forest_model.joblib'
-rf_model = joblib.load(MODEL_PATH) if os.path.exists(MODEL_PATH) else None
+# Loaded on demand and cached process-wide, keyed on the model file's mtime
+from model_cache import MODEL_PATH, load_model
 
 
 st.set_page_config(page_title="Asian Handicap Betting Assistant", layout="centered")
@@ -71,10 +69,12 @@ if 'analysis_done' not in st.session_state:
     st.session_state.analysis_done = False
 if 'analysis_data' not in st.session_state:
     st.session_state.analysis_data = {}
+if 'slate' not in st.session_state:
+    st.session_state.slate = []
 
  # Tabs
 
-tab1, tab2, tab3 = st.tabs(["Analysis", "History", "Settings"])
+tab1, tab2, tab3, tab4 = st.tabs(["Analysis", "History", "Risk", "Settings"])
 
 with tab1:
     # ---------------- BANKROLL ----------------
@@ -121,17 +121,71 @@ with tab1:
     from logic import COMPETITIONS
     selected_league = st.selectbox("Select League", list(COMPETITIONS.keys()), key="league_select")
 
+    if st.button(f"⚡ Prefetch {selected_league}", key="prefetch_league"):
+        from async_fetch import prefetch_league
+        with st.spinner(f"Fetching stats for every {selected_league} team..."):
+            league_stats = prefetch_league(selected_league, FOOTBALL_DATA_API_KEY)
+        if league_stats:
+            st.success(f"Loaded stats for {len(league_stats)} teams. Team lookups are now instant.")
+        else:
+            st.error("Could not prefetch league. Check API key.")
+
+    if st.button(f"📐 Update {selected_league} Ratings", key="update_ratings"):
+        from ratings import fetch_finished_matches, update_ratings
+        with st.spinner("Fitting attack/defence ratings..."):
+            finished = fetch_finished_matches(selected_league, FOOTBALL_DATA_API_KEY)
+            fitted = update_ratings(selected_league, finished) if finished else None
+        if fitted and fitted[0].get("theta"):
+            state, added = fitted
+            st.success(f"Ratings for {len(state['teams'])} teams from {len(state['matches']['id'])} matches "
+                       f"({added} new, {state['iterations']} fit steps).")
+        else:
+            st.error("Could not fetch finished matches. Check API key.")
+
     # ---------------- INPUTS ----------------
+    from logic import stats_age, team_index
+    from warmer import format_age, format_bytes, warmer_status
+
+    def pick_team(target_key, picker_key):
+        if st.session_state[picker_key]:
+            st.session_state[target_key] = st.session_state[picker_key]
+
+    def team_suggestions(key):
+        # Resolved club and how old its cached stats are; ambiguous names
+        # get a picker of the ranked matches
+        typed = st.session_state.get(key, "").strip()
+        if not typed:
+            return
+        index = team_index(team_list)
+        best = index.resolve(typed, selected_league)
+        if best:
+            parts = [] if best['name'] == typed else [f"→ {best['name']}" + (f" ({best['tla']})" if best.get('tla') else "")]
+            age = stats_age(best)
+            if age is not None:
+                parts.append(f"stats cached {format_age(age)} ago")
+            if parts:
+                st.caption(" · ".join(parts))
+            return
+        ranked = index.search(typed, 5, selected_league)
+        if ranked:
+            st.selectbox("Did you mean", [""] + [team['name'] for team, _ in ranked], key=f"{key}_pick",
+                         format_func=lambda name: name or "Choose a team...",
+                         on_change=pick_team, args=(key, f"{key}_pick"))
+
     col1, col2 = st.columns(2)
     with col1:
         st.header("Team A")
         team_a_name = st.text_input("Team A Name", key="team_a_name")
+        team_suggestions("team_a_name")
         if st.button("Load/Fetch Stats A", key="load_a"):
             api_key = FOOTBALL_DATA_API_KEY  # Use hardcoded API key
             if team_a_name:
-                # Try API fetch only
+                # Prefetched league data first, API only if missing
                 from logic import fetch_team_stats
-                stats = fetch_team_stats(team_a_name, api_key, is_home=True, league=selected_league)
+                from async_fetch import local_team_stats
+                stats = local_team_stats(team_a_name, selected_league, is_home=True)
+                if not stats:
+                    stats = fetch_team_stats(team_a_name, api_key, is_home=True, league=selected_league)
                 if stats:
                     st.session_state.a_form = stats['form']
                     st.session_state.a_goal = stats['goal_diff']
@@ -150,12 +204,16 @@ with tab1:
     with col2:
         st.header("Team B")
         team_b_name = st.text_input("Team B Name", key="team_b_name")
+        team_suggestions("team_b_name")
         if st.button("Load/Fetch Stats B", key="load_b"):
             api_key = FOOTBALL_DATA_API_KEY  # Use hardcoded API key
             if team_b_name:
-                # Try API fetch only
+                # Prefetched league data first, API only if missing
                 from logic import fetch_team_stats
-                stats = fetch_team_stats(team_b_name, api_key, is_home=False, league=selected_league)
+                from async_fetch import local_team_stats
+                stats = local_team_stats(team_b_name, selected_league, is_home=False)
+                if not stats:
+                    stats = fetch_team_stats(team_b_name, api_key, is_home=False, league=selected_league)
                 if stats:
                     st.session_state.b_form = stats['form']
                     st.session_state.b_goal = stats['goal_diff']
@@ -171,30 +229,44 @@ with tab1:
         b_home = st.slider("Home B", 0.0, 1.0, value=st.session_state.get('b_home', 0.5))
         b_def = st.slider("Defense B", 0.0, 1.0, value=st.session_state.get('b_def', 0.5))
 
+    if st.button("Fetch Both Teams", key="load_both"):
+        if team_a_name and team_b_name:
+            from async_fetch import fetch_fixture_stats, local_team_stats
+            stats_a = local_team_stats(team_a_name, selected_league, is_home=True)
+            stats_b = local_team_stats(team_b_name, selected_league, is_home=False)
+            if not (stats_a and stats_b):
+                stats_a, stats_b = fetch_fixture_stats(team_a_name, team_b_name, FOOTBALL_DATA_API_KEY, selected_league)
+            if stats_a and stats_b:
+                st.session_state.a_form = stats_a['form']
+                st.session_state.a_goal = stats_a['goal_diff']
+                st.session_state.a_home = stats_a['home_adv']
+                st.session_state.a_def = stats_a['defense']
+                st.session_state.b_form = stats_b['form']
+                st.session_state.b_goal = stats_b['goal_diff']
+                st.session_state.b_home = 0.0  # Away
+                st.session_state.b_def = stats_b['defense']
+                st.rerun()
+            else:
+                st.error("Could not fetch stats for both teams. Check team names or API key.")
+        else:
+            st.warning("Enter both team names first.")
+
     # Step 2: Analysis
     if st.session_state.step == 2:
         st.header("Match Analysis")
         st.info("Step 2: Review model's suggested bet based on your team inputs.")
         # --- ML Prediction ---
+        rf_model = load_model(MODEL_PATH)
         if rf_model:
-            features = [
-                st.session_state.get('a_form', 0.5),
-                st.session_state.get('b_form', 0.5),
-                st.session_state.get('a_goal', 0.5),
-                st.session_state.get('b_goal', 0.5),
-                st.session_state.get('a_goal', 0.0),
-                st.session_state.get('b_goal', 0.0),
-                1.0  # Assume home for Team A
-            ]
-            X_pred = np.array(features).reshape(1, -1)
-            pred = rf_model.predict(X_pred)[0]
-            proba = rf_model.predict_proba(X_pred)[0]
-            outcome_map = {1: 'Team A Win', 0: 'Draw', -1: 'Team B Win'}
+            from features import feature_row, predict_matrix
+            stats_a = {'form': st.session_state.get('a_form', 0.5), 'goal_diff': st.session_state.get('a_goal', 0.5)}
+            stats_b = {'form': st.session_state.get('b_form', 0.5), 'goal_diff': st.session_state.get('b_goal', 0.5)}
+            scored = predict_matrix(rf_model, [feature_row(stats_a, stats_b, home=1.0)]).iloc[0]  # Assume home for Team A
             st.subheader("🤖 ML Model Prediction")
-            st.write(f"Prediction: **{outcome_map.get(pred, 'Unknown')}**")
-            st.write(f"Probabilities: Team A Win: {proba[2]:.2f}, Draw: {proba[1]:.2f}, Team B Win: {proba[0]:.2f}")
+            st.write(f"Prediction: **{scored['prediction']}**")
+            st.write(f"Probabilities: Team A Win: {scored.get('home_win', 0):.2f}, Draw: {scored.get('draw', 0):.2f}, Team B Win: {scored.get('away_win', 0):.2f}")
         else:
-            st.warning("ML model not found. Please train the model first.")
+            st.warning("ML model not found. Train it first: python train_model.py")
         # --- Existing logic ---
         ega = expected_goals(
             st.session_state.get('a_form', 0.5),
@@ -210,17 +282,18 @@ with tab1:
         )
         sd = calibrated_strength_diff(ega, egb)
         handicap = suggest_handicap(sd)
-        probs = match_probabilities(ega, egb)
+        probs, goal_diff = probabilities(ega, egb)
         win_p = probs.get('win', 0.33)
         draw_p = probs.get('draw', 0.33)
         loss_p = probs.get('loss', 0.34)
-        fair_odds = fair_odds_from_prob(win_p)
+        fair_odds = handicap_fair_odds(handicap, goal_diff)
         st.session_state.analysis_data = {
             "handicap": handicap,
             "win_p": round(win_p, 3),
             "draw_p": round(draw_p, 3),
             "loss_p": round(loss_p, 3),
             "fair_odds": fair_odds,
+            "goal_diff": goal_diff,
             "ega": round(ega, 2),
             "egb": round(egb, 2)
         }
@@ -231,19 +304,32 @@ with tab1:
     st.header("Match Analysis Workflow")
     st.info("📋 Step 1: Enter team names → Step 2: Get suggested handicap & fair odds → Step 3: Enter bookmaker odds → Step 4: Check EV")
     
+    use_ratings = st.checkbox("Use fitted team ratings (Team A at home)", key="use_ratings",
+                              help="Dixon-Coles attack/defence ratings from 'Update Ratings' instead of the sliders")
+
     if st.button("Analyze Match"):
         ega = expected_goals(a_form, a_goal, a_home, a_def)
         egb = expected_goals(b_form, b_goal, b_home, b_def)
+        rho = 0.0
+        if use_ratings:
+            from ratings import load_state, predict_goals
+            rated = predict_goals(load_state(selected_league), team_a_name, team_b_name)
+            if rated:
+                ega, egb, rho = rated
+            else:
+                st.warning("No fitted ratings for these teams, using the sliders.")
 
         sd = calibrated_strength_diff(ega, egb)
         handicap = suggest_handicap(sd)
 
-        probs = match_probabilities(ega, egb)
+        # Precomputed table lookup, falls back to the Poisson engine
+        probs, goal_diff = probabilities(ega, egb, rho)
         win_p = probs.get('win', 0.33)
         draw_p = probs.get('draw', 0.33)
         loss_p = probs.get('loss', 0.34)
 
-        fair_odds = fair_odds_from_prob(win_p)
+        # Fair odds of the suggested line, priced off the full goal-difference distribution
+        fair_odds = handicap_fair_odds(handicap, goal_diff)
 
         # Store in session state
         st.session_state.analysis_done = True
@@ -253,6 +339,7 @@ with tab1:
             "draw_p": round(draw_p, 3),
             "loss_p": round(loss_p, 3),
             "fair_odds": fair_odds,
+            "goal_diff": goal_diff,
             "ega": round(ega, 2),
             "egb": round(egb, 2)
         }
@@ -306,7 +393,7 @@ with tab1:
             )
             
             if st.button("Calculate EV & Get Recommendation"):
-                ev = asian_handicap_ev(data['handicap'], data['win_p'], data['draw_p'], data['loss_p'], bookmaker_odds)
+                ev = asian_handicap_ev(data['handicap'], data['win_p'], data['draw_p'], data['loss_p'], bookmaker_odds, data.get('goal_diff'))
                 stake = calculate_stake(bankroll, ev)
                 
                 st.session_state.analysis_data['ev'] = ev
@@ -322,9 +409,9 @@ with tab1:
                 with col2:
                     st.metric("Bookmaker Odds", bookmaker_odds)
                 with col3:
-                    st.metric("EV", ev, delta="Positive" if ev > 0 else "Negative")
+                    st.metric("EV", ev, delta="Positive" if ev and ev > 0 else "Negative")
                 
-                if ev and ev > 0.03:
+                if ev and ev >= EV_THRESHOLD:
                     st.success(f"✅ BET RECOMMENDED | EV: {ev} | Suggested Stake: ₹{stake}")
                     if st.button("Save This Bet"):
                         result = save_bet({
@@ -335,15 +422,32 @@ with tab1:
                             "win_p": data['win_p'],
                             "draw_p": data['draw_p'],
                             "loss_p": data['loss_p'],
-                            "fair_odds": data['fair_odds']
+                            "fair_odds": data['fair_odds'],
+                            "fixture": f"{team_a_name} vs {team_b_name}"
                         })
                         if result == "SAVED":
                             st.success("✅ Bet saved successfully.")
                             st.session_state.analysis_done = False
-                        elif result == "OPEN_BET_EXISTS":
-                            st.warning("⚠️ You already have an open bet. Settle it first.")
                 else:
                     st.error(f"❌ SKIP BET | EV is negative or too low: {ev}")
+
+            # Collect bets for a busy matchday; stakes are sized together below
+            if st.button("➕ Add to Slate", key="add_to_slate"):
+                from handicap import parse_handicap
+                st.session_state.slate.append({
+                    "fixture": f"{team_a_name} vs {team_b_name}",
+                    "handicap": data['handicap'],
+                    "line": parse_handicap(data['handicap']),
+                    "odds": bookmaker_odds,
+                    "ev": asian_handicap_ev(data['handicap'], data['win_p'], data['draw_p'], data['loss_p'], bookmaker_odds, data.get('goal_diff')),
+                    "win_p": data['win_p'],
+                    "draw_p": data['draw_p'],
+                    "loss_p": data['loss_p'],
+                    "fair_odds": data['fair_odds'],
+                    "goal_diff": data['goal_diff']
+                })
+                st.session_state.pop('slate_result', None)
+                st.success(f"Added to slate ({len(st.session_state.slate)} bets).")
         
         with tab_alternatives:
             st.markdown(f"""
@@ -405,6 +509,9 @@ with tab1:
                     alternatives + ["Other"],
                     key="alt_handicap_select"
                 )
+                if alt_handicap == "Other":
+                    from handicap import LADDER_LABELS
+                    alt_handicap = st.selectbox("Any Line", LADDER_LABELS, index=LADDER_LABELS.index("AH 0"), key="alt_handicap_any")
             
             with col_alt_odds:
                 alt_bookmaker_odds = st.number_input(
@@ -416,52 +523,304 @@ with tab1:
                 )
             
             if st.button("Calculate EV for Alternative"):
-                ev_alt = asian_handicap_ev(alt_handicap, data['win_p'], data['draw_p'], data['loss_p'], alt_bookmaker_odds)
+                ev_alt = asian_handicap_ev(alt_handicap, data['win_p'], data['draw_p'], data['loss_p'], alt_bookmaker_odds, data.get('goal_diff'))
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    st.metric("Fair Odds", data['fair_odds'])
+                    st.metric("Fair Odds", handicap_fair_odds(alt_handicap, data['goal_diff']) if data.get('goal_diff') else data['fair_odds'])
                 with col2:
                     st.metric("Bookmaker Odds", alt_bookmaker_odds)
                 with col3:
-                    st.metric("EV (Alternative)", ev_alt, delta="Positive" if ev_alt > 0 else "Negative")
+                    st.metric("EV (Alternative)", ev_alt, delta="Positive" if ev_alt and ev_alt > 0 else "Negative")
                 
-                if ev_alt and ev_alt > 0.03:
+                if ev_alt and ev_alt >= EV_THRESHOLD:
                     st.success(f"✅ Alternative looks good! EV: {ev_alt}")
                 else:
                     st.warning("⚠️ Alternative also has low EV - Consider SKIPPING")
-            
+
+            st.divider()
+            st.subheader("📈 Best Line Finder")
+            st.caption("Fill in every line your bookmaker quotes. Team B odds are for the mirrored line (Team A -0.5 ↔ Team B +0.5). Leave odds empty if not offered.")
+
+            from handicap import find_best_lines, format_handicap, parse_handicap
+            ladder_df = pd.DataFrame({
+                "Team A Line": [format_handicap(x / 4) for x in range(-8, 9)],
+                "Team A Odds": [None] * 17,
+                "Team B Odds": [None] * 17
+            })
+            ladder_df = st.data_editor(
+                ladder_df,
+                key="odds_ladder",
+                hide_index=True,
+                disabled=["Team A Line"],
+                column_config={
+                    "Team A Odds": st.column_config.NumberColumn(min_value=1.01, step=0.01),
+                    "Team B Odds": st.column_config.NumberColumn(min_value=1.01, step=0.01)
+                }
+            )
+
+            if st.button("Find Best Line"):
+                home_ladder, away_ladder = [], []
+                for _, row in ladder_df.iterrows():
+                    line = parse_handicap(row["Team A Line"])
+                    if pd.notna(row["Team A Odds"]):
+                        home_ladder.append((row["Team A Line"], float(row["Team A Odds"])))
+                    if pd.notna(row["Team B Odds"]):
+                        away_ladder.append((-line, float(row["Team B Odds"])))
+
+                by_ev, by_growth = find_best_lines(data['goal_diff'], home_ladder, away_ladder)
+                if not by_ev:
+                    st.warning("Enter odds for at least one line.")
+                else:
+                    best = by_growth[0] if by_growth[0]['growth'] > 0 else by_ev[0]
+                    if best['ev'] >= EV_THRESHOLD:
+                        st.success(f"✅ Best bet: **{best['side']} {best['handicap']} @ {best['odds']}** | EV: {best['ev']} | Kelly: {best['kelly']:.1%}")
+                    else:
+                        st.error(f"❌ SKIP BET | Best EV on the ladder is only {best['ev']} ({best['side']} {best['handicap']})")
+
+                    col_ev, col_growth = st.columns(2)
+                    with col_ev:
+                        st.write("**Ranked by EV**")
+                        st.dataframe(pd.DataFrame(by_ev)[['side', 'handicap', 'odds', 'ev', 'fair_odds']], hide_index=True)
+                    with col_growth:
+                        st.write("**Ranked by Kelly growth**")
+                        st.dataframe(pd.DataFrame(by_growth)[['side', 'handicap', 'odds', 'kelly', 'growth']], hide_index=True)
+
+
+    # ---------------- SLATE ----------------
+    if st.session_state.slate:
+        from portfolio import MAX_BET_FRACTION, MAX_EXPOSURE, portfolio_stakes
+        st.header("Matchday Slate")
+        slate = st.session_state.slate
+        st.dataframe(pd.DataFrame(slate)[['fixture', 'handicap', 'odds', 'ev']], hide_index=True)
+        col_cap, col_total = st.columns(2)
+        with col_cap:
+            bet_cap = st.slider("Max stake per bet", 0.01, 0.10, MAX_BET_FRACTION, 0.01, format="%.2f")
+        with col_total:
+            total_cap = st.slider("Max total exposure", 0.05, 0.60, MAX_EXPOSURE, 0.05, format="%.2f")
+
+        col_opt, col_save, col_clear = st.columns(3)
+        with col_opt:
+            if st.button("Optimize Stakes", key="optimize_slate"):
+                st.session_state.slate_result = portfolio_stakes(slate, bet_cap, total_cap)
+        with col_clear:
+            if st.button("Clear Slate", key="clear_slate"):
+                st.session_state.slate = []
+                st.session_state.pop('slate_result', None)
+                st.rerun()
+
+        result = st.session_state.get('slate_result')
+        if result is not None and len(result['fractions']) == len(slate):
+            stakes = [round(bankroll * f, 2) if f >= 1e-4 else 0 for f in result['fractions']]
+            st.dataframe(pd.DataFrame({
+                'fixture': [b['fixture'] for b in slate],
+                'handicap': [b['handicap'] for b in slate],
+                'fraction': result['fractions'].round(4),
+                'stake': stakes
+            }), hide_index=True)
+            st.caption(f"Exposure {result['exposure']:.1%} of bankroll | expected log growth {result['growth']:.5f} | "
+                       f"solved in {result['seconds'] * 1000:.0f} ms")
+            with col_save:
+                if st.button("Save Slate", key="save_slate"):
+                    for bet, stake in zip(slate, stakes):
+                        if stake > 0:
+                            save_bet({**{k: bet[k] for k in ('fixture', 'handicap', 'odds', 'ev', 'win_p', 'draw_p', 'loss_p', 'fair_odds')}, 'stake': stake})
+                    st.session_state.slate = []
+                    st.session_state.pop('slate_result', None)
+                    st.success(f"✅ Saved {sum(1 for x in stakes if x > 0)} bets.")
 
     # ---------------- SETTLEMENT ----------------
-    st.header("Settle Last Bet")
-    result = st.selectbox("Result", ["WIN", "HALF WIN", "PUSH", "HALF LOSS", "LOSS"], key="settle_result")
+    st.header("Settle Open Bets")
+    pending = open_bets()
+    if not pending:
+        st.caption("No open bets.")
+    else:
+        bet_labels = {
+            b["id"]: f"#{b['id']} {b['fixture'] or 'Team A'} | {b['handicap']} @ {b['odds']} | ₹{b['stake']}"
+            for b in pending
+        }
+        bet_id = st.selectbox("Open Bet", list(bet_labels), format_func=bet_labels.get, key="settle_bet_id")
+        result = st.selectbox("Result", ["WIN", "HALF WIN", "PUSH", "HALF LOSS", "LOSS"], key="settle_result")
 
-    if st.button("Settle Bet"):
-        new_br, err = settle_last_bet(result)
-        if err:
-            st.warning(err)
-        else:
-            st.success(f"Bet settled. New bankroll: ₹{new_br}")
+        if st.button("Settle Bet"):
+            new_br, err = settle_bet(bet_id, result)
+            if err:
+                st.warning(err)
+            else:
+                st.success(f"Bet settled. New bankroll: ₹{new_br}")
 
 with tab2:
     st.header("Bet History")
-    try:
-        df = pd.read_csv("data/bets.csv")
-        st.dataframe(df)
-        
-        # Bankroll chart
-        if not df.empty and 'profit' in df.columns:
-            df['cumulative_profit'] = df['profit'].cumsum()
-            fig, ax = plt.subplots()
-            ax.plot(df['cumulative_profit'])
-            ax.set_title("Bankroll Over Time")
-            ax.set_xlabel("Bet Number")
-            ax.set_ylabel("Cumulative Profit")
-            st.pyplot(fig)
-    except:
+    from logic import get_bet_store
+    from bet_history import profit_curve
+    store = get_bet_store()
+    total_bets = store.count()
+    if not total_bets:
         st.info("No bets yet.")
+    else:
+        # Headline numbers come from the weekly buckets, not the bet rows
+        weeks = store.pnl_periods("week")
+        settled = sum(w['bets'] for w in weeks)
+        staked = sum(w['staked'] for w in weeks)
+        profit = sum(w['profit'] for w in weeks)
+        col_b, col_p, col_r = st.columns(3)
+        col_b.metric("Settled Bets", f"{settled} / {total_bets}")
+        col_p.metric("Profit", f"₹{profit:,.2f}")
+        col_r.metric("ROI", f"{profit / staked:.1%}" if staked else "-")
+
+        # Cumulative profit, downsampled to a fixed number of points
+        x, y, n_points = profit_curve(store)
+        if n_points:
+            st.subheader("Bankroll Over Time")
+            st.line_chart(pd.DataFrame({"Cumulative Profit": y}, index=pd.Index(x.astype(int), name="Settled Bet")))
+            if n_points > len(x):
+                st.caption(f"{len(x)} of {n_points} points shown (LTTB downsampled).")
+
+        period = st.radio("P&L by", ["day", "week"], horizontal=True, key="pnl_period")
+        buckets = pd.DataFrame(store.pnl_periods(period, limit=52))
+        if not buckets.empty:
+            st.dataframe(buckets.round(2), hide_index=True)
+
+        # One page of bets at a time, newest first
+        col_size, col_page = st.columns(2)
+        with col_size:
+            page_size = st.selectbox("Bets per page", [25, 50, 100], key="history_page_size")
+        pages = (total_bets + page_size - 1) // page_size
+        with col_page:
+            page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key="history_page")
+        st.dataframe(pd.DataFrame(store.recent_bets(page_size, (page - 1) * page_size)), hide_index=True)
 
 with tab3:
+    st.header("Bankroll Risk Simulator")
+    st.caption("Monte Carlo bankroll paths for the current staking tiers and the bets' own stakes against full "
+               "and fractional Kelly.")
+    source = st.radio("Bets to replay", ["All logged bets", "Open bets", "Open and planned bets", "Backtest history"],
+                      horizontal=True)
+    col_paths, col_bets, col_ruin = st.columns(3)
+    with col_paths:
+        n_paths = st.number_input("Paths", min_value=1000, max_value=1_000_000, value=100_000, step=10_000)
+    with col_bets:
+        n_bets = st.number_input("Bets per path", min_value=10, max_value=2000, value=100, step=10)
+    with col_ruin:
+        ruin_level = st.slider("Ruin at bankroll fraction", 0.05, 0.9, 0.5, 0.05)
+
+    if st.button("Run Simulation", key="run_risk_sim"):
+        from bankroll_sim import (bet_pool, merge_pools, policy_fractions, pool_from_backtest, pool_from_bets,
+                                  pool_from_slate, simulate)
+        from logic import get_bet_store
+        pool = None
+        skipped = 0
+        if source == "Backtest history":
+            from backtest import price_history
+            from historical import HISTORY_FILE, load_history
+            try:
+                pool = pool_from_backtest(price_history(load_history(HISTORY_FILE), "market"))
+                keep = pool["ev"] > 0
+                pool = bet_pool(pool["probs"][keep], pool["odds"][keep])
+            except (OSError, KeyError, ValueError):
+                pool = None
+        elif source == "Open and planned bets":
+            # Open bets plus the matchday slate, at its optimised stakes once sized
+            pool, skipped = pool_from_bets(get_bet_store().open_bets())
+            slate = st.session_state.slate
+            slate_result = st.session_state.get('slate_result')
+            slate_stakes = None
+            if slate_result is not None and len(slate_result['fractions']) == len(slate):
+                slate_stakes = get_bankroll() * slate_result['fractions']
+            elif slate:
+                st.caption("Optimize the slate to also replay its planned stakes.")
+            pool = merge_pools(pool, pool_from_slate(slate, slate_stakes))
+        else:
+            store = get_bet_store()
+            pool, skipped = pool_from_bets(store.open_bets() if source == "Open bets" else store.all_bets())
+
+        if skipped:
+            st.caption(f"Skipped {skipped} bets on lines beyond ±0.5: only their W/D/L probabilities were logged, "
+                       "which cannot price those lines.")
+        if not pool or not len(pool["odds"]):
+            st.warning("No bets with probabilities and odds to simulate.")
+        else:
+            with st.spinner(f"Simulating {int(n_paths):,} paths..."):
+                results = simulate(pool, policy_fractions(pool, bankroll=get_bankroll()), int(n_paths), int(n_bets), ruin_level)
+            st.write(f"{len(pool['odds'])} bets in pool, mean EV **{pool['ev'].mean():.2%}**")
+            st.dataframe(results, hide_index=True)
+            current = results.iloc[0]
+            st.info(f"Current tiers: median bankroll ₹{get_bankroll() * current['median_growth']:,.0f} after {int(n_bets)} bets, "
+                    f"95th percentile drawdown {current['dd_p95']:.1%}, risk of ruin {current['risk_of_ruin']:.2%}")
+
+with tab4:
     st.header("Settings")
     st.success("✅ API Key is configured automatically and ready to use!")
     st.info("Your Football Data API key is securely stored in the app config.")
+
+    st.subheader("API Response Cache")
+    from cache import response_cache
+    cache_stats = response_cache.stats
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Memory Hits", cache_stats["memory_hits"])
+    with col2:
+        st.metric("Disk Hits", cache_stats["disk_hits"])
+    with col3:
+        st.metric("Misses", cache_stats["misses"])
+    st.caption(f"Hit ratio this session: {response_cache.hit_ratio()}")
+
+    from api_client import get_client
+    client = get_client()
+    st.caption(
+        f"API requests: {client.stats['requests']} | Rate limited: {client.stats['throttled']} | "
+        f"Quota left (est.): {client.bucket.available()}/min"
+    )
+    st.caption(
+        f"Downloaded: {format_bytes(client.stats['bytes'])} | Not modified (304): {client.stats['not_modified']} | "
+        f"Saved by delta sync / revalidation: {format_bytes(client.stats['saved_bytes'])}"
+    )
+    if st.button("Clear Cache"):
+        response_cache.clear()
+        st.success("Cache cleared. Next fetch will go to the API.")
+
+    st.subheader("Background Stats Warmer")
+    status = warmer_status()
+    if not status:
+        st.caption("Not running. `python run_app.py` starts it next to the app, or run `python warmer.py` yourself.")
+    else:
+        import time
+        now = time.time()
+        teams = status["teams"]
+        fresh = sum(t["refreshed_at"] is not None and now - t["refreshed_at"] <= t["max_age"] for t in teams)
+        st.caption(f"Last pass {format_age(now - status['updated_at'])} ago | "
+                   f"{fresh}/{len(teams)} teams with upcoming kickoffs fresh | "
+                   f"{status['requests']} API requests, {format_bytes(status.get('bytes', 0))} since start "
+                   f"({format_bytes(status.get('saved_bytes', 0))} saved)")
+        if teams:
+            st.dataframe(pd.DataFrame([
+                {
+                    "Kickoff (UTC)": t["kickoff"][:16].replace("T", " "),
+                    "League": t["league"],
+                    "Team": t["name"],
+                    "Stats age": "-" if t["refreshed_at"] is None else format_age(now - t["refreshed_at"])
+                }
+                for t in teams[:20]
+            ]), hide_index=True)
+
+    st.subheader("Bankroll Ledger")
+    from logic import get_ledger
+    ledger = get_ledger()
+    if st.button("Verify Ledger"):
+        ok, scanned, checkpointed = ledger.verify()
+        if ok:
+            st.success(f"✅ Ledger consistent. Balance: ₹{scanned}")
+        else:
+            repaired = ledger.repair()
+            st.warning(f"⚠️ Checkpoint (₹{checkpointed}) disagreed with the log (₹{scanned}). Checkpoint rebuilt: ₹{repaired}")
+
+    st.subheader("Probability Table")
+    from prob_table import load_table, build_table
+    if load_table():
+        st.caption("✅ Precomputed table is current. Analysis uses table lookups.")
+    else:
+        st.caption("⚠️ Table missing or built for other model constants. Analysis falls back to live Poisson math.")
+    if st.button("Rebuild Probability Table"):
+        with st.spinner("Building table..."):
+            meta = build_table()
+        st.success(f"Built {meta['size']}x{meta['size']} table.")
@@ -0,0 +1,100 @@
+import asyncio
+
+from cache import response_cache, MATCHES_TTL
+from logic import (
+    COMPETITIONS,
+    fetch_league_teams,
+    fetch_team_stats,
+    cached_team_stats,
+    fetch_team_stats_by_id,
+    find_team
+)
+
+# Blocking fetches run on worker threads; the shared api_client bucket
+# keeps the combined request rate inside the quota.
+MAX_CONCURRENCY = 4
+
+# ---------------- ASYNC TEAM STATS ----------------
+
+async def fetch_team_stats_async(team_name, api_key, is_home=True, league='Premier League'):
+    return await asyncio.to_thread(fetch_team_stats, team_name, api_key, is_home, league)
+
+
+async def fetch_fixture_stats_async(team_a, team_b, api_key, league='Premier League'):
+    # Home and away side fetched concurrently
+    return await asyncio.gather(
+        fetch_team_stats_async(team_a, api_key, True, league),
+        fetch_team_stats_async(team_b, api_key, False, league)
+    )
+
+
+def fetch_fixture_stats(team_a, team_b, api_key, league='Premier League'):
+    return asyncio.run(fetch_fixture_stats_async(team_a, team_b, api_key, league))
+
+# ---------------- LEAGUE PREFETCH ----------------
+
+def league_stats_key(league):
+    return f"stats:{COMPETITIONS.get(league, 2021)}"
+
+
+async def prefetch_league_async(league, api_key, max_concurrency=MAX_CONCURRENCY):
+    try:
+        teams = await asyncio.to_thread(fetch_league_teams, api_key, league)
+    except Exception as e:
+        print(f"API Error: {e}")
+        return {}
+    if not teams:
+        return {}
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def one(team):
+        async with semaphore:
+            try:
+                stats = await asyncio.to_thread(fetch_team_stats_by_id, team['id'], api_key, True)
+            except Exception as e:
+                print(f"API Error: {e}")
+                stats = None
+            return team, stats
+
+    results = await asyncio.gather(*(one(t) for t in teams))
+
+    league_stats = {}
+    for team, stats in results:
+        if stats:
+            league_stats[team['name']] = {
+                'id': team['id'],
+                'shortName': team.get('shortName'),
+                'tla': team.get('tla'),
+                'stats': stats
+            }
+    response_cache.set(league_stats_key(league), league_stats)
+    return league_stats
+
+
+def prefetch_league(league, api_key, max_concurrency=MAX_CONCURRENCY):
+    return asyncio.run(prefetch_league_async(league, api_key, max_concurrency))
+
+
+def load_league_stats(league, ttl=MATCHES_TTL):
+    # Local snapshot written by prefetch_league, no network involved
+    return response_cache.get(league_stats_key(league), ttl) or {}
+
+
+def local_team_stats(team_name, league, is_home=True):
+    league_stats = load_league_stats(league)
+    teams = [{'id': entry.get('id'), 'name': full_name, 'shortName': entry.get('shortName'), 'tla': entry.get('tla')}
+             for full_name, entry in league_stats.items()]
+    team = find_team(teams, team_name) if teams else None
+    if team:
+        stats = dict(league_stats[team['name']]['stats'])
+        if not is_home:
+            stats['home_adv'] = 0.0  # Away team
+        return stats
+    stats = cached_team_stats(team_name, league, is_home)
+    if stats:
+        return stats
+    # Otherwise the rolling features over the league's matches in the local
+    # match store, as long as it was ingested recently
+    from team_features import store_team_stats
+    return store_team_stats(team_name, is_home, comp_id=COMPETITIONS.get(league, 2021))
@@ -0,0 +1,136 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from handicap import STATES, format_handicap, price_lines, settlement_returns
+from historical import HISTORY_FILE, load_history, prematch_stats
+from logic import (
+    EV_THRESHOLD,
+    STAKE_TIERS,
+    calibrated_strength_diff,
+    expected_goals,
+    stake_fraction,
+    suggest_handicap_line
+)
+from score_matrix import price_fixtures
+
+STARTING_BANKROLL = 5000.0
+
+# ---------------- PRICING ----------------
+
+def price_history(df, mode="suggested"):
+    # Runs every usable fixture through expected_goals -> suggest_handicap
+    # -> Asian Handicap EV in array form. The bet is the home side of the
+    # market line in ah_line/ah_odds. mode="suggested" only keeps fixtures
+    # where the market line is the one suggest_handicap would pick;
+    # mode="market" prices the market line whatever the suggestion.
+    missing = [c for c in ("ah_line", "ah_odds") if c not in df.columns]
+    if missing:
+        raise ValueError(f"no odds columns ({', '.join(missing)}) in the history; "
+                         "the match store holds results only, backtests need a CSV with Asian Handicap odds")
+    stats = prematch_stats(df)
+    keep = stats["usable"].to_numpy() & df["ah_line"].notna().to_numpy() & df["ah_odds"].notna().to_numpy()
+
+    ega = expected_goals(stats["a_form"].to_numpy(), stats["a_goal_diff"].to_numpy(),
+                         stats["a_home_adv"].to_numpy(), stats["a_defense"].to_numpy())
+    egb = expected_goals(stats["b_form"].to_numpy(), stats["b_goal_diff"].to_numpy(),
+                         stats["b_home_adv"].to_numpy(), stats["b_defense"].to_numpy())
+    suggested = suggest_handicap_line(calibrated_strength_diff(ega, egb))
+
+    line = df["ah_line"].to_numpy(dtype=float)
+    if mode == "suggested":
+        keep &= np.isclose(np.nan_to_num(line, nan=99), suggested)
+    idx = np.flatnonzero(keep)
+    if not len(idx):
+        raise ValueError("no fixtures with pre-match stats and Asian Handicap odds to replay")
+
+    priced = price_fixtures(ega[idx], egb[idx])
+    odds = df["ah_odds"].to_numpy(dtype=float)[idx]
+    lines = price_lines(line[idx], priced["goal_diff_values"], priced["goal_diff"], odds)
+
+    goal_diff = (df["home_goals"].to_numpy() - df["away_goals"].to_numpy())[idx]
+    closing = df["ah_closing_odds"].to_numpy(dtype=float)[idx] if "ah_closing_odds" in df.columns else np.full(len(idx), np.nan)
+
+    return {
+        "index": idx,
+        "date": df["date"].to_numpy()[idx],
+        "line": line[idx],
+        "odds": odds,
+        "closing_odds": closing,
+        "ev": lines["ev"],
+        "fair_odds": lines["fair_odds"],
+        "probs": np.stack([lines[s] for s in STATES], axis=1),
+        "returns": settlement_returns(line[idx], goal_diff, odds)
+    }
+
+# ---------------- SIMULATION ----------------
+
+def simulate(priced, thresholds=(EV_THRESHOLD,), tier_sets=(STAKE_TIERS,), bankroll=STARTING_BANKROLL):
+    # Every (threshold, tiers) pair is one row of a (p, n) matrix, so a
+    # whole sweep is a handful of array ops over the priced fixtures
+    configs = [(t, tiers) for tiers in tier_sets for t in thresholds]
+    fractions = np.stack([stake_fraction(priced["ev"], t, tiers) for t, tiers in configs]).reshape(len(configs), -1)
+    returns = priced["returns"]
+
+    growth = 1 + fractions * returns
+    path = bankroll * np.cumprod(growth, axis=1)
+    before = np.concatenate([np.full((len(configs), 1), bankroll), path[:, :-1]], axis=1)
+    staked = fractions * before
+    profit = staked * returns
+
+    peak = np.maximum.accumulate(np.concatenate([np.full((len(configs), 1), bankroll), path], axis=1), axis=1)[:, 1:]
+    drawdown = 1 - path / peak
+    placed = fractions > 0
+    n_bets = placed.sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        clv = priced["odds"] / priced["closing_odds"] - 1
+        has_clv = placed & ~np.isnan(clv)
+        rows = {
+            "threshold": [t for t, _ in configs],
+            "tiers": [" / ".join(f"{r:.1%}" for _, r in tiers) for _, tiers in configs],
+            "bets": n_bets,
+            "staked": staked.sum(axis=1).round(2),
+            "profit": profit.sum(axis=1).round(2),
+            "roi": np.where(staked.sum(axis=1) > 0, profit.sum(axis=1) / staked.sum(axis=1), 0).round(4),
+            "final_bankroll": (path[:, -1] if path.shape[1] else np.full(len(configs), bankroll)).round(2),
+            "max_drawdown": (drawdown.max(axis=1) if path.shape[1] else np.zeros(len(configs))).round(4),
+            "hit_rate": np.where(n_bets > 0, (placed & (returns > 0)).sum(axis=1) / np.maximum(n_bets, 1), 0).round(4),
+            "clv": np.where(has_clv.sum(axis=1) > 0, np.where(has_clv, clv, 0).sum(axis=1) / np.maximum(has_clv.sum(axis=1), 1), np.nan).round(4)
+        }
+    return pd.DataFrame(rows)
+
+
+def scale_tiers(tiers, factor):
+    return [(upper, risk * factor) for upper, risk in tiers]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay historical fixtures through the xG -> handicap -> EV -> stake chain")
+    parser.add_argument("--history", default=HISTORY_FILE,
+                        help="CSV with results plus ah_line/ah_odds (and optionally ah_closing_odds), or football-data.co.uk columns")
+    parser.add_argument("--mode", choices=["suggested", "market"], default="suggested")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.0, 0.01, 0.02, EV_THRESHOLD, 0.05, 0.08])
+    parser.add_argument("--tier-scales", type=float, nargs="+", default=[0.5, 1.0, 2.0],
+                        help="multipliers applied to the current staking tiers")
+    parser.add_argument("--bankroll", type=float, default=STARTING_BANKROLL)
+    args = parser.parse_args()
+
+    df = load_history(args.history)
+    start = time.perf_counter()
+    try:
+        priced = price_history(df, args.mode)
+    except ValueError as e:
+        parser.error(str(e))
+    priced_at = time.perf_counter()
+    results = simulate(priced, args.thresholds, [scale_tiers(STAKE_TIERS, f) for f in args.tier_scales], args.bankroll)
+    done = time.perf_counter()
+
+    pd.set_option("display.width", 200)
+    print(results.sort_values("final_bankroll", ascending=False).to_string(index=False))
+    lines = ", ".join(format_handicap(x) for x in sorted(set(priced["line"])))
+    print(f"\n{len(df)} fixtures, {len(priced['ev'])} replayed ({args.mode} lines: {lines})")
+    print(f"pricing: {len(df) / max(priced_at - start, 1e-9):,.0f} fixtures/sec | "
+          f"sweep of {len(results)} configs: {len(priced['ev']) * len(results) / max(done - priced_at, 1e-9):,.0f} fixture-configs/sec")
@@ -0,0 +1,192 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from handicap import STATES, kelly_growth, parse_handicap, price_handicap, win_draw_loss_distribution
+from logic import STAKE_TIERS, get_bankroll, get_bet_store, stake_fraction
+
+DEFAULT_PATHS = 100_000
+DEFAULT_BETS = 100
+RUIN_LEVEL = 0.5
+# Logged bets carry only W/D/L probabilities, which settle lines up to this
+# size exactly; beyond it (-1, -0.75, +1.25, ...) they would be mispriced
+EXACT_LINE = 0.5
+# Cells of (paths x bets) per chunk, bounds memory at a few hundred MB
+CHUNK_CELLS = 2_000_000
+PERCENTILES = [50, 90, 95, 99]
+
+# ---------------- BET POOLS ----------------
+
+def bet_pool(probs, odds, stakes=None):
+    # Settlement-state probabilities (m, 5) and decimal odds (m,) of the
+    # bets to replay, plus their per-unit return in each state; stakes (₹)
+    # when the bets come with their own
+    probs = np.asarray(probs, dtype=float).reshape(-1, len(STATES))
+    odds = np.asarray(odds, dtype=float).reshape(-1)
+    probs = probs / probs.sum(axis=1, keepdims=True)
+    returns = np.stack([odds - 1, (odds - 1) / 2, np.zeros_like(odds), np.full_like(odds, -0.5), np.full_like(odds, -1.0)], axis=1)
+    pool = {"probs": probs, "odds": odds, "returns": returns, "ev": (probs * returns).sum(axis=1)}
+    if stakes is not None:
+        pool["stakes"] = np.asarray(stakes, dtype=float).reshape(-1)
+    return pool
+
+
+def pool_from_bets(rows):
+    # (pool or None, bets skipped because their line is beyond EXACT_LINE)
+    probs, odds, stakes = [], [], []
+    skipped = 0
+    for row in rows:
+        if not row.get("odds") or row.get("win_p") is None:
+            continue
+        line = parse_handicap(row["handicap"])
+        if line is None or abs(line) > EXACT_LINE:
+            skipped += 1
+            continue
+        gd = win_draw_loss_distribution(row["win_p"], row["draw_p"], row["loss_p"])
+        priced = price_handicap(row["handicap"], gd, row["odds"])
+        if priced:
+            probs.append([priced[s] for s in STATES])
+            odds.append(row["odds"])
+            stakes.append(row.get("stake"))
+    return (bet_pool(probs, odds, stakes) if odds else None), skipped
+
+
+def pool_from_slate(slate, stakes=None):
+    # Planned bets from the app's matchday slate. Each carries its match's
+    # goal-difference distribution, so every line is priced exactly.
+    # stakes (₹) once the slate has been optimised.
+    probs, odds, kept = [], [], []
+    for i, bet in enumerate(slate):
+        priced = price_handicap(bet["handicap"], bet["goal_diff"], bet["odds"]) if bet.get("goal_diff") else None
+        if priced:
+            probs.append([priced[s] for s in STATES])
+            odds.append(bet["odds"])
+            kept.append(i)
+    if not odds:
+        return None
+    return bet_pool(probs, odds, None if stakes is None else np.asarray(stakes, dtype=float)[kept])
+
+
+def merge_pools(*pools):
+    # One pool from several (e.g. open bets plus the slate); stakes are
+    # kept only when every part has them
+    pools = [p for p in pools if p]
+    if not pools:
+        return None
+    merged = {key: np.concatenate([p[key] for p in pools]) for key in ("probs", "odds", "returns", "ev")}
+    if all("stakes" in p for p in pools):
+        merged["stakes"] = np.concatenate([p["stakes"] for p in pools])
+    return merged
+
+
+def pool_from_backtest(priced):
+    # Output of backtest.price_history
+    return bet_pool(priced["probs"], priced["odds"])
+
+# ---------------- STAKING POLICIES ----------------
+
+def policy_fractions(pool, tiers=STAKE_TIERS, kelly_scales=(1.0, 0.5, 0.25), bankroll=None):
+    # Bankroll fraction each policy puts on each bet in the pool. With a
+    # bankroll, bets that carry their own stakes are also replayed at those.
+    fractions = {"Current tiers": stake_fraction(pool["ev"], tiers=tiers)}
+    stakes = pool.get("stakes")
+    if bankroll and stakes is not None and np.isfinite(stakes).all():
+        fractions["Planned stakes"] = np.clip(stakes / bankroll, 0, 1)
+    priced = {name: pool["probs"][:, i] for i, name in enumerate(STATES)}
+    priced.update({"odds": pool["odds"], "ev": pool["ev"]})
+    kelly, _ = kelly_growth(priced)
+    for scale in kelly_scales:
+        label = "Full Kelly" if scale == 1 else f"{scale:g} Kelly"
+        fractions[label] = kelly * scale
+    return fractions
+
+# ---------------- SIMULATION ----------------
+
+def simulate(pool, fractions, n_paths=DEFAULT_PATHS, n_bets=DEFAULT_BETS, ruin_level=RUIN_LEVEL, seed=42):
+    # Each path places n_bets sequential bets drawn from the pool, every
+    # stake a fraction of the bankroll at the time. All policies see the
+    # same draws, so differences between rows are down to staking alone.
+    # Paths run in chunks so memory stays flat however many are asked for.
+    rng = np.random.default_rng(seed)
+    cum = np.cumsum(pool["probs"], axis=1)
+    cum[:, -1] = 1.0
+    chunk = max(1, CHUNK_CELLS // n_bets)
+
+    names = list(fractions)
+    final = {name: [] for name in names}
+    drawdown = {name: [] for name in names}
+    ruined = {name: 0 for name in names}
+
+    for start in range(0, n_paths, chunk):
+        size = min(chunk, n_paths - start)
+        idx = rng.integers(0, len(pool["odds"]), (size, n_bets))
+        u = rng.random((size, n_bets))
+        state = (u[..., None] > cum[idx]).sum(axis=2)
+        returns = pool["returns"][idx, state]
+
+        for name in names:
+            path = np.cumprod(1 + fractions[name][idx] * returns, axis=1)
+            peak = np.maximum(np.maximum.accumulate(path, axis=1), 1.0)
+            final[name].append(path[:, -1])
+            drawdown[name].append((1 - path / peak).max(axis=1))
+            ruined[name] += int((path.min(axis=1) <= ruin_level).sum())
+
+    rows = []
+    for name in names:
+        growth = np.concatenate(final[name])
+        dd = np.concatenate(drawdown[name])
+        row = {
+            "policy": name,
+            "avg_stake": round(float(fractions[name].mean()), 4),
+            "median_growth": round(float(np.median(growth)), 4),
+            "p05_growth": round(float(np.percentile(growth, 5)), 4),
+            "p_loss": round(float((growth < 1).mean()), 4),
+            "risk_of_ruin": round(ruined[name] / n_paths, 4)
+        }
+        for p, value in zip(PERCENTILES, np.percentile(dd, PERCENTILES)):
+            row[f"dd_p{p}"] = round(float(value), 4)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo bankroll paths and risk of ruin for each staking policy")
+    parser.add_argument("--source", choices=["open", "all", "backtest"], default="all",
+                        help="bets to replay: open bets, every logged bet, or backtest fixtures with value")
+    parser.add_argument("--history", default=None, help="history CSV for --source backtest")
+    parser.add_argument("--paths", type=int, default=DEFAULT_PATHS)
+    parser.add_argument("--bets", type=int, default=DEFAULT_BETS, help="bets per path")
+    parser.add_argument("--ruin", type=float, default=RUIN_LEVEL, help="bankroll fraction counted as ruin")
+    args = parser.parse_args()
+
+    skipped = 0
+    if args.source == "backtest":
+        from backtest import price_history
+        from historical import HISTORY_FILE, load_history
+        try:
+            priced = price_history(load_history(args.history or HISTORY_FILE), "market")
+        except ValueError as e:
+            parser.error(str(e))
+        pool = pool_from_backtest(priced)
+        keep = pool["ev"] > 0
+        pool = bet_pool(pool["probs"][keep], pool["odds"][keep])
+    else:
+        store = get_bet_store()
+        pool, skipped = pool_from_bets(store.open_bets() if args.source == "open" else store.all_bets())
+    if skipped:
+        print(f"skipped {skipped} bets on lines beyond +/-{EXACT_LINE:g} (only W/D/L probabilities were logged)")
+    if not pool or not len(pool["odds"]):
+        parser.error("no bets with probabilities and odds to simulate")
+
+    bankroll = get_bankroll()
+    start = time.perf_counter()
+    results = simulate(pool, policy_fractions(pool, bankroll=bankroll), args.paths, args.bets, args.ruin)
+    elapsed = time.perf_counter() - start
+
+    pd.set_option("display.width", 200)
+    print(results.to_string(index=False))
+    print(f"\n{len(pool['odds'])} bets in pool, mean EV {pool['ev'].mean():.2%}; "
+          f"median bankroll on current tiers ₹{bankroll * results['median_growth'][0]:,.0f} from ₹{bankroll:,.0f}")
+    print(f"{args.paths:,} paths x {args.bets} bets x {len(results)} policies in {elapsed:.1f}s")
@@ -0,0 +1,93 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from multiprocessing import Process, Queue
+
+# N writer processes hammer one data/ directory the way parallel Streamlit
+# sessions do: save a bet, deposit, settle the bet. Afterwards every write
+# must be accounted for.
+
+RESULTS = ["WIN", "HALF WIN", "PUSH", "HALF LOSS", "LOSS"]
+DEPOSIT = 10.0
+
+
+def writer(workdir, ops, seed, queue):
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import logic
+
+    rng = random.Random(seed)
+    profit = 0.0
+    settled = 0
+    for i in range(ops):
+        logic.save_bet({
+            "handicap": "AH 0", "odds": 1.9, "stake": 10.0, "ev": 0.05,
+            "win_p": 0.5, "draw_p": 0.25, "loss_p": 0.25, "fair_odds": 1.8,
+            "fixture": f"writer {seed} bet {i}"
+        })
+        logic.update_bankroll(DEPOSIT)
+        # Every writer races for the oldest open bet, whoever placed it
+        pending = logic.open_bets()
+        if pending:
+            bet = pending[0]
+            result = rng.choice(RESULTS)
+            _, err = logic.settle_bet(bet["id"], result)
+            if not err:
+                settled += 1
+                profit += logic.settlement_profit(bet["stake"], bet["odds"], result)
+    queue.put((settled, profit))
+
+
+def run(writers, ops):
+    workdir = tempfile.mkdtemp(prefix="bench_concurrency_")
+    try:
+        queue = Queue()
+        procs = [Process(target=writer, args=(workdir, ops, seed, queue)) for seed in range(writers)]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        reports = [queue.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        os.chdir(workdir)
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import logic
+
+        bets = logic.get_bet_store().all_bets()
+        settled = sum(r[0] for r in reports)
+        profit = sum(r[1] for r in reports)
+        expected_balance = round(5000 + writers * ops * DEPOSIT + profit, 2)
+        ledger_ok, scanned, _ = logic.get_ledger().verify()
+        db_settled = sum(1 for b in bets if b["settled"])
+        db_profit = sum(b["profit"] for b in bets if b["settled"])
+
+        checks = {
+            "all bets stored": len(bets) == writers * ops,
+            "no bet settled twice": db_settled == settled,
+            "settled profit matches": abs(db_profit - profit) < 0.01 * max(1, settled),
+            "bankroll matches": abs(logic.get_bankroll() - expected_balance) < 0.01 * max(1, settled),
+            "ledger checkpoint consistent": ledger_ok,
+        }
+        total_ops = writers * ops * 2 + settled  # saves + deposits + settlements
+        print(f"writers={writers} ops/writer={ops} elapsed={elapsed:.2f}s throughput={total_ops / elapsed:.0f} ops/sec")
+        print(f"bets={len(bets)} settled={db_settled} bankroll={logic.get_bankroll()} expected={expected_balance}")
+        for name, ok in checks.items():
+            print(f"  [{'OK' if ok else 'FAIL'}] {name}")
+        os.chdir(os.path.dirname(workdir))
+        return all(checks.values())
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel writer benchmark for the bankroll ledger and bet store")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=100, help="bets saved per writer")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.writers, args.ops) else 1)
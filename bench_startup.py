@@ -0,0 +1,57 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Times full script executions of the Streamlit app with streamlit's AppTest
+# harness. Cold = first run in a fresh interpreter (imports, model load),
+# warm = later reruns in the same process, which is what every widget
+# interaction costs. Compare revisions by pointing --app at an older copy:
+#   git show <rev>:app.py > app_before.py && python bench_startup.py --app app_before.py
+
+
+def time_runs(app, runs):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app, default_timeout=120)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+    if at.exception:
+        print(f"warning: {app} raised during run: {at.exception}", file=sys.stderr)
+    return times
+
+
+def cold_run(app):
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, __file__, "--app", app, "--child"],
+        capture_output=True, text=True, check=True
+    )
+    total = time.perf_counter() - start
+    return total, float(out.stdout.strip())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold and warm rerun latency of the Streamlit app")
+    parser.add_argument("--app", default="app.py")
+    parser.add_argument("--cold", type=int, default=3, help="fresh interpreters to start")
+    parser.add_argument("--warm", type=int, default=10, help="reruns in one interpreter")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(time_runs(args.app, 1)[0])
+        sys.exit(0)
+
+    cold = [cold_run(args.app) for _ in range(args.cold)]
+    warm = time_runs(args.app, args.warm + 1)[1:]
+
+    print(f"app: {args.app}")
+    print(f"cold process start + first run: median {statistics.median(c[0] for c in cold) * 1000:.0f} ms")
+    print(f"cold first script run:          median {statistics.median(c[1] for c in cold) * 1000:.0f} ms")
+    print(f"warm rerun:                     median {statistics.median(warm) * 1000:.1f} ms"
+          f" (min {min(warm) * 1000:.1f}, max {max(warm) * 1000:.1f})")
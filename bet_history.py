@@ -0,0 +1,59 @@
+import threading
+
+import numpy as np
+
+CHART_POINTS = 500
+
+# ---------------- DOWNSAMPLING ----------------
+
+def lttb(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: keeps the first and last points and,
+    # from each bucket in between, the point forming the largest triangle
+    # with the previous pick and the next bucket's mean. Peaks and troughs
+    # of the profit curve survive, flat stretches collapse.
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    picked = np.empty(n_out, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return x[picked], y[picked]
+
+# ---------------- CUMULATIVE PROFIT ----------------
+
+# Per-store copy of the cumulative series; each call only reads points
+# settled since the last one, and the downsampled curve is recomputed
+# only when the series has grown
+_series = {}
+_lock = threading.Lock()
+
+
+def profit_curve(store, points=CHART_POINTS):
+    with _lock:
+        entry = _series.setdefault(store.path, {"seq": np.empty(0), "cumulative": np.empty(0), "chart": None})
+        last = int(entry["seq"][-1]) if len(entry["seq"]) else 0
+        head = store.pnl_series(last - 1, limit=1) if last else None
+        if last and (not head or head[0]["seq"] != last):
+            # Aggregates were rebuilt (seq never reuses values), start over
+            entry.update({"seq": np.empty(0), "cumulative": np.empty(0), "chart": None})
+            last = 0
+        new = store.pnl_series(last)
+        if new or entry["chart"] is None or entry["chart"][2] != points:
+            if new:
+                entry["seq"] = np.concatenate([entry["seq"], [r["seq"] for r in new]])
+                entry["cumulative"] = np.concatenate([entry["cumulative"], [r["cumulative"] for r in new]])
+            x, y = lttb(np.arange(1, len(entry["seq"]) + 1), entry["cumulative"], points)
+            entry["chart"] = (x, y, points)
+        x, y, _ = entry["chart"]
+        return x, y, len(entry["seq"])
@@ -0,0 +1,272 @@
+import argparse
+import csv
+import os
+import sqlite3
+from datetime import date, datetime, timedelta
+
+from locking import atomic_write
+
+CSV_COLUMNS = [
+    "timestamp",
+    "handicap",
+    "odds",
+    "stake",
+    "ev",
+    "win_p",
+    "draw_p",
+    "loss_p",
+    "fair_odds",
+    "result",
+    "profit",
+    "settled"
+]
+NUMERIC_COLUMNS = {"odds", "stake", "ev", "win_p", "draw_p", "loss_p", "fair_odds", "profit"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    fixture TEXT NOT NULL DEFAULT '',
+    handicap TEXT,
+    odds REAL,
+    stake REAL,
+    ev REAL,
+    win_p REAL,
+    draw_p REAL,
+    loss_p REAL,
+    fair_odds REAL,
+    result TEXT NOT NULL DEFAULT '',
+    profit REAL,
+    settled TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_bets_open ON bets(id) WHERE settled = '';
+CREATE TABLE IF NOT EXISTS pnl_series (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    bet_id INTEGER NOT NULL,
+    settled_at TEXT NOT NULL,
+    profit REAL NOT NULL,
+    cumulative REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pnl_periods (
+    period TEXT NOT NULL,
+    start TEXT NOT NULL,
+    bets INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    staked REAL NOT NULL,
+    profit REAL NOT NULL,
+    PRIMARY KEY (period, start)
+);
+"""
+
+# Aggregates kept per settlement day and per week (weeks start Monday)
+PERIODS = ("day", "week")
+
+# ---------------- BET STORE ----------------
+
+class BetStore:
+    # SQLite in WAL mode so readers never block the writer. Connections are
+    # opened per call, which keeps the store safe across Streamlit threads.
+
+    def __init__(self, path):
+        self.path = path
+        self.created = not os.path.exists(path)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            stale = conn.execute(
+                "SELECT EXISTS(SELECT 1 FROM bets WHERE settled != '') AND NOT EXISTS(SELECT 1 FROM pnl_series)"
+            ).fetchone()[0]
+        finally:
+            conn.close()
+        if stale:
+            self.rebuild_aggregates()  # store created before aggregates existed
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _query(self, sql, params=()):
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def add_bet(self, data, timestamp):
+        conn = self._connect()
+        try:
+            with conn:
+                cur = conn.execute(
+                    "INSERT INTO bets (timestamp, fixture, handicap, odds, stake, ev, win_p, draw_p, loss_p, fair_odds) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (timestamp, data.get("fixture", ""), data["handicap"], data["odds"], data["stake"], data["ev"],
+                     data["win_p"], data["draw_p"], data["loss_p"], data["fair_odds"])
+                )
+            return cur.lastrowid
+        finally:
+            conn.close()
+
+    def get_bet(self, bet_id):
+        rows = self._query("SELECT * FROM bets WHERE id = ?", (bet_id,))
+        return rows[0] if rows else None
+
+    def last_bet(self):
+        rows = self._query("SELECT * FROM bets ORDER BY id DESC LIMIT 1")
+        return rows[0] if rows else None
+
+    def open_bets(self):
+        return self._query("SELECT * FROM bets WHERE settled = '' ORDER BY id")
+
+    def settle(self, bet_id, result, profit, on_settled=None):
+        # Single-row update; returns False if the bet is missing or already
+        # settled. BEGIN IMMEDIATE takes the write lock up front, so two
+        # sessions settling the same bet cannot both win, and on_settled
+        # (the bankroll posting) runs before the settlement is committed.
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = conn.execute(
+                    "UPDATE bets SET result = ?, profit = ?, settled = 'YES' WHERE id = ? AND settled = ''",
+                    (result, round(profit, 2), bet_id)
+                )
+                if cur.rowcount != 1:
+                    conn.execute("ROLLBACK")
+                    return False
+                stake = conn.execute("SELECT stake FROM bets WHERE id = ?", (bet_id,)).fetchone()[0]
+                self._record_pnl(conn, bet_id, round(profit, 2), stake, datetime.now().isoformat())
+                if on_settled:
+                    on_settled()
+                conn.execute("COMMIT")
+                return True
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    # ---------------- P&L AGGREGATES ----------------
+
+    def _record_pnl(self, conn, bet_id, profit, stake, settled_at):
+        # O(1) per settlement: one row on the cumulative series plus an
+        # upsert into the day and week buckets, inside the caller's transaction
+        last = conn.execute("SELECT cumulative FROM pnl_series ORDER BY seq DESC LIMIT 1").fetchone()
+        conn.execute(
+            "INSERT INTO pnl_series (bet_id, settled_at, profit, cumulative) VALUES (?, ?, ?, ?)",
+            (bet_id, settled_at, profit, round((last[0] if last else 0.0) + profit, 2))
+        )
+        try:
+            day = date.fromisoformat(settled_at[:10])
+        except ValueError:
+            day = date.today()
+        for period, start in (("day", day), ("week", day - timedelta(days=day.weekday()))):
+            conn.execute(
+                "INSERT INTO pnl_periods (period, start, bets, wins, staked, profit) VALUES (?, ?, 1, ?, ?, ?) "
+                "ON CONFLICT(period, start) DO UPDATE SET bets = bets + 1, wins = wins + excluded.wins, "
+                "staked = staked + excluded.staked, profit = profit + excluded.profit",
+                (period, start.isoformat(), int(profit > 0), stake or 0.0, profit)
+            )
+
+    def rebuild_aggregates(self):
+        # Replays every settled bet in id order. Settlement times were not
+        # recorded before the aggregates existed, so those bets are bucketed
+        # by the day they were placed.
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM pnl_series")
+                conn.execute("DELETE FROM pnl_periods")
+                rows = conn.execute("SELECT id, timestamp, stake, profit FROM bets WHERE settled != '' ORDER BY id").fetchall()
+                for row in rows:
+                    self._record_pnl(conn, row["id"], row["profit"] or 0.0, row["stake"], row["timestamp"] or date.today().isoformat())
+            return len(rows)
+        finally:
+            conn.close()
+
+    def pnl_periods(self, period="day", limit=-1):
+        # Most recent buckets first
+        return self._query(
+            "SELECT start, bets, wins, staked, profit FROM pnl_periods WHERE period = ? ORDER BY start DESC LIMIT ?",
+            (period, limit)
+        )
+
+    def pnl_series(self, after_seq=0, limit=-1):
+        # Cumulative profit points settled after after_seq, for incremental reads
+        return self._query("SELECT seq, cumulative FROM pnl_series WHERE seq > ? ORDER BY seq LIMIT ?", (after_seq, limit))
+
+    def recent_bets(self, limit, offset=0):
+        # Newest first, one page at a time
+        return self._query("SELECT * FROM bets ORDER BY id DESC LIMIT ? OFFSET ?", (limit, offset))
+
+    def all_bets(self, limit=-1, offset=0):
+        return self._query("SELECT * FROM bets ORDER BY id LIMIT ? OFFSET ?", (limit, offset))
+
+    def count(self):
+        return self._query("SELECT COUNT(*) AS n FROM bets")[0]["n"]
+
+    # ---------------- CSV IMPORT / EXPORT ----------------
+
+    def import_csv(self, csv_path):
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+
+        records = []
+        for row in rows:
+            record = {}
+            for col in CSV_COLUMNS:
+                value = row.get(col) or ""
+                if col in NUMERIC_COLUMNS:
+                    value = float(value) if value != "" else None
+                record[col] = value
+            record["fixture"] = row.get("fixture", "") or ""
+            records.append(record)
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO bets (timestamp, fixture, handicap, odds, stake, ev, win_p, draw_p, loss_p, fair_odds, result, profit, settled) "
+                    "VALUES (:timestamp, :fixture, :handicap, :odds, :stake, :ev, :win_p, :draw_p, :loss_p, :fair_odds, :result, :profit, :settled)",
+                    records
+                )
+        finally:
+            conn.close()
+        self.rebuild_aggregates()
+        return len(records)
+
+    def export_csv(self, csv_path):
+        # Original bets.csv layout first, id / fixture appended
+        rows = self.all_bets()
+
+        def write(f):
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS + ["id", "fixture"])
+            for row in rows:
+                writer.writerow([("" if row[col] is None else row[col]) for col in CSV_COLUMNS + ["id", "fixture"]])
+
+        atomic_write(csv_path, write)
+        return len(rows)
+
+
+if __name__ == "__main__":
+    # Not imported from logic: importing it would already create the database
+    BETS_DB = os.path.join("data", "bets.db")
+    BETS_FILE = os.path.join("data", "bets.csv")
+
+    parser = argparse.ArgumentParser(description="Bet store maintenance")
+    parser.add_argument("command", choices=["migrate", "export"])
+    parser.add_argument("--csv", default=BETS_FILE, help="CSV file to read from / write to")
+    parser.add_argument("--db", default=BETS_DB, help="SQLite database")
+    args = parser.parse_args()
+
+    store = BetStore(args.db)
+    if args.command == "migrate":
+        if store.count():
+            parser.error(f"{args.db} already holds bets, refusing to import twice")
+        print(f"Imported {store.import_csv(args.csv)} bets from {args.csv}")
+    else:
+        print(f"Exported {store.export_csv(args.csv)} bets to {args.csv}")
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DIR = os.path.join("data", "cache")
+
+# Team lists barely change during a season, match lists change every matchday
+TEAMS_TTL = 7 * 24 * 3600
+MATCHES_TTL = 30 * 60
+
+# ---------------- RESPONSE CACHE ----------------
+
+class ResponseCache:
+    # Two levels: an in-memory LRU in front of one JSON file per key on disk.
+    # Entries carry their own timestamp so each caller picks its own TTL.
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=256):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".json")
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key, ttl):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry["stored_at"] <= ttl:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry["value"]
+
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+
+        with self._lock:
+            if entry and entry.get("key") == key and now - entry["stored_at"] <= ttl:
+                self._remember(key, entry)
+                self.stats["disk_hits"] += 1
+                return entry["value"]
+            self.stats["misses"] += 1
+        return None
+
+    def set(self, key, value, validators=None, size=None):
+        # validators: ETag / Last-Modified of the response, for revalidation;
+        # size: bytes a full download of it takes
+        entry = {"key": key, "stored_at": time.time(), "value": value}
+        if validators:
+            entry["validators"] = validators
+        if size is not None:
+            entry["size"] = size
+        self._store(entry)
+
+    def touch(self, key):
+        # The server confirmed the stored copy (304): restart its TTL
+        entry = self.peek(key)
+        if entry is not None:
+            self._store(dict(entry, stored_at=time.time()))
+
+    def _store(self, entry):
+        key = entry["key"]
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)  # readers never see a half-written file
+        with self._lock:
+            self._remember(key, entry)
+            self.stats["writes"] += 1
+
+    def peek(self, key):
+        # The whole entry whatever its age, or None; not counted in stats
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is None:
+            try:
+                with open(self._path(key), encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+        return entry if entry.get("key") == key else None
+
+    def age(self, key):
+        # Seconds since the entry was stored, or None if it is not cached
+        entry = self.peek(key)
+        return None if entry is None else time.time() - entry["stored_at"]
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def hit_ratio(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return round(hits / total, 3) if total else 0.0
+
+
+response_cache = ResponseCache()
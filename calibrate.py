@@ -0,0 +1,219 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from handicap import price_lines, settlement_returns
+from historical import HISTORY_FILE, load_history, prematch_stats
+from locking import atomic_write
+from logic import (
+    DATA_DIR,
+    DEFAULT_PARAMS,
+    EV_THRESHOLD,
+    PARAMS_FILE,
+    calibrated_strength_diff,
+    expected_goals,
+    model_params,
+    suggest_handicap_line
+)
+from score_matrix import outcome_probabilities, price_fixtures, score_matrix
+
+CACHE_FILE = os.path.join(DATA_DIR, "calibration_cache.json")
+
+WEIGHT_KEYS = ["base_goals", "w_form", "w_goal_diff", "w_home", "w_defense"]
+MIN_BETS = 50
+
+# ---------------- OBJECTIVES ----------------
+
+# Filled once per worker process by the pool initializer
+_data = {}
+
+
+def _init_worker(data):
+    _data.update(data)
+
+
+def _params_from(values):
+    params = dict(DEFAULT_PARAMS)
+    params.update(zip(WEIGHT_KEYS, values))
+    return params
+
+
+def _expected_goals(params, data):
+    ega = expected_goals(data["a_form"], data["a_goal_diff"], data["a_home_adv"], data["a_defense"], params)
+    egb = expected_goals(data["b_form"], data["b_goal_diff"], data["b_home_adv"], data["b_defense"], params)
+    return ega, egb
+
+
+def weights_loss(values):
+    # Mean log loss of the actual W/D/L result under the Poisson model
+    ega, egb = _expected_goals(_params_from(values), _data)
+    probs = np.stack(outcome_probabilities(score_matrix(ega, egb)), axis=1)
+    picked = probs[np.arange(len(probs)), _data["outcome"]]
+    return float(-np.mean(np.log(np.clip(picked, 1e-12, 1))))
+
+
+def cutoffs_loss(values):
+    # Negative flat-stake ROI of the bets the cutoffs would have led to:
+    # market line equal to the suggested line and EV over the threshold
+    cutoffs = sorted(values, reverse=True)
+    suggested = suggest_handicap_line(_data["sd"], cutoffs)
+    bets = np.isclose(_data["line"], suggested) & (_data["ev"] >= EV_THRESHOLD)
+    if bets.sum() < MIN_BETS:
+        return float("inf")
+    return float(-_data["returns"][bets].mean())
+
+# ---------------- SEARCH ----------------
+
+def _key(values):
+    return ",".join(f"{v:.3f}" for v in values)
+
+
+def search(objective, x0, step, data, cache, workers=None, rounds=40, batch=None, patience=4, seed=42):
+    # Parallel local random search. Each round scores a batch of
+    # perturbations of the incumbent on a process pool; the step halves
+    # after a round without improvement and the search stops after
+    # `patience` such rounds. Scores already in the cache are not re-run.
+    rng = np.random.default_rng(seed)
+    workers = workers or os.cpu_count()
+    batch = batch or max(8, 2 * workers)
+
+    _init_worker(data)
+    best = np.round(np.asarray(x0, dtype=float), 3)
+    best_loss = cache.get(_key(best))
+    if best_loss is None:
+        best_loss = cache[_key(best)] = objective(best)
+    stall = 0
+    evaluated = 0
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(data,)) as pool:
+        for _ in range(rounds):
+            candidates = {}
+            for _ in range(batch):
+                x = np.round(best + rng.normal(0, step, len(best)), 3)
+                candidates.setdefault(_key(x), x)
+            todo = [k for k in candidates if k not in cache]
+            for k, loss in zip(todo, pool.map(objective, [candidates[k] for k in todo])):
+                cache[k] = loss
+            evaluated += len(todo)
+
+            round_best = min(candidates, key=lambda k: cache[k])
+            if cache[round_best] < best_loss - 1e-6:
+                best, best_loss = candidates[round_best], cache[round_best]
+                stall = 0
+            else:
+                stall += 1
+                step = step / 2
+                if stall >= patience:
+                    break
+    return best, best_loss, evaluated
+
+# ---------------- DATA / CACHE ----------------
+
+def load_data(path):
+    df = load_history(path)
+    stats = prematch_stats(df)
+    usable = stats["usable"].to_numpy()
+    data = {c: stats[c].to_numpy()[usable] for c in stats.columns if c != "usable"}
+    hg = df["home_goals"].to_numpy()[usable]
+    ag = df["away_goals"].to_numpy()[usable]
+    data["outcome"] = np.select([hg > ag, hg == ag], [0, 1], 2)  # win / draw / loss columns
+    data["goal_diff"] = hg - ag
+    if "ah_line" in df.columns and "ah_odds" in df.columns:
+        data["line"] = df["ah_line"].to_numpy(dtype=float)[usable]
+        data["odds"] = df["ah_odds"].to_numpy(dtype=float)[usable]
+    return data
+
+
+def market_data(data, params):
+    # EV and realised return of the market line under the fitted weights;
+    # these do not depend on the cutoffs, so they are computed once
+    ok = ~np.isnan(data["line"]) & ~np.isnan(data["odds"])
+    ega, egb = _expected_goals(params, data)
+    priced = price_fixtures(ega[ok], egb[ok])
+    lines = price_lines(data["line"][ok], priced["goal_diff_values"], priced["goal_diff"], data["odds"][ok])
+    return {
+        "sd": calibrated_strength_diff(ega, egb)[ok],
+        "line": data["line"][ok],
+        "ev": lines["ev"],
+        "returns": settlement_returns(data["line"][ok], data["goal_diff"][ok], data["odds"][ok])
+    }
+
+
+def data_fingerprint(path):
+    st = os.stat(path)
+    return hashlib.sha1(f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime}:{EV_THRESHOLD}".encode()).hexdigest()
+
+
+def load_cache(fingerprint):
+    try:
+        with open(CACHE_FILE) as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return {"weights": {}, "cutoffs": {}}
+    if stored.get("fingerprint") != fingerprint:
+        return {"weights": {}, "cutoffs": {}}
+    # Cutoff losses are kept per set of fitted weights (older flat caches are dropped)
+    cutoffs = {k: v for k, v in stored.get("cutoffs", {}).items() if isinstance(v, dict)}
+    return {"weights": stored.get("weights", {}), "cutoffs": cutoffs}
+
+
+def save_cache(fingerprint, cache):
+    payload = {"fingerprint": fingerprint, **cache}
+    atomic_write(CACHE_FILE, lambda f: json.dump(payload, f))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit expected_goals weights and handicap cutoffs to historical results")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--rounds", type=int, default=40)
+    parser.add_argument("--patience", type=int, default=4, help="rounds without improvement before stopping")
+    parser.add_argument("--dry-run", action="store_true", help="print the result without writing model_params.json")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data = load_data(args.history)
+    fingerprint = data_fingerprint(args.history)
+    cache = load_cache(fingerprint)
+    current = model_params()
+    print(f"{len(data['outcome'])} fixtures with pre-match stats")
+
+    x0 = [current[k] for k in WEIGHT_KEYS]
+    weights, log_loss, n = search(weights_loss, x0, 0.1, data, cache["weights"], args.workers, args.rounds, patience=args.patience)
+    start_loss = cache["weights"][_key(np.round(x0, 3))]
+    print(f"weights: {n} evaluations, log loss {start_loss:.4f} -> {log_loss:.4f}")
+
+    result = dict(current)
+    result.update(zip(WEIGHT_KEYS, [float(v) for v in weights]))
+    result.update({"fitted_at": datetime.now().isoformat(), "history": args.history, "log_loss": round(log_loss, 5)})
+
+    if "line" in data:
+        market = market_data(data, result)
+        # market_data depends on the weights just fitted, so their losses
+        # are only reusable under the same weights
+        cutoff_cache = cache["cutoffs"].setdefault(_key(weights), {})
+        cutoffs, loss, n = search(cutoffs_loss, current["handicap_cutoffs"], 0.05, market, cutoff_cache,
+                                  args.workers, args.rounds, patience=args.patience)
+        if np.isfinite(loss):
+            result["handicap_cutoffs"] = sorted((float(c) for c in cutoffs), reverse=True)
+            result["roi"] = round(-loss, 4)
+            print(f"cutoffs: {n} evaluations, flat-stake ROI {-loss:.2%} -> {result['handicap_cutoffs']}")
+        else:
+            print(f"cutoffs: fewer than {MIN_BETS} bets at any setting, kept current cutoffs")
+    else:
+        print("no Asian Handicap odds in history, handicap cutoffs left unchanged")
+
+    save_cache(fingerprint, cache)
+    print(f"done in {time.perf_counter() - start:.1f}s")
+    for k in WEIGHT_KEYS:
+        print(f"  {k}: {current[k]} -> {result[k]:.3f}")
+
+    if not args.dry_run:
+        atomic_write(PARAMS_FILE, lambda f: json.dump(result, f, indent=2))
+        print(f"wrote {PARAMS_FILE} (rebuild the probability table: python prob_table.py build)")
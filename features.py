@@ -0,0 +1,100 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+# Column layout the Random Forest was trained on. goal_diff appears twice
+# because that is what the model has always been fed; changing it means
+# retraining.
+FEATURE_COLUMNS = [
+    "a_form",
+    "b_form",
+    "a_goal_diff",
+    "b_goal_diff",
+    "a_goal",
+    "b_goal",
+    "home"
+]
+
+# Model classes -> output columns
+OUTCOME_COLUMNS = {1: "home_win", 0: "draw", -1: "away_win"}
+OUTCOME_LABELS = {1: "Team A Win", 0: "Draw", -1: "Team B Win"}
+
+DEFAULT_STATS = {"form": 0.5, "goal_diff": 0.5, "home_adv": 0.5, "defense": 0.5}
+
+# ---------------- FEATURE MATRIX ----------------
+
+def feature_row(stats_a, stats_b, home=1.0):
+    a = stats_a or DEFAULT_STATS
+    b = stats_b or DEFAULT_STATS
+    return [a["form"], b["form"], a["goal_diff"], b["goal_diff"], a["goal_diff"], b["goal_diff"], home]
+
+
+def build_feature_matrix(fixtures, stats_for):
+    # fixtures: (home_name, away_name) pairs; stats_for(name, is_home) returns
+    # a stats dict from local data or None. Rows without stats for both
+    # sides are flagged in the mask and left at zero.
+    X = np.zeros((len(fixtures), len(FEATURE_COLUMNS)))
+    found = np.zeros(len(fixtures), dtype=bool)
+    for i, (home, away) in enumerate(fixtures):
+        stats_a = stats_for(home, True)
+        stats_b = stats_for(away, False)
+        if stats_a and stats_b:
+            X[i] = feature_row(stats_a, stats_b)
+            found[i] = True
+    return X, found
+
+# ---------------- BATCH INFERENCE ----------------
+
+# Below this many rows a thread pool costs more than it saves
+PARALLEL_MIN_ROWS = 200
+
+
+def predict_matrix(model, X, n_jobs=None):
+    # One predict_proba call for every row; large batches evaluate trees
+    # in parallel. n_jobs is set on a shallow copy (the fitted trees are
+    # shared), so the cached model other sessions use is never touched.
+    X = np.asarray(X, dtype=float).reshape(-1, len(FEATURE_COLUMNS))
+    if n_jobs is None:
+        n_jobs = -1 if len(X) >= PARALLEL_MIN_ROWS else 1
+    if getattr(model, "n_jobs", n_jobs) != n_jobs:
+        model = copy.copy(model)
+        model.n_jobs = n_jobs
+    proba = model.predict_proba(X)
+    classes = list(model.classes_)
+
+    frame = pd.DataFrame({OUTCOME_COLUMNS.get(c, str(c)): proba[:, i] for i, c in enumerate(classes)})
+    frame["prediction"] = [OUTCOME_LABELS.get(classes[i], "Unknown") for i in proba.argmax(axis=1)]
+    return frame
+
+
+def predict_fixtures(model, fixtures, stats_for, n_jobs=None):
+    X, found = build_feature_matrix(fixtures, stats_for)
+    frame = pd.DataFrame(fixtures, columns=["home", "away"])
+    if found.any():
+        scored = predict_matrix(model, X[found], n_jobs)
+        scored.index = frame.index[found]
+        frame = frame.join(scored)
+    frame["has_stats"] = found
+    return frame
+
+
+def engine_feature_matrix(fixtures, window=5):
+    # Whole slate in one gather from the rolling feature engine over the
+    # local match store; rows with an unknown team are masked out
+    from match_store import match_store
+    from team_features import feature_engine
+    engine = feature_engine()
+    ids = [(match_store.team_id(home), match_store.team_id(away)) for home, away in fixtures]
+    found = np.array([h is not None and a is not None and max(h, a) < engine.n_teams for h, a in ids], dtype=bool)
+    X = np.zeros((len(fixtures), len(FEATURE_COLUMNS)))
+    if found.any():
+        home, away = np.array([ids[i] for i in np.flatnonzero(found)]).T
+        X[found] = engine.feature_matrix(home, away, window)
+    return X, found
+
+
+def league_stats_lookup(league):
+    # stats_for backed by the prefetched league snapshot, no network
+    from async_fetch import local_team_stats
+    return lambda name, is_home: local_team_stats(name, league, is_home)
@@ -0,0 +1,175 @@
+import numpy as np
+
+# Every line from -3.0 to +3.0 in quarter steps
+LADDER = np.arange(-12, 13) / 4.0
+
+# Settlement states per unit stake
+STATES = ['win', 'half_win', 'push', 'half_loss', 'loss']
+
+# ---------------- LINE LABELS ----------------
+
+def parse_handicap(handicap):
+    # "AH -0.75" / "AH 0" / "+1.25" / -0.75  ->  -0.75 / 0.0 / 1.25 / -0.75
+    if isinstance(handicap, (int, float, np.floating)):
+        line = float(handicap)
+    else:
+        text = str(handicap).strip().upper().replace("AH", "").strip()
+        try:
+            line = float(text)
+        except ValueError:
+            return None
+    if abs(line * 4 - round(line * 4)) > 1e-9:
+        return None  # only whole, half and quarter lines exist
+    return line
+
+
+def format_handicap(line):
+    if line == 0:
+        return "AH 0"
+    text = "%+g" % line
+    if "." not in text:
+        text += ".0"
+    return "AH " + text
+
+
+LADDER_LABELS = [format_handicap(line) for line in LADDER]
+
+# ---------------- PRICING ----------------
+
+def _gd_arrays(goal_diff):
+    # Accepts {gd: p} or (gd_values, dist)
+    if isinstance(goal_diff, dict):
+        values = np.array(sorted(goal_diff), dtype=float)
+        dist = np.array([goal_diff[v] for v in sorted(goal_diff)], dtype=float)
+        return values, dist
+    values, dist = goal_diff
+    return np.asarray(values, dtype=float), np.asarray(dist, dtype=float)
+
+
+def _split_lines(lines):
+    # Quarter lines split the stake over the two neighbouring lines
+    quarter = np.abs(lines * 2 - np.round(lines * 2)) > 1e-9
+    return np.where(quarter, lines - 0.25, lines), np.where(quarter, lines + 0.25, lines)
+
+
+def settlement_states(lines, gd_values):
+    # (m, k) grid of summed half-stake outcomes for line i at goal diff k:
+    # 2 win, 1 half win, 0 push, -1 half loss, -2 loss.
+    low, high = _split_lines(np.asarray(lines, dtype=float).reshape(-1, 1))
+    return np.sign(gd_values + low) + np.sign(gd_values + high)
+
+
+def settlement_returns(lines, goal_diff, odds):
+    # Realised profit per unit stake, one line / final goal diff / odds per bet
+    low, high = _split_lines(np.asarray(lines, dtype=float))
+    score = np.sign(goal_diff + low) + np.sign(goal_diff + high)
+    return np.where(score > 0, (np.asarray(odds) - 1) * score / 2, score / 2)
+
+
+def price_ladder(lines, goal_diff, odds=None):
+    # Prices every line in one pass. goal_diff may hold one distribution
+    # (k,) or a batch of fixtures (n, k); odds broadcast against the lines.
+    values, dist = _gd_arrays(goal_diff)
+    states = settlement_states(lines, values)
+
+    result = {'lines': np.asarray(lines, dtype=float).reshape(-1)}
+    for name, score in zip(STATES, (2, 1, 0, -1, -2)):
+        result[name] = dist @ (states == score).T.astype(float)
+
+    back = result['win'] + 0.5 * result['half_win']
+    lay = result['loss'] + 0.5 * result['half_loss']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['fair_odds'] = np.where(back > 0, 1 + lay / back, np.inf)
+
+    if odds is not None:
+        odds = np.asarray(odds, dtype=float)
+        result['odds'] = np.broadcast_to(odds, back.shape)
+        result['ev'] = back * (odds - 1) - lay
+    return result
+
+
+def price_lines(lines, goal_diff_values, goal_diff, odds=None):
+    # One line per fixture: lines (n,), goal_diff (n, k) rows of a batch
+    states = settlement_states(lines, np.asarray(goal_diff_values, dtype=float))
+    result = {'lines': np.asarray(lines, dtype=float)}
+    for name, score in zip(STATES, (2, 1, 0, -1, -2)):
+        result[name] = (goal_diff * (states == score)).sum(axis=1)
+
+    back = result['win'] + 0.5 * result['half_win']
+    lay = result['loss'] + 0.5 * result['half_loss']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['fair_odds'] = np.where(back > 0, 1 + lay / back, np.inf)
+    if odds is not None:
+        result['odds'] = np.asarray(odds, dtype=float)
+        result['ev'] = back * (result['odds'] - 1) - lay
+    return result
+
+
+def price_handicap(handicap, goal_diff, odds=None):
+    line = parse_handicap(handicap)
+    if line is None:
+        return None
+    priced = price_ladder([line], goal_diff, odds)
+    result = {'line': line}
+    for key in STATES + ['fair_odds', 'ev']:
+        if key in priced:
+            result[key] = float(np.ravel(priced[key])[0])
+    return result
+
+
+# ---------------- BEST LINE FINDER ----------------
+
+def kelly_growth(priced, iterations=30):
+    # Growth-optimal stake fraction per line over the five settlement states,
+    # solved with a few vectorised Newton steps
+    odds = priced['odds']
+    returns = [odds - 1, (odds - 1) / 2, np.zeros_like(odds), np.full_like(odds, -0.5), np.full_like(odds, -1.0)]
+    probs = [priced[name] for name in STATES]
+
+    fraction = np.clip(priced['ev'] / np.maximum(odds - 1, 1e-9), 0, 0.99)
+    for _ in range(iterations):
+        grad = sum(p * r / (1 + fraction * r) for p, r in zip(probs, returns))
+        hess = -sum(p * r * r / (1 + fraction * r) ** 2 for p, r in zip(probs, returns))
+        step = np.where(hess < 0, grad / np.where(hess < 0, hess, -1), 0)
+        fraction = np.clip(fraction - step, 0, 0.99)
+    fraction = np.where(priced['ev'] > 0, fraction, 0.0)
+
+    growth = sum(p * np.log1p(fraction * r) for p, r in zip(probs, returns))
+    return fraction, growth
+
+
+def find_best_lines(goal_diff, home_ladder=(), away_ladder=()):
+    # Ladders are (line, odds) pairs as quoted for each side. Team B's line
+    # is settled on the goal difference seen from the away side.
+    values, dist = _gd_arrays(goal_diff)
+    rows = []
+    for side, ladder, sign in (('Team A', home_ladder, 1), ('Team B', away_ladder, -1)):
+        ladder = [(parse_handicap(line), odds) for line, odds in ladder if odds and odds > 1]
+        ladder = [(line, odds) for line, odds in ladder if line is not None]
+        if not ladder:
+            continue
+        lines = np.array([line for line, _ in ladder])
+        odds = np.array([o for _, o in ladder], dtype=float)
+        priced = price_ladder(lines, (sign * values, dist), odds)
+        fraction, growth = kelly_growth(priced)
+        for i, line in enumerate(lines):
+            rows.append({
+                'side': side,
+                'handicap': format_handicap(line),
+                'odds': float(odds[i]),
+                'ev': round(float(priced['ev'][i]), 3),
+                'fair_odds': round(float(priced['fair_odds'][i]), 2) if np.isfinite(priced['fair_odds'][i]) else None,
+                'win': round(float(priced['win'][i] + priced['half_win'][i]), 3),
+                'push': round(float(priced['push'][i]), 3),
+                'loss': round(float(priced['loss'][i] + priced['half_loss'][i]), 3),
+                'kelly': round(float(fraction[i]), 4),
+                'growth': float(growth[i])
+            })
+    by_ev = sorted(rows, key=lambda r: r['ev'], reverse=True)
+    by_growth = sorted(rows, key=lambda r: r['growth'], reverse=True)
+    return by_ev, by_growth
+
+
+def win_draw_loss_distribution(win_p, draw_p, loss_p):
+    # Coarse goal-difference distribution, exact for lines between -0.5 and +0.5
+    return {-1: loss_p, 0: draw_p, 1: win_p}
@@ -0,0 +1,100 @@
+import os
+import numpy as np
+import pandas as pd
+
+from logic import DATA_DIR
+
+HISTORY_FILE = os.path.join(DATA_DIR, "historical_results.csv")
+
+# Same window fetch_team_stats uses live
+FORM_WINDOW = 5
+MIN_MATCHES = 3
+
+STAT_KEYS = ["form", "goal_diff", "home_adv", "defense"]
+
+# football-data.co.uk style headers are accepted too
+COLUMN_ALIASES = {
+    "Date": "date",
+    "HomeTeam": "home_team",
+    "AwayTeam": "away_team",
+    "FTHG": "home_goals",
+    "FTAG": "away_goals",
+    "AHh": "ah_line"
+}
+# First column found wins: Pinnacle, then Bet365, then market average
+AH_ODDS_COLUMNS = ["PAHH", "B365AHH", "AvgAHH"]
+AH_CLOSING_COLUMNS = ["PCAHH", "B365CAHH", "AvgCAHH"]
+
+# ---------------- LOADING ----------------
+
+def load_history(path=HISTORY_FILE):
+    if os.path.isdir(path):
+        # The local match store (data/matches): results only, no odds
+        from match_store import MatchStore
+        return MatchStore(path).frame()
+
+    df = pd.read_csv(path).rename(columns=COLUMN_ALIASES)
+    raw = df["date"].astype(str)
+    # ISO dates first, then dd/mm/yy(yy) as used by football-data.co.uk
+    dates = pd.to_datetime(raw, format="ISO8601", errors="coerce")
+    for fmt in ("%d/%m/%Y", "%d/%m/%y"):
+        dates = dates.fillna(pd.to_datetime(raw, format=fmt, errors="coerce"))
+    df["date"] = dates
+
+    for target, candidates in (("ah_odds", AH_ODDS_COLUMNS), ("ah_closing_odds", AH_CLOSING_COLUMNS)):
+        if target not in df.columns:
+            found = next((c for c in candidates if c in df.columns), None)
+            if found:
+                df[target] = df[found]
+
+    df = df.dropna(subset=["date", "home_team", "away_team", "home_goals", "away_goals"])
+    return df.sort_values("date", kind="stable").reset_index(drop=True)
+
+# ---------------- PRE-MATCH STATS ----------------
+
+def prematch_stats(df):
+    # The four slider stats each side would have shown before kickoff,
+    # scored from its previous FORM_WINDOW results with the formulas of
+    # logic.team_stats_from_matches. Columns a_* / b_* plus a "usable"
+    # flag for rows where both sides have MIN_MATCHES behind them.
+    n = len(df)
+    home_goals = df["home_goals"].to_numpy(dtype=np.int64)
+    away_goals = df["away_goals"].to_numpy(dtype=np.int64)
+
+    # One appearance per side, grouped by team in match order
+    team, _ = pd.factorize(pd.concat([df["home_team"], df["away_team"]], ignore_index=True))
+    scored = np.concatenate([home_goals, away_goals])
+    conceded = np.concatenate([away_goals, home_goals])
+    at_home = np.arange(2 * n) < n
+    won = scored > conceded
+    # games, wins, scored, conceded, home games, home wins
+    values = np.column_stack([np.ones(2 * n, dtype=np.int64), won, scored, conceded, at_home, won & at_home])
+    order = np.lexsort((np.arange(2 * n) % max(n, 1), team))
+
+    # Window sums as a difference of one running total: the rows before
+    # each appearance, back to FORM_WINDOW or the team's first match
+    pos = np.arange(2 * n)
+    first = np.r_[True, team[order][1:] != team[order][:-1]] if n else np.empty(0, dtype=bool)
+    group_start = np.maximum.accumulate(np.where(first, pos, 0))
+    window = np.minimum(pos - group_start, FORM_WINDOW)
+    total = np.vstack([np.zeros((1, values.shape[1]), dtype=np.int64), np.cumsum(values[order], axis=0)])
+    sums = np.empty_like(values)
+    sums[order] = total[pos] - total[pos - window]
+
+    out = np.full((n, 2 * len(STAT_KEYS)), np.nan)
+    usable = (sums[:n, 0] >= MIN_MATCHES) & (sums[n:, 0] >= MIN_MATCHES)
+    for side, (lo, hi) in enumerate(((0, n), (n, 2 * n))):
+        games, wins, goals_scored, goals_conceded, home_games, home_wins = sums[lo:hi][usable].T
+        if side == 0:
+            home_adv = np.where(home_games > 0, home_wins / np.maximum(home_games, 1), 0.5)
+        else:
+            home_adv = np.zeros(len(games))  # Away team
+        stats = [wins / games,
+                 np.clip(((goals_scored - goals_conceded) / games + 3) / 6, 0, 1),
+                 home_adv,
+                 np.clip(1 - goals_conceded / games / 2, 0, 1)]
+        out[usable, side * len(STAT_KEYS):(side + 1) * len(STAT_KEYS)] = np.round(np.column_stack(stats), 2)
+
+    stats = pd.DataFrame(out, columns=[f"a_{k}" for k in STAT_KEYS] + [f"b_{k}" for k in STAT_KEYS], index=df.index)
+    stats["usable"] = usable
+    return stats
@@ -0,0 +1,109 @@
+import csv
+import hashlib
+import io
+import json
+import os
+from datetime import datetime
+
+from locking import atomic_write, file_lock
+
+# Bytes just before the checkpoint offset are hashed so a rewritten or
+# truncated log is noticed without rescanning it
+GUARD_BYTES = 64
+
+# ---------------- BANKROLL LEDGER ----------------
+
+class BankrollLedger:
+    # Append-only CSV of (timestamp, amount) rows with a sidecar checkpoint
+    # holding the running balance up to a byte offset. Reads only parse the
+    # tail written after the checkpoint.
+
+    def __init__(self, path):
+        self.path = path
+        self.checkpoint_path = path + ".checkpoint.json"
+        self.repairs = 0
+
+    def _guard(self, f, offset):
+        start = max(0, offset - GUARD_BYTES)
+        f.seek(start)
+        return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_checkpoint(self, checkpoint):
+        atomic_write(self.checkpoint_path, lambda f: json.dump(checkpoint, f))
+
+    def _scan(self, f, offset, balance, rows, limit=None):
+        # Sum complete lines from offset (up to limit); a half-written last
+        # line is left for the next read
+        f.seek(offset)
+        chunk = f.read() if limit is None else f.read(max(0, limit - offset))
+        end = chunk.rfind(b"\n") + 1
+        for row in csv.reader(io.StringIO(chunk[:end].decode("utf-8"))):
+            if not row or row[0] == "timestamp":
+                continue
+            balance += float(row[1])
+            rows += 1
+        return offset + end, balance, rows
+
+    def _rebuild(self, f):
+        offset, balance, rows = self._scan(f, 0, 0.0, 0)
+        return {"offset": offset, "balance": balance, "rows": rows, "guard": self._guard(f, offset)}
+
+    def balance(self):
+        checkpoint = self._load_checkpoint()
+        size = os.path.getsize(self.path)
+        if checkpoint and checkpoint["offset"] == size:
+            return round(checkpoint["balance"], 2)  # nothing new, no file read
+
+        # Under the lock so the checkpoint only ever moves forward
+        with file_lock(self.path):
+            checkpoint = self._load_checkpoint()
+            size = os.path.getsize(self.path)
+            with open(self.path, "rb") as f:
+                if not checkpoint or checkpoint["offset"] > size or self._guard(f, checkpoint["offset"]) != checkpoint["guard"]:
+                    if checkpoint:
+                        self.repairs += 1
+                    checkpoint = self._rebuild(f)
+                elif checkpoint["offset"] < size:
+                    offset, balance, rows = self._scan(f, checkpoint["offset"], checkpoint["balance"], checkpoint["rows"])
+                    checkpoint = {"offset": offset, "balance": balance, "rows": rows, "guard": self._guard(f, offset)}
+            self._save_checkpoint(checkpoint)
+        return round(checkpoint["balance"], 2)
+
+    def append(self, amount):
+        # One locked, fsynced write per row so concurrent writers never interleave
+        with file_lock(self.path):
+            with open(self.path, "a", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow([datetime.now().isoformat(), round(amount, 2)])
+                f.flush()
+                os.fsync(f.fileno())
+
+    def verify(self):
+        # Full rescan, and the stored checkpoint compared against the log up
+        # to its own offset; nothing is rewritten, that is repair()'s job
+        checkpoint = self._load_checkpoint()
+        with open(self.path, "rb") as f:
+            scanned = self._rebuild(f)
+            if not checkpoint:
+                return False, round(scanned["balance"], 2), None
+            ok = checkpoint["offset"] <= scanned["offset"] and self._guard(f, checkpoint["offset"]) == checkpoint["guard"]
+            if ok:
+                offset, balance, rows = self._scan(f, 0, 0.0, 0, limit=checkpoint["offset"])
+                ok = (offset == checkpoint["offset"] and abs(checkpoint["balance"] - balance) < 0.005
+                      and checkpoint["rows"] == rows)
+        return ok, round(scanned["balance"], 2), round(checkpoint["balance"], 2)
+
+    def repair(self):
+        with file_lock(self.path):
+            with open(self.path, "rb") as f:
+                checkpoint = self._rebuild(f)
+            self._save_checkpoint(checkpoint)
+        self.repairs += 1
+        return round(checkpoint["balance"], 2)
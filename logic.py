@@ -1,56 +1,80 @@
 import csv
+import json
 import os
-from datetime import datetime
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode
 import math
-import requests
+import threading
+import time
+import numpy as np
+from api_client import get_client
+from cache import response_cache, TEAMS_TTL, MATCHES_TTL
+from score_matrix import price_fixtures
+from team_resolver import index_for
+from ledger import BankrollLedger
+from locking import file_lock
+from bet_store import BetStore
+from handicap import format_handicap, parse_handicap, price_handicap, win_draw_loss_distribution
 
 DATA_DIR = "data"
 BANKROLL_FILE = os.path.join(DATA_DIR, "bankroll.csv")
 BETS_FILE = os.path.join(DATA_DIR, "bets.csv")
+BETS_DB = os.path.join(DATA_DIR, "bets.db")
+PARAMS_FILE = os.path.join(DATA_DIR, "model_params.json")
 
 # ---------------- FILE SAFETY ----------------
 
-os.makedirs(DATA_DIR, exist_ok=True)
-
-if not os.path.exists(BANKROLL_FILE):
-    with open(BANKROLL_FILE, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["timestamp", "amount"])
-        writer.writerow([datetime.now().isoformat(), 5000])  # starting bankroll
-
-if not os.path.exists(BETS_FILE):
-    with open(BETS_FILE, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "timestamp",
-            "handicap",
-            "odds",
-            "stake",
-            "ev",
-            "win_p",
-            "draw_p",
-            "loss_p",
-            "fair_odds",
-            "result",
-            "profit",
-            "settled"
-        ])
+# Created on first use rather than at import, so importing logic stays cheap
+_bet_store = None
+_ledger = None
+_init_lock = threading.Lock()
+
+
+def ensure_data_files():
+    os.makedirs(DATA_DIR, exist_ok=True)
+
+    if not os.path.exists(BANKROLL_FILE):
+        # Checked again under the ledger's lock: two processes starting
+        # together must not both write the starting bankroll
+        with file_lock(BANKROLL_FILE):
+            if not os.path.exists(BANKROLL_FILE):
+                with open(BANKROLL_FILE, "w", newline="") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(["timestamp", "amount"])
+                    writer.writerow([datetime.now().isoformat(), 5000])  # starting bankroll
+
+
+def get_bet_store():
+    global _bet_store
+    with _init_lock:
+        if _bet_store is None:
+            ensure_data_files()
+            store = BetStore(BETS_DB)
+            # One-time import of the old CSV history into a fresh database
+            if store.created and os.path.exists(BETS_FILE):
+                store.import_csv(BETS_FILE)
+            _bet_store = store
+    return _bet_store
+
 
 # ---------------- BANKROLL ----------------
 
+def get_ledger():
+    global _ledger
+    with _init_lock:
+        if _ledger is None:
+            ensure_data_files()
+            _ledger = BankrollLedger(BANKROLL_FILE)
+    return _ledger
+
+
 def get_bankroll():
-    total = 0.0
-    with open(BANKROLL_FILE, newline="") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            total += float(row["amount"])
-    return round(total, 2)
+    # Checkpointed running balance, only rows appended since are parsed
+    return get_ledger().balance()
 
 
 def update_bankroll(amount):
-    with open(BANKROLL_FILE, "a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([datetime.now().isoformat(), round(amount, 2)])
+    get_ledger().append(amount)
 
 
 # ---------------- FETCH STATS FROM API ----------------
@@ -64,117 +88,301 @@ COMPETITIONS = {
     'Ligue 1': 2015,
 }
 
+def cached_api_get(path, api_key, ttl):
+    # Serve repeat lookups from the response cache, only hit the API on a
+    # miss; an expired copy is revalidated, and a 304 costs no payload
+    data = response_cache.get(path, ttl)
+    if data is not None:
+        return data
+    return _fetch(path, api_key, response_cache.peek(path))
+
+
+def _validators(entry, path):
+    # Validators only apply to the exact path they were issued for
+    validators = (entry or {}).get('validators') or {}
+    return validators if validators.get('path') == path else None
+
+
+def _fetch(path, api_key, stale):
+    status, data, validators, size = get_client().get_conditional(
+        path, api_key, _validators(stale, path), stale and stale.get('size'))
+    if status == 304 and stale:
+        response_cache.touch(path)
+        return stale['value']
+    if data is None:
+        print(f"API Error: {path} returned {status}")
+        return None
+    response_cache.set(path, data, dict(validators, path=path), size)
+    return data
+
+
+def delta_path(path, date_from, date_to):
+    # Same request restricted to a date window (and without its limit)
+    base, _, query = path.partition('?')
+    params = [(k, v) for k, v in parse_qsl(query) if k not in ('limit', 'dateFrom', 'dateTo')]
+    return f"{base}?{urlencode(params + [('dateFrom', date_from), ('dateTo', date_to)])}"
+
+
+def merge_matches(matches, new, keep=None):
+    # Union by match id (newer copies win), oldest first, newest `keep` only
+    merged = {m['id']: m for m in matches}
+    merged.update((m['id'], m) for m in new)
+    ordered = sorted(merged.values(), key=lambda m: (m.get('utcDate') or '', m['id']))
+    return ordered[-keep:] if keep else ordered
+
+
+def synced_matches(path, api_key, ttl, keep=None):
+    # cached_api_get for finished-match lists: once a copy is cached, a
+    # refresh asks only for matches from its newest match day onwards
+    # (dateFrom/dateTo) and merges them into the stored copy in place.
+    # keep trims to the newest n, like the path's own limit.
+    data = response_cache.get(path, ttl)
+    if data is not None:
+        return data
+    stale = response_cache.peek(path)
+    matches = stale['value'].get('matches') if stale else None
+    if matches:
+        newest = max(m.get('utcDate') or '' for m in matches)[:10]
+        today = datetime.now(timezone.utc).date().isoformat()
+        window = delta_path(path, newest, today)
+        status, new, validators, _ = get_client().get_conditional(
+            window, api_key, _validators(stale, window), stale.get('size'))
+        if status == 304 or new is not None:
+            value = dict(stale['value'], matches=merge_matches(matches, (new or {}).get('matches', []), keep))
+            response_cache.set(path, value, dict(validators, path=window), stale.get('size'))
+            return value
+        print(f"API Error: {window} returned {status}, fetching in full")
+    return _fetch(path, api_key, stale)
+
+
+def find_team(teams, team_name):
+    # Fuzzy match on names, short names, TLAs and aliases; None when the
+    # name is unknown or ambiguous ("Manchester") rather than a guess
+    return index_for(teams).resolve(team_name)
+
+
+def _team_lists():
+    # Unexpired cached team lists by league; peek so that reruns of the
+    # app do not count as cache hits
+    now = time.time()
+    lists = {}
+    for league, comp_id in COMPETITIONS.items():
+        entry = response_cache.peek(f'/competitions/{comp_id}/teams')
+        if entry and now - entry['stored_at'] <= TEAMS_TTL:
+            lists[league] = entry
+    return lists
+
+
+def known_teams(extra_names=(), lists=None):
+    # Every team in the cached competition lists (no network), tagged with
+    # its league, plus any extra names such as data/teams.csv
+    teams = []
+    for league, entry in (_team_lists() if lists is None else lists).items():
+        for t in (entry['value'] or {}).get('teams', []):
+            teams.append({'id': t.get('id'), 'name': t.get('name'), 'shortName': t.get('shortName'),
+                          'tla': t.get('tla'), 'league': league})
+    names = {t['name'] for t in teams}
+    teams.extend({'id': None, 'name': name} for name in extra_names if name and name not in names)
+    return teams
+
+
+_team_indexes = {}
+
+
+def team_index(extra_names=()):
+    # One index per cache generation: rebuilt only when a team list is
+    # stored, revalidated or expires, or the extra names change
+    lists = _team_lists()
+    generation = (tuple((league, entry['stored_at']) for league, entry in lists.items()), tuple(extra_names))
+    index = _team_indexes.get(generation)
+    if index is None:
+        if len(_team_indexes) > 32:
+            _team_indexes.clear()
+        index = _team_indexes[generation] = index_for(known_teams(extra_names, lists))
+    return index
+
+
+def fetch_league_teams(api_key, league='Premier League'):
+    comp_id = COMPETITIONS.get(league, 2021)  # Default to Premier League
+    data = cached_api_get(f'/competitions/{comp_id}/teams', api_key, TEAMS_TTL)
+    if data is None:
+        return None
+    return data.get('teams', [])
+
+
+def team_stats_from_matches(team_id, matches, is_home=True):
+    # Calculate form (win percentage)
+    wins = 0
+    goals_scored = 0
+    goals_conceded = 0
+    home_games = 0
+    home_wins = 0
+    
+    for match in matches:
+        is_home_team = match['homeTeam']['id'] == team_id
+        home_score = match['score']['fullTime']['home']
+        away_score = match['score']['fullTime']['away']
+        
+        if is_home_team:
+            team_score = home_score
+            opp_score = away_score
+            home_games += 1
+            if home_score > away_score:
+                home_wins += 1
+                wins += 1
+        else:
+            team_score = away_score
+            opp_score = home_score
+            if away_score > home_score:
+                wins += 1
+        
+        goals_scored += team_score
+        goals_conceded += opp_score
+    
+    form = wins / len(matches)
+    avg_goal_diff = (goals_scored - goals_conceded) / len(matches)
+    goal_diff = max(0, min(1, (avg_goal_diff + 3) / 6))  # Normalize -3 to +3 diff to 0-1
+    
+    home_adv = home_wins / home_games if home_games > 0 else 0.5
+    
+    # Defense: lower conceded goals = better defense
+    avg_conceded = goals_conceded / len(matches)
+    defense = max(0, min(1, 1 - avg_conceded / 2))  # 0 conceded = 1, 2+ = 0
+    
+    if not is_home:
+        home_adv = 0.0  # Away team
+    
+    return {
+        'form': round(form, 2),
+        'goal_diff': round(goal_diff, 2),
+        'home_adv': round(home_adv, 2),
+        'defense': round(defense, 2)
+    }
+
+
+def team_matches_path(team_id):
+    # Last 5 finished matches; also the cache key the stats warmer refreshes
+    return f'/teams/{team_id}/matches?status=FINISHED&limit=5'
+
+
+def stats_age(team):
+    # Seconds since a team's match data was cached, None if never (no network)
+    if not team or team.get('id') is None:
+        return None
+    return response_cache.age(team_matches_path(team['id']))
+
+
+def fetch_team_stats_by_id(team_id, api_key, is_home=True):
+    # Get last 5 finished matches
+    data = synced_matches(team_matches_path(team_id), api_key, MATCHES_TTL, keep=5)
+    if data is None:
+        return None
+    
+    matches = data.get('matches', [])
+    if len(matches) < 3:  # Need at least some matches
+        return None
+    
+    return team_stats_from_matches(team_id, matches, is_home)
+
+
+def cached_team_stats(team_name, league='Premier League', is_home=True):
+    # fetch_team_stats from responses already cached (e.g. kept warm by
+    # warmer.py), never the network; None when they are missing or expired
+    comp_id = COMPETITIONS.get(league, 2021)
+    data = response_cache.get(f'/competitions/{comp_id}/teams', TEAMS_TTL)
+    team = find_team(data.get('teams', []), team_name) if data else None
+    if not team:
+        return None
+    data = response_cache.get(team_matches_path(team['id']), MATCHES_TTL)
+    matches = data.get('matches', []) if data else []
+    if len(matches) < 3:
+        return None
+    return team_stats_from_matches(team['id'], matches, is_home)
+
+
 def fetch_team_stats(team_name, api_key, is_home=True, league='Premier League'):
     if not api_key:
         return None
     
-    headers = {'X-Auth-Token': api_key}
-    comp_id = COMPETITIONS.get(league, 2021)  # Default to Premier League
-    
     try:
         # Get teams in competition
-        response = requests.get(f'https://api.football-data.org/v4/competitions/{comp_id}/teams', headers=headers, timeout=10)
-        if response.status_code != 200:
+        teams = fetch_league_teams(api_key, league)
+        if teams is None:
             return None
         
-        teams = response.json().get('teams', [])
-        team = next((t for t in teams if team_name.lower() in t['name'].lower() or t['name'].lower() in team_name.lower()), None)
+        team = find_team(teams, team_name)
         if not team:
             return None
         
-        team_id = team['id']
-        
-        # Get last 5 finished matches
-        response = requests.get(f'https://api.football-data.org/v4/teams/{team_id}/matches?status=FINISHED&limit=5', headers=headers, timeout=10)
-        if response.status_code != 200:
-            return None
-        
-        matches = response.json().get('matches', [])
-        if len(matches) < 3:  # Need at least some matches
-            return None
-        
-        # Calculate form (win percentage)
-        wins = 0
-        goals_scored = 0
-        goals_conceded = 0
-        home_games = 0
-        home_wins = 0
-        
-        for match in matches:
-            is_home_team = match['homeTeam']['id'] == team_id
-            home_score = match['score']['fullTime']['home']
-            away_score = match['score']['fullTime']['away']
-            
-            if is_home_team:
-                team_score = home_score
-                opp_score = away_score
-                home_games += 1
-                if home_score > away_score:
-                    home_wins += 1
-                    wins += 1
-            else:
-                team_score = away_score
-                opp_score = home_score
-                if away_score > home_score:
-                    wins += 1
-            
-            goals_scored += team_score
-            goals_conceded += opp_score
-        
-        form = wins / len(matches)
-        avg_goal_diff = (goals_scored - goals_conceded) / len(matches)
-        goal_diff = max(0, min(1, (avg_goal_diff + 3) / 6))  # Normalize -3 to +3 diff to 0-1
-        
-        home_adv = home_wins / home_games if home_games > 0 else 0.5
-        
-        # Defense: lower conceded goals = better defense
-        avg_conceded = goals_conceded / len(matches)
-        defense = max(0, min(1, 1 - avg_conceded / 2))  # 0 conceded = 1, 2+ = 0
-        
-        if not is_home:
-            home_adv = 0.0  # Away team
-        
-        return {
-            'form': round(form, 2),
-            'goal_diff': round(goal_diff, 2),
-            'home_adv': round(home_adv, 2),
-            'defense': round(defense, 2)
-        }
+        return fetch_team_stats_by_id(team['id'], api_key, is_home)
     except Exception as e:
         print(f"API Error: {e}")
         return None
 
-def expected_goals(form, goal_diff, home_adv, defense):
-    base_goals = 1.5
+# ---------------- MODEL PARAMETERS ----------------
+
+# Overridden by data/model_params.json, written by calibrate.py
+DEFAULT_PARAMS = {
+    "base_goals": 1.5,
+    "min_goals": 0.5,
+    "w_form": 0.5,           # Form: 0-1, add up to 0.5 goals
+    "w_goal_diff": 0.3,      # Goal diff: 0-1, add up to 0.3
+    "w_home": 0.4,           # Home: 0-1, add up to 0.4
+    "w_defense": -0.3,       # Defense: 0-1, subtract up to 0.3 if bad
+    # sd cutoffs for AH -1.0 / -0.75 / -0.5 / -0.25 (sd >=) and AH 0 / +0.25 (sd >)
+    "handicap_cutoffs": [0.45, 0.30, 0.20, 0.10, -0.10, -0.20]
+}
+
+_params = {"mtime": None, "values": dict(DEFAULT_PARAMS)}
+
+
+def model_params():
+    # Re-read only when the file changes, so a new calibration is picked up
+    # without restarting the app
+    try:
+        mtime = os.path.getmtime(PARAMS_FILE)
+    except OSError:
+        mtime = None
+    if mtime != _params["mtime"]:
+        values = dict(DEFAULT_PARAMS)
+        if mtime is not None:
+            try:
+                with open(PARAMS_FILE) as f:
+                    loaded = json.load(f)
+                values.update({k: loaded[k] for k in DEFAULT_PARAMS if k in loaded})
+            except (OSError, ValueError):
+                pass
+        _params["mtime"] = mtime
+        _params["values"] = values
+    return _params["values"]
+
+
+def expected_goals(form, goal_diff, home_adv, defense, params=None):
+    p = params or model_params()
     adjustment = (
-        0.5 * form +           # Form: 0-1, add up to 0.5 goals
-        0.3 * goal_diff +      # Goal diff: 0-1, add up to 0.3
-        0.4 * home_adv +       # Home: 0-1, add up to 0.4
-        -0.3 * (1 - defense)   # Defense: 0-1, subtract up to 0.3 if bad
+        p["w_form"] * form +
+        p["w_goal_diff"] * goal_diff +
+        p["w_home"] * home_adv +
+        p["w_defense"] * (1 - defense)
     )
-    return max(0.5, base_goals + adjustment)
-
-
-def match_probabilities(ega, egb):
-    from math import exp
-    # Use Poisson approximation for goals
-    probs = {}
-    for ga in range(0, 6):  # Up to 5 goals
-        pa = exp(-ega) * (ega ** ga) / math.factorial(ga) if ega > 0 else 0
-        for gb in range(0, 6):
-            pb = exp(-egb) * (egb ** gb) / math.factorial(gb) if egb > 0 else 0
-            gd = ga - gb
-            if gd > 0:
-                probs['win'] = probs.get('win', 0) + pa * pb
-            elif gd == 0:
-                probs['draw'] = probs.get('draw', 0) + pa * pb
-            else:
-                probs['loss'] = probs.get('loss', 0) + pa * pb
-    total = sum(probs.values())
-    if total > 0:
-        for k in probs:
-            probs[k] /= total
-    return probs
+    return np.maximum(p["min_goals"], p["base_goals"] + adjustment)  # works on arrays of fixtures too
+
+
+def match_probabilities(ega, egb, max_goals=None, rho=0.0):
+    # Poisson score matrix, goals cutoff adapts to the xG unless given;
+    # rho is the Dixon-Coles low-score correction from fitted ratings
+    probs = price_fixtures(ega, egb, max_goals, rho)
+    return {
+        'win': probs['win'],
+        'draw': probs['draw'],
+        'loss': probs['loss']
+    }
+
+
+def match_distribution(ega, egb, max_goals=None, rho=0.0):
+    # Goal-difference distribution as {gd: probability}
+    probs = price_fixtures(ega, egb, max_goals, rho)
+    return {int(gd): float(p) for gd, p in zip(probs['goal_diff_values'], probs['goal_diff'])}
 
 
 def calibrated_strength_diff(sa, sb):
@@ -182,163 +390,115 @@ def calibrated_strength_diff(sa, sb):
     return sa - sb
 
 
-def suggest_handicap(sd):
-    # sd is goal diff advantage
-    if sd >= 1.0:
-        return "AH -1.0"
-    elif sd >= 0.5:
-        return "AH -0.75"
-    elif sd >= 0.25:
-        return "AH -0.5"
-    elif sd >= 0.1:
-        return "AH -0.25"
-    elif sd > -0.1:
-        return "AH 0"
-    elif sd > -0.25:
-        return "AH +0.25"
-    elif sd > -0.5:
-        return "AH +0.5"
-    else:
-        return "AH +0.75"
-
-
-def suggest_handicap(sd):
-    if sd >= 0.45:
-        return "AH -1.0"
-    elif sd >= 0.30:
-        return "AH -0.75"
-    elif sd >= 0.20:
-        return "AH -0.5"
-    elif sd >= 0.10:
-        return "AH -0.25"
-    elif sd > -0.10:
-        return "AH 0"
-    elif sd > -0.20:
-        return "AH +0.25"
-    else:
-        return "AH +0.5"
+def suggest_handicap_line(sd, cutoffs=None):
+    # Numeric line for one sd or an array of them
+    c = cutoffs or model_params()["handicap_cutoffs"]
+    sd = np.asarray(sd, dtype=float)
+    return np.select(
+        [sd >= c[0], sd >= c[1], sd >= c[2], sd >= c[3], sd > c[4], sd > c[5]],
+        [-1.0, -0.75, -0.5, -0.25, 0.0, 0.25],
+        0.5
+    )
+
+
+def suggest_handicap(sd, cutoffs=None):
+    return format_handicap(float(suggest_handicap_line(sd, cutoffs)))
 
 
 def fair_odds_from_prob(p):
     return round(1 / p, 2) if p > 0 else None
 
 
-def asian_handicap_ev(handicap, win_p, draw_p, loss_p, odds):
-    if handicap == "AH 0":
-        # Assuming AH 0 is like draw no bet: win if win, loss if loss, void if draw
-        return round(win_p * (odds - 1) - loss_p, 3)
-    if handicap == "AH -0.5":
-        # Win if gd >=1, loss if gd <= -1, draw cancels
-        return round(win_p * (odds - 1) - loss_p, 3)
-    if handicap == "AH +0.5":
-        # Win if gd >=0, loss if gd <= -1, but with half stakes
-        # Simplified: assume similar to AH 0 but adjusted
-        return round((win_p + draw_p) * (odds - 1) - loss_p, 3)
-    if handicap == "AH -0.25":
-        # Half way between AH 0 and AH -0.5
-        ev0 = win_p * (odds - 1) - loss_p
-        ev05 = win_p * (odds - 1) - loss_p
-        return round((ev0 + ev05) / 2, 3)
-    if handicap == "AH +0.25":
-        # Half way between AH 0 and AH +0.5
-        ev0 = win_p * (odds - 1) - loss_p
-        ev05 = (win_p + draw_p) * (odds - 1) - loss_p
-        return round((ev0 + ev05) / 2, 3)
-    if handicap == "AH -0.75":
-        # Similar to -0.5 but stronger
-        return round(win_p * (odds - 1) - loss_p, 3)
-    if handicap == "AH -1.0":
-        # Win if gd >=2, etc. Simplified same
-        return round(win_p * (odds - 1) - loss_p, 3)
-    return None
+def asian_handicap_ev(handicap, win_p, draw_p, loss_p, odds, goal_diff=None):
+    # Exact pricing needs the goal-difference distribution; W/D/L alone
+    # only settles lines between -0.5 and +0.5
+    line = parse_handicap(handicap)
+    if line is None:
+        return None
+    if goal_diff is None:
+        if abs(line) > 0.5:
+            return None
+        goal_diff = win_draw_loss_distribution(win_p, draw_p, loss_p)
+    priced = price_handicap(line, goal_diff, odds)
+    return round(priced['ev'], 3)
+
+
+def handicap_fair_odds(handicap, goal_diff):
+    priced = price_handicap(handicap, goal_diff)
+    if priced is None or not math.isfinite(priced['fair_odds']):
+        return None
+    return round(priced['fair_odds'], 2)
 
 
 # ---------------- STAKE SIZING ----------------
 
-def calculate_stake(bankroll, ev):
+# Minimum EV to bet, then (EV upper bound, bankroll fraction) tiers
+EV_THRESHOLD = 0.03
+STAKE_TIERS = [(0.06, 0.01), (0.10, 0.02), (math.inf, 0.03)]
+
+
+def stake_fraction(ev, threshold=EV_THRESHOLD, tiers=STAKE_TIERS):
+    # Bankroll fraction for one EV or an array of them
+    ev = np.asarray(ev, dtype=float)
+    risk = np.select([ev < upper for upper, _ in tiers], [r for _, r in tiers], 0.0)
+    return np.where(ev >= threshold, risk, 0.0)
+
+
+def calculate_stake(bankroll, ev, threshold=EV_THRESHOLD, tiers=STAKE_TIERS):
     if ev is None:
         return 0
 
-    if ev < 0.03:
+    risk = float(stake_fraction(ev, threshold, tiers))
+    if risk == 0:
         return 0
-    elif ev < 0.06:
-        risk = 0.01
-    elif ev < 0.10:
-        risk = 0.02
-    else:
-        risk = 0.03
 
     return round(bankroll * risk, 2)
 
 
-
 # ---------------- BET LOGGING ----------------
 
 def last_bet():
-    with open(BETS_FILE, newline="", encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
-        return rows[-1] if rows else None
-
-
-# 🔧 FIXED: save_bet now returns STATUS instead of silent False
-def save_bet(data):
-    lb = last_bet()
-    if lb and lb["result"] == "":
-        return "OPEN_BET_EXISTS"
-
-    with open(BETS_FILE, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            datetime.now().isoformat(),
-            data["handicap"],
-            data["odds"],
-            data["stake"],
-            data["ev"],
-            data["win_p"],
-            data["draw_p"],
-            data["loss_p"],
-            data["fair_odds"],
-            "",
-            "",
-            ""
-        ])
-    return "SAVED"
+    return get_bet_store().last_bet()
 
 
-def settle_last_bet(result):
-    with open(BETS_FILE, newline="", encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
-
-    if not rows:
-        return None, "No bets to settle"
+def open_bets():
+    return get_bet_store().open_bets()
 
-    last = rows[-1]
 
-    if last["result"]:
-        return None, "This bet has already been settled"
+def save_bet(data):
+    get_bet_store().add_bet(data, datetime.now().isoformat())
+    return "SAVED"
 
-    stake = float(last["stake"])
-    odds = float(last["odds"])
 
+def settlement_profit(stake, odds, result):
     if result == "WIN":
-        profit = stake * (odds - 1)
+        return stake * (odds - 1)
     elif result == "HALF WIN":
-        profit = 0.5 * stake * (odds - 1)
+        return 0.5 * stake * (odds - 1)
     elif result == "PUSH":
-        profit = 0
+        return 0
     elif result == "HALF LOSS":
-        profit = -0.5 * stake
+        return -0.5 * stake
     else:
-        profit = -stake
+        return -stake
 
-    last["result"] = result
-    last["profit"] = round(profit, 2)
-    last["settled"] = "YES"
 
-    with open(BETS_FILE, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=last.keys())
-        writer.writeheader()
-        writer.writerows(rows)
+def settle_bet(bet_id, result):
+    bet = get_bet_store().get_bet(bet_id)
+    if not bet:
+        return None, "Bet not found"
+    if bet["settled"]:
+        return None, "This bet has already been settled"
+
+    profit = settlement_profit(float(bet["stake"]), float(bet["odds"]), result)
+    if not get_bet_store().settle(bet_id, result, profit, on_settled=lambda: update_bankroll(profit)):
+        return None, "This bet has already been settled"
 
-    update_bankroll(profit)
     return round(get_bankroll(), 2), None
+
+
+def settle_last_bet(result):
+    lb = get_bet_store().last_bet()
+    if not lb:
+        return None, "No bets to settle"
+    return settle_bet(lb["id"], result)
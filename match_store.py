@@ -0,0 +1,307 @@
+import argparse
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+from cache import MATCHES_TTL
+from locking import atomic_write, file_lock
+from api_client import get_client
+from logic import COMPETITIONS, DATA_DIR, cached_api_get, delta_path, find_team
+
+MATCHES_DIR = os.path.join(DATA_DIR, "matches")
+
+# One raw little-endian file per column; row i of every file is one match
+COLUMNS = {
+    "match_id": "<i8",
+    "competition": "<i4",
+    "date": "<M8[D]",
+    "home": "<i4",
+    "away": "<i4",
+    "home_goals": "<i2",
+    "away_goals": "<i2"
+}
+
+# ---------------- MATCH STORE ----------------
+
+class MatchStore:
+    # Finished matches as memory-mapped columns under data/matches/.
+    # Appends add bytes to the end of each column file, rebuild the small
+    # sort indexes and then publish the new row count in meta.json, which
+    # is the commit point: readers only ever look at the first meta["rows"]
+    # rows, so a half-finished append is invisible and trimmed next time.
+
+    def __init__(self, root=MATCHES_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._view = None
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _read_meta(self):
+        try:
+            with open(self._path("meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"rows": 0, "teams": [], "competitions": {}, "index": None}
+
+    def _load(self):
+        # Memmaps are reopened only when meta.json has been replaced
+        try:
+            mtime = os.stat(self._path("meta.json")).st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            if self._view is None or mtime != self._mtime:
+                meta = self._read_meta()
+                rows = meta["rows"]
+                columns = {
+                    name: (np.memmap(self._path(f"{name}.bin"), dtype=dtype, mode="r", shape=(rows,))
+                           if rows else np.empty(0, dtype=dtype))
+                    for name, dtype in COLUMNS.items()
+                }
+                index = {}
+                if meta.get("index"):
+                    for name in ("team_rows", "team_offsets", "comp_rows", "comp_offsets"):
+                        index[name] = np.load(self._path(f"{name}.{meta['index']}.npy"), mmap_mode="r")
+                self._view = {"meta": meta, "columns": columns, "index": index}
+                self._mtime = mtime
+            return self._view
+
+    # ---------------- READS ----------------
+
+    def rows(self):
+        return self._load()["meta"]["rows"]
+
+    def columns(self):
+        # Zero-copy memmaps over every stored match
+        return self._load()["columns"]
+
+    def teams(self):
+        return self._load()["meta"]["teams"]
+
+    def competitions(self):
+        # {comp_id (as a string): {"slot", "rows", "last_date"}}
+        return self._load()["meta"]["competitions"]
+
+    def team_id(self, name):
+        # Store index of a team by (sub)string name, or None
+        team = find_team(self.teams(), name)
+        return self.teams().index(team) if team else None
+
+    def team_rows(self, team):
+        # Row numbers of a team's matches, oldest first; a slice of the
+        # memmapped index, so nothing is copied until columns are gathered
+        view = self._load()
+        if not view["index"] or team >= len(view["meta"]["teams"]):
+            return np.empty(0, dtype=np.int64)
+        offsets = view["index"]["team_offsets"]
+        return view["index"]["team_rows"][offsets[team]:offsets[team + 1]]
+
+    def competition_rows(self, comp_id):
+        view = self._load()
+        comps = view["meta"]["competitions"]
+        if str(comp_id) not in comps or not view["index"]:
+            return np.empty(0, dtype=np.int64)
+        slot = comps[str(comp_id)]["slot"]
+        offsets = view["index"]["comp_offsets"]
+        return view["index"]["comp_rows"][offsets[slot]:offsets[slot + 1]]
+
+    def gather(self, rows):
+        columns = self.columns()
+        return {name: col[rows] for name, col in columns.items()}
+
+    def team_matches(self, team, last=None):
+        # A team's matches oldest first, optionally only the last n
+        rows = self.team_rows(team)
+        return self.gather(rows if last is None else rows[-last:])
+
+    def competition_matches(self, comp_id, since=None):
+        data = self.gather(self.competition_rows(comp_id))
+        if since is not None:
+            keep = data["date"] >= np.datetime64(since, "D")
+            data = {name: col[keep] for name, col in data.items()}
+        return data
+
+    def raw_matches(self, comp_id, exclude_ids=()):
+        # Stored matches in the API's JSON shape, skipping exclude_ids, for
+        # code that consumes API responses (e.g. the ratings update)
+        data = self.competition_matches(comp_id)
+        keep = ~np.isin(data["match_id"], np.fromiter(exclude_ids, dtype=np.int64))
+        teams = self.teams()
+        return [
+            {
+                "id": int(mid),
+                "utcDate": f"{d}T00:00:00Z",
+                "homeTeam": teams[h],
+                "awayTeam": teams[a],
+                "score": {"fullTime": {"home": int(hg), "away": int(ag)}}
+            }
+            for mid, d, h, a, hg, ag in zip(data["match_id"][keep], data["date"][keep], data["home"][keep],
+                                            data["away"][keep], data["home_goals"][keep], data["away_goals"][keep])
+        ]
+
+    def frame(self, comp_ids=None):
+        # Same layout historical.load_history returns, sorted by date
+        import pandas as pd
+        if comp_ids is None:
+            rows = np.arange(self.rows())
+        else:
+            rows = np.concatenate([self.competition_rows(c) for c in comp_ids] or [np.empty(0, dtype=np.int64)])
+        data = self.gather(np.sort(rows))
+        names = np.array([t["name"] for t in self.teams()] or [""], dtype=object)
+        df = pd.DataFrame({
+            "date": pd.to_datetime(data["date"]),
+            "competition": data["competition"],
+            "home_team": names[data["home"]],
+            "away_team": names[data["away"]],
+            "home_goals": data["home_goals"].astype(int),
+            "away_goals": data["away_goals"].astype(int),
+            "match_id": data["match_id"]
+        })
+        return df.sort_values(["date", "match_id"], kind="stable").reset_index(drop=True)
+
+    # ---------------- APPEND ----------------
+
+    def append(self, raw_matches, comp_id):
+        # Adds finished API matches not already stored; returns how many
+        os.makedirs(self.root, exist_ok=True)
+        with file_lock(self._path("store")):
+            meta = self._read_meta()
+            rows = meta["rows"]
+            team_index = {t["id"]: i for i, t in enumerate(meta["teams"])}
+            known = set()
+            if rows:
+                known = set(np.memmap(self._path("match_id.bin"), dtype=COLUMNS["match_id"], mode="r", shape=(rows,)).tolist())
+
+            new = {name: [] for name in COLUMNS}
+            for match in raw_matches:
+                score = match.get("score", {}).get("fullTime", {})
+                if match.get("id") in known or score.get("home") is None:
+                    continue
+                known.add(match["id"])
+                for side in ("homeTeam", "awayTeam"):
+                    team = match[side]
+                    if team["id"] not in team_index:
+                        team_index[team["id"]] = len(meta["teams"])
+                        meta["teams"].append({"id": team["id"], "name": team.get("name") or str(team["id"]),
+                                              "shortName": team.get("shortName"), "tla": team.get("tla")})
+                new["match_id"].append(match["id"])
+                new["competition"].append(comp_id)
+                new["date"].append(match["utcDate"][:10])
+                new["home"].append(team_index[match["homeTeam"]["id"]])
+                new["away"].append(team_index[match["awayTeam"]["id"]])
+                new["home_goals"].append(score["home"])
+                new["away_goals"].append(score["away"])
+
+            added = len(new["match_id"])
+            if not added:
+                return 0
+
+            for name, dtype in COLUMNS.items():
+                values = np.asarray(new[name], dtype=dtype)
+                with open(self._path(f"{name}.bin"), "ab") as f:
+                    f.truncate(rows * values.itemsize)  # drop any torn tail first
+                    f.write(values.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            comps = meta["competitions"]
+            entry = comps.setdefault(str(comp_id), {"slot": len(comps), "rows": 0, "last_date": None})
+            entry["rows"] += added
+            entry["last_date"] = max(filter(None, [entry["last_date"], *new["date"]]))
+            meta["rows"] = rows + added
+            old_index = meta.get("index")
+            meta["index"] = self._write_index(meta)
+            meta["updated_at"] = datetime.now().isoformat()
+            atomic_write(self._path("meta.json"), lambda f: json.dump(meta, f))
+
+            if old_index:
+                for name in ("team_rows", "team_offsets", "comp_rows", "comp_offsets"):
+                    try:
+                        os.remove(self._path(f"{name}.{old_index}.npy"))
+                    except OSError:
+                        pass
+            return added
+
+    def _write_index(self, meta):
+        # Rows grouped by team (each match twice) and by competition, both
+        # in (date, match id) order, plus offsets so one group is a
+        # contiguous slice
+        rows = meta["rows"]
+        cols = {name: np.memmap(self._path(f"{name}.bin"), dtype=dtype, mode="r", shape=(rows,))
+                for name, dtype in COLUMNS.items()}
+        date = cols["date"].astype(np.int64)
+        match_id = np.asarray(cols["match_id"])
+        row_ids = np.arange(rows)
+
+        team = np.concatenate([cols["home"], cols["away"]])
+        both = np.concatenate([row_ids, row_ids])
+        order = np.lexsort((np.concatenate([match_id, match_id]), np.concatenate([date, date]), team))
+        team_offsets = np.searchsorted(team[order], np.arange(len(meta["teams"]) + 1))
+
+        slots = {int(c): e["slot"] for c, e in meta["competitions"].items()}
+        slot = np.vectorize(slots.get, otypes=[np.int64])(cols["competition"]) if rows else np.empty(0, dtype=np.int64)
+        comp_order = np.lexsort((match_id, date, slot))
+        comp_offsets = np.searchsorted(slot[comp_order], np.arange(len(slots) + 1))
+
+        version = str(rows)
+        for name, values in (("team_rows", both[order]), ("team_offsets", team_offsets),
+                             ("comp_rows", row_ids[comp_order]), ("comp_offsets", comp_offsets)):
+            tmp = self._path(f"{name}.{version}.tmp.npy")
+            np.save(tmp, values.astype(np.int64))
+            os.replace(tmp, self._path(f"{name}.{version}.npy"))
+        return version
+
+
+match_store = MatchStore()
+
+# ---------------- INGESTION ----------------
+
+def ingest_league(league, api_key, season=None, store=match_store):
+    comp_id = COMPETITIONS.get(league, 2021)
+    path = f"/competitions/{comp_id}/matches?status=FINISHED"
+    if season:
+        path += f"&season={season}"
+    entry = store.competitions().get(str(comp_id))
+    if not season and entry and entry["last_date"]:
+        # Only matches from the newest stored match day on; the store
+        # itself drops the ones it already has
+        today = datetime.now(timezone.utc).date().isoformat()
+        data = get_client().get_json(delta_path(path, entry["last_date"], today), api_key)
+        if data is not None:
+            return store.append(data.get("matches", []), comp_id)
+    data = cached_api_get(path, api_key, MATCHES_TTL)
+    if data is None:
+        return None
+    return store.append(data.get("matches", []), comp_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local columnar store of finished matches")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="append new finished matches from the API")
+    ingest.add_argument("--league", choices=list(COMPETITIONS), nargs="+", default=list(COMPETITIONS))
+    ingest.add_argument("--season", type=int, nargs="+", default=[None], help="start years of past seasons (default: current)")
+    sub.add_parser("info", help="rows per competition")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        from config import FOOTBALL_DATA_API_KEY
+        for league in args.league:
+            for season in args.season:
+                before = get_client().usage()
+                added = ingest_league(league, FOOTBALL_DATA_API_KEY, season)
+                usage = get_client().usage(before)
+                label = f"{league} {season or 'current'}"
+                print(f"{label}: " + ("fetch failed" if added is None else f"{added} new matches")
+                      + f" ({usage['requests']} requests, {usage['bytes'] / 1024:.1f} KB)")
+
+    names = {v: k for k, v in COMPETITIONS.items()}
+    print(f"{match_store.rows()} matches, {len(match_store.teams())} teams in {MATCHES_DIR}")
+    for comp, entry in match_store.competitions().items():
+        print(f"  {names.get(int(comp), comp)}: {entry['rows']} matches up to {entry['last_date']}")
@@ -0,0 +1,30 @@
+import os
+import threading
+
+MODEL_PATH = os.path.join("data", "random_forest_model.joblib")
+
+# ---------------- MODEL CACHE ----------------
+
+# Process-wide: Streamlit keeps imported modules alive across reruns and
+# sessions, so the model is unpickled once per file version
+_models = {}
+_lock = threading.Lock()
+
+
+def load_model(path=MODEL_PATH):
+    if not os.path.exists(path):
+        return None
+    key = (os.path.abspath(path), os.path.getmtime(path))
+    with _lock:
+        if key not in _models:
+            import joblib  # pulls in sklearn, only when a model is actually needed
+            # Drop older versions of the same file
+            for old in [k for k in _models if k[0] == key[0]]:
+                del _models[old]
+            _models[key] = joblib.load(path)
+        return _models[key]
+
+
+def clear():
+    with _lock:
+        _models.clear()
@@ -0,0 +1,137 @@
+import time
+
+import numpy as np
+
+from handicap import settlement_returns
+
+# Per-bet and total bankroll caps on simultaneous stakes
+MAX_BET_FRACTION = 0.05
+MAX_EXPOSURE = 0.30
+N_SCENARIOS = 20_000
+
+# ---------------- SCENARIOS ----------------
+
+def _gd_support(goal_diff):
+    values = np.array(sorted(goal_diff, key=float), dtype=float)
+    probs = np.array([goal_diff[v] for v in sorted(goal_diff, key=float)], dtype=float)
+    return values, probs / probs.sum()
+
+
+def _fixture_key(bet, i):
+    # Bets without a fixture stand alone; ("bet", i) cannot collide with
+    # a real fixture id, and fixture 0 is a fixture like any other
+    return bet["fixture"] if bet.get("fixture") is not None else ("bet", i)
+
+
+def scenario_returns(bets, n_scenarios=N_SCENARIOS, seed=42):
+    # (S, N) per-unit returns over sampled outcomes. Each bet is
+    # {fixture, line, odds, goal_diff: {gd: p}}; one goal difference is
+    # drawn per fixture per scenario, so two lines on the same match
+    # settle together instead of being treated as independent.
+    rng = np.random.default_rng(seed)
+    returns = np.empty((n_scenarios, len(bets)))
+    draws = {}
+    for i, bet in enumerate(bets):
+        key = _fixture_key(bet, i)
+        if key not in draws:
+            values, probs = _gd_support(bet["goal_diff"])
+            draws[key] = rng.choice(values, n_scenarios, p=probs)
+        returns[:, i] = settlement_returns(np.full(n_scenarios, bet["line"]), draws[key], bet["odds"])
+    return returns
+
+
+def exact_scenarios(bets):
+    # Every joint outcome with its probability; only practical for a
+    # handful of fixtures, used to check the sampled solution
+    fixtures = list(dict.fromkeys(_fixture_key(bet, i) for i, bet in enumerate(bets)))
+    supports = {}
+    for i, bet in enumerate(bets):
+        supports.setdefault(_fixture_key(bet, i), _gd_support(bet["goal_diff"]))
+    grids = np.meshgrid(*[np.arange(len(supports[k][0])) for k in fixtures], indexing="ij")
+    picks = {k: g.ravel() for k, g in zip(fixtures, grids)}
+    weights = np.prod([supports[k][1][picks[k]] for k in fixtures], axis=0)
+
+    returns = np.empty((len(weights), len(bets)))
+    for i, bet in enumerate(bets):
+        key = _fixture_key(bet, i)
+        gd = supports[key][0][picks[key]]
+        returns[:, i] = settlement_returns(np.full(len(gd), bet["line"]), gd, bet["odds"])
+    return returns, weights
+
+# ---------------- OPTIMIZER ----------------
+
+def project(y, cap=MAX_BET_FRACTION, total=MAX_EXPOSURE):
+    # Euclidean projection onto {0 <= f <= cap, sum(f) <= total}
+    f = np.clip(y, 0, cap)
+    if f.sum() <= total:
+        return f
+    lo, hi = 0.0, float(np.max(y))
+    for _ in range(60):
+        tau = (lo + hi) / 2
+        if np.clip(y - tau, 0, cap).sum() > total:
+            lo = tau
+        else:
+            hi = tau
+    return np.clip(y - hi, 0, cap)
+
+
+def _best_vertex(grad, cap, total):
+    # Feasible point maximising grad . s: fill the steepest bets first
+    s = np.zeros_like(grad)
+    budget = total
+    for i in np.argsort(-grad):
+        if grad[i] <= 0 or budget <= 0:
+            break
+        s[i] = min(cap, budget)
+        budget -= s[i]
+    return s
+
+
+def expected_log_growth(fractions, returns, weights=None):
+    wealth = 1 + returns @ fractions
+    return float(np.average(np.log(wealth), weights=weights))
+
+
+def optimize(returns, weights=None, cap=MAX_BET_FRACTION, total=MAX_EXPOSURE, tol=1e-7, max_iter=2000):
+    # Maximises E[log(1 + R f)] over the capped simplex with projected
+    # gradient ascent (Barzilai-Borwein steps, Armijo backtracking). The
+    # Frank-Wolfe gap bounds how far the result is from the optimum of the
+    # scenario objective; iteration stops once it drops under tol.
+    n_scen, n = returns.shape
+    weights = np.full(n_scen, 1 / n_scen) if weights is None else np.asarray(weights, dtype=float) / np.sum(weights)
+
+    def value_grad(f):
+        wealth = 1 + returns @ f
+        return weights @ np.log(wealth), returns.T @ (weights / wealth)
+
+    f = np.zeros(n)
+    value, grad = value_grad(f)
+    step = 1.0
+    gap = np.inf
+    it = 0
+    while it < max_iter:
+        gap = float(grad @ (_best_vertex(grad, cap, total) - f))
+        if gap < tol:
+            break
+        it += 1
+        while True:
+            cand = project(f + step * grad, cap, total)
+            cand_value, cand_grad = value_grad(cand)
+            if cand_value >= value + 1e-4 * grad @ (cand - f) or step < 1e-12:
+                break
+            step /= 2
+        s, y = cand - f, cand_grad - grad
+        sy = s @ y
+        step = (s @ s) / -sy if sy < 0 else step * 2
+        f, value, grad = cand, cand_value, cand_grad
+    return {"fractions": f, "growth": float(value), "gap": gap, "iterations": it}
+
+
+def portfolio_stakes(bets, cap=MAX_BET_FRACTION, total=MAX_EXPOSURE, n_scenarios=N_SCENARIOS, seed=42):
+    # Growth-optimal bankroll fractions for a slate of simultaneous bets
+    start = time.perf_counter()
+    returns = scenario_returns(bets, n_scenarios, seed)
+    result = optimize(returns, cap=cap, total=total)
+    result["seconds"] = time.perf_counter() - start
+    result["exposure"] = float(result["fractions"].sum())
+    return result
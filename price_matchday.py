@@ -0,0 +1,235 @@
+import argparse
+import csv
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from async_fetch import local_team_stats
+from handicap import format_handicap, parse_handicap, price_lines
+from logic import (
+    EV_THRESHOLD,
+    calibrated_strength_diff,
+    expected_goals,
+    fetch_team_stats,
+    get_bankroll,
+    stake_fraction,
+    suggest_handicap_line
+)
+from score_matrix import price_fixtures
+
+# Prices a whole matchday without the Streamlit wizard:
+#   python price_matchday.py fixtures.csv --output priced.csv --workers 4
+# CSV input has one row per quoted line (home, away, league, line, odds,
+# side); rows of the same fixture form its ladder. JSON / JSONL input has
+# one object per fixture with a "ladder" list of {line, odds, side}.
+
+OUTPUT_COLUMNS = [
+    "fixture", "home", "away", "league", "source", "ega", "egb", "win_p", "draw_p", "loss_p",
+    "suggested", "side", "handicap", "odds", "fair_odds", "ev", "stake", "recommended", "error"
+]
+DEFAULT_LEAGUE = "Premier League"
+STAT_KEYS = ["form", "goal_diff", "home_adv", "defense"]
+
+# ---------------- INPUT ----------------
+
+def _ladder_entry(entry):
+    line = parse_handicap(entry.get("line", entry.get("handicap")))
+    if line is None:
+        return None
+    odds = entry.get("odds")
+    return {"line": line, "odds": float(odds) if odds not in (None, "") else None,
+            "side": (entry.get("side") or "home").strip().lower()}
+
+
+def read_fixtures(path):
+    # List of {home, away, league, ladder} in file order
+    fixtures = {}
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                home = (row.get("home") or row.get("home_team") or "").strip()
+                away = (row.get("away") or row.get("away_team") or "").strip()
+                league = (row.get("league") or DEFAULT_LEAGUE).strip()
+                fixture = fixtures.setdefault((home, away, league), {"home": home, "away": away, "league": league, "ladder": []})
+                entry = _ladder_entry(row) if (row.get("line") or row.get("handicap")) else None
+                if entry:
+                    fixture["ladder"].append(entry)
+        return list(fixtures.values())
+
+    with open(path) as f:
+        if path.endswith(".jsonl"):
+            raw = [json.loads(line) for line in f if line.strip()]
+        else:
+            raw = json.load(f)
+            raw = raw.get("fixtures", []) if isinstance(raw, dict) else raw
+    return [
+        {
+            "home": item.get("home") or item.get("home_team"),
+            "away": item.get("away") or item.get("away_team"),
+            "league": item.get("league", DEFAULT_LEAGUE),
+            "ladder": [e for e in (_ladder_entry(x) for x in item.get("ladder", [])) if e]
+        }
+        for item in raw
+    ]
+
+# ---------------- STATS ----------------
+
+def team_stats(team, league, is_home, api_key):
+    # Prefetched league snapshot first, cached API fetch otherwise
+    stats = local_team_stats(team, league, is_home)
+    if stats is None:
+        stats = fetch_team_stats(team, api_key, is_home, league)
+    return stats
+
+
+def fixture_inputs(fixture, api_key, use_ratings=False, rating_states=None):
+    # (ega, egb, rho, source) for one fixture, or None when stats are missing
+    if use_ratings:
+        from ratings import load_state, predict_goals
+        league = fixture["league"]
+        if league not in rating_states:
+            rating_states[league] = load_state(league)
+        rated = predict_goals(rating_states[league], fixture["home"], fixture["away"])
+        if rated:
+            return rated + ("ratings",)
+    stats_a = team_stats(fixture["home"], fixture["league"], True, api_key)
+    stats_b = team_stats(fixture["away"], fixture["league"], False, api_key)
+    if not stats_a or not stats_b:
+        return None
+    ega = expected_goals(*(stats_a[k] for k in STAT_KEYS))
+    egb = expected_goals(*(stats_b[k] for k in STAT_KEYS))
+    return float(ega), float(egb), 0.0, "stats"
+
+# ---------------- PRICING ----------------
+
+def price_batch(fixtures, inputs, bankroll):
+    # One score-matrix pass for the batch, then every quoted line of every
+    # fixture priced together. Yields output rows in input order.
+    ok = [i for i, x in enumerate(inputs) if x is not None]
+    priced = None
+    if ok:
+        ega = np.array([inputs[i][0] for i in ok])
+        egb = np.array([inputs[i][1] for i in ok])
+        rho = np.array([inputs[i][2] for i in ok])
+        priced = price_fixtures(ega, egb, rho=rho)
+        suggested = np.atleast_1d(suggest_handicap_line(calibrated_strength_diff(ega, egb)))
+
+        # Flatten ladders to one row per line; away-side bets see the
+        # goal-difference distribution mirrored (values run -G..G)
+        row_fixture, lines, odds, away = [], [], [], []
+        for j, i in enumerate(ok):
+            ladder = fixtures[i]["ladder"] or [{"line": float(suggested[j]), "odds": None, "side": "home"}]
+            for entry in ladder:
+                row_fixture.append(j)
+                lines.append(entry["line"])
+                odds.append(np.nan if entry["odds"] is None else entry["odds"])
+                away.append(entry["side"] == "away")
+        row_fixture = np.array(row_fixture)
+        dist = priced["goal_diff"][row_fixture]
+        dist = np.where(np.array(away)[:, None], dist[:, ::-1], dist)
+        odds = np.array(odds, dtype=float)
+        lined = price_lines(lines, priced["goal_diff_values"], dist, odds)
+        stakes = np.round(bankroll * stake_fraction(np.nan_to_num(lined["ev"], nan=-1.0)), 2)
+
+    r = 0
+    position = {i: j for j, i in enumerate(ok)}
+    for i, fixture in enumerate(fixtures):
+        base = {
+            "fixture": f"{fixture['home']} vs {fixture['away']}",
+            "home": fixture["home"],
+            "away": fixture["away"],
+            "league": fixture["league"]
+        }
+        if i not in position:
+            yield {**base, "error": "stats unavailable"}
+            continue
+        j = position[i]
+        base.update({
+            "source": inputs[i][3],
+            "ega": round(inputs[i][0], 3),
+            "egb": round(inputs[i][1], 3),
+            "win_p": round(float(priced["win"][j]), 4),
+            "draw_p": round(float(priced["draw"][j]), 4),
+            "loss_p": round(float(priced["loss"][j]), 4),
+            "suggested": format_handicap(float(suggested[j]))
+        })
+        while r < len(row_fixture) and row_fixture[r] == j:
+            has_odds = not np.isnan(odds[r])
+            ev = round(float(lined["ev"][r]), 4) if has_odds else None
+            yield {
+                **base,
+                "side": "away" if away[r] else "home",
+                "handicap": format_handicap(lines[r]),
+                "odds": odds[r] if has_odds else None,
+                "fair_odds": round(float(lined["fair_odds"][r]), 3),
+                "ev": ev,
+                "stake": float(stakes[r]) if has_odds else None,
+                "recommended": bool(has_odds and ev >= EV_THRESHOLD)
+            }
+            r += 1
+
+
+def run(fixtures, out, fmt, api_key, workers=4, batch_size=20, use_ratings=False, bankroll=None, progress=sys.stderr):
+    # Stats lookups run on a thread pool (they wait on the network or the
+    # rate limiter); pricing happens per batch and rows are written and
+    # flushed as soon as their batch is done
+    bankroll = get_bankroll() if bankroll is None else bankroll
+    writer = csv.DictWriter(out, OUTPUT_COLUMNS) if fmt == "csv" else None
+    if writer:
+        writer.writeheader()
+    rating_states = {}
+    start = time.perf_counter()
+    done = missing = rows = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for b in range(0, len(fixtures), batch_size):
+            batch = fixtures[b:b + batch_size]
+            inputs = list(pool.map(lambda fx: fixture_inputs(fx, api_key, use_ratings, rating_states), batch))
+            for row in price_batch(batch, inputs, bankroll):
+                if writer:
+                    writer.writerow(row)
+                else:
+                    out.write(json.dumps({k: v for k, v in row.items() if v is not None}) + "\n")
+                rows += 1
+            out.flush()
+            done += len(batch)
+            missing += sum(x is None for x in inputs)
+            if progress:
+                elapsed = time.perf_counter() - start
+                print(f"[{done}/{len(fixtures)}] {rows} lines priced, {missing} fixtures without stats, "
+                      f"{done / max(elapsed, 1e-9):.1f} fixtures/s", file=progress, flush=True)
+    return {"fixtures": done, "missing": missing, "rows": rows, "seconds": time.perf_counter() - start}
+
+
+if __name__ == "__main__":
+    from config import FOOTBALL_DATA_API_KEY
+
+    parser = argparse.ArgumentParser(description="Price a matchday of fixtures and odds ladders without the app")
+    parser.add_argument("fixtures", help="CSV, JSON or JSONL file of fixtures and quoted lines")
+    parser.add_argument("--output", "-o", default="-", help="output file (default stdout)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None, help="default: from --output extension, else csv")
+    parser.add_argument("--workers", type=int, default=4, help="threads for team stat lookups")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--ratings", action="store_true", help="use fitted Dixon-Coles ratings where available")
+    parser.add_argument("--bankroll", type=float, default=None, help="default: current ledger balance")
+    parser.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    args = parser.parse_args()
+
+    fmt = args.format or ("jsonl" if args.output.endswith((".jsonl", ".json")) else "csv")
+    fixtures = read_fixtures(args.fixtures)
+    if not fixtures:
+        parser.error(f"no fixtures in {args.fixtures}")
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        summary = run(fixtures, out, fmt, FOOTBALL_DATA_API_KEY, args.workers, args.batch_size,
+                      args.ratings, args.bankroll, None if args.quiet else sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if not args.quiet:
+        print(f"done: {summary['fixtures']} fixtures, {summary['rows']} lines in {summary['seconds']:.1f}s"
+              + ("" if args.output == "-" else f" -> {args.output}"), file=sys.stderr)
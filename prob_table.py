@@ -0,0 +1,138 @@
+import argparse
+import hashlib
+import json
+import os
+from itertools import product
+
+import numpy as np
+
+from logic import DATA_DIR, expected_goals, match_probabilities, match_distribution
+from score_matrix import TAIL_MASS, adaptive_max_goals, price_fixtures
+
+TABLE_META = os.path.join(DATA_DIR, "prob_table.json")
+TABLE_WDL = os.path.join(DATA_DIR, "prob_table_wdl.npy")
+TABLE_GD = os.path.join(DATA_DIR, "prob_table_gd.npy")
+
+DEFAULT_STEP = 0.01
+
+# ---------------- BUILD ----------------
+
+def model_bounds():
+    # expected_goals is linear in its four [0, 1] inputs, so its range is
+    # spanned by the corners of the input cube
+    corners = [expected_goals(*c) for c in product((0.0, 1.0), repeat=4)]
+    return round(min(corners), 4), round(max(corners), 4)
+
+
+def model_fingerprint(step=DEFAULT_STEP):
+    # Changes whenever the expected_goals constants or engine settings do
+    corners = [round(expected_goals(*c), 6) for c in product((0.0, 1.0), repeat=4)]
+    probe = [round(expected_goals(0.5, 0.5, 0.5, 0.5), 6), round(expected_goals(0.25, 0.75, 0.1, 0.9), 6)]
+    raw = json.dumps({"corners": corners, "probe": probe, "step": step, "tail": TAIL_MASS})
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def build_table(step=DEFAULT_STEP):
+    low, high = model_bounds()
+    axis = np.round(np.arange(low, high + step / 2, step), 6)
+    max_goals = adaptive_max_goals(high)
+    n = len(axis)
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    wdl = np.lib.format.open_memmap(TABLE_WDL + ".tmp", mode="w+", dtype=np.float32, shape=(n, n, 3))
+    gd = np.lib.format.open_memmap(TABLE_GD + ".tmp", mode="w+", dtype=np.float32, shape=(n, n, 2 * max_goals + 1))
+
+    # One ega row at a time keeps the score matrices small
+    for i, ega in enumerate(axis):
+        priced = price_fixtures(np.full(n, ega), axis, max_goals)
+        wdl[i, :, 0] = priced['win']
+        wdl[i, :, 1] = priced['draw']
+        wdl[i, :, 2] = priced['loss']
+        gd[i] = priced['goal_diff']
+    wdl.flush()
+    gd.flush()
+    del wdl, gd
+
+    os.replace(TABLE_WDL + ".tmp", TABLE_WDL)
+    os.replace(TABLE_GD + ".tmp", TABLE_GD)
+    meta = {
+        "fingerprint": model_fingerprint(step),
+        "low": float(axis[0]),
+        "step": step,
+        "size": n,
+        "max_goals": max_goals
+    }
+    with open(TABLE_META, "w") as f:
+        json.dump(meta, f, indent=2)
+    _table.clear()
+    return meta
+
+# ---------------- LOOKUP ----------------
+
+_table = {}
+
+
+def load_table():
+    # Memory-mapped once per process; None if missing or built for other constants
+    if "meta" in _table:
+        return _table
+    try:
+        with open(TABLE_META) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("fingerprint") != model_fingerprint(meta.get("step", DEFAULT_STEP)):
+        return None
+    _table["meta"] = meta
+    _table["wdl"] = np.load(TABLE_WDL, mmap_mode="r")
+    _table["gd"] = np.load(TABLE_GD, mmap_mode="r")
+    _table["gd_values"] = np.arange(-meta["max_goals"], meta["max_goals"] + 1)
+    return _table
+
+
+def _interpolate(grid, meta, ega, egb):
+    # Bilinear blend of the four surrounding grid points
+    x = (ega - meta["low"]) / meta["step"]
+    y = (egb - meta["low"]) / meta["step"]
+    last = meta["size"] - 1
+    if x < 0 or y < 0 or x > last or y > last:
+        return None
+    i, j = min(int(x), last - 1), min(int(y), last - 1)
+    fx, fy = x - i, y - j
+    return ((1 - fx) * (1 - fy) * grid[i, j] + fx * (1 - fy) * grid[i + 1, j]
+            + (1 - fx) * fy * grid[i, j + 1] + fx * fy * grid[i + 1, j + 1])
+
+
+def lookup(ega, egb):
+    table = load_table()
+    if table is None:
+        return None
+    wdl = _interpolate(table["wdl"], table["meta"], ega, egb)
+    if wdl is None:
+        return None
+    gd = _interpolate(table["gd"], table["meta"], ega, egb)
+    probs = {'win': float(wdl[0]), 'draw': float(wdl[1]), 'loss': float(wdl[2])}
+    goal_diff = {int(v): float(p) for v, p in zip(table["gd_values"], gd)}
+    return probs, goal_diff
+
+
+def probabilities(ega, egb, rho=0.0):
+    # Table hit when available, Poisson engine otherwise. The table is
+    # plain Poisson, so a Dixon-Coles rho always goes to the engine.
+    hit = lookup(ega, egb) if not rho else None
+    if hit is not None:
+        return hit
+    return match_probabilities(ega, egb, rho=rho), match_distribution(ega, egb, rho=rho)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerate the precomputed probability table")
+    parser.add_argument("command", choices=["build", "check"])
+    parser.add_argument("--step", type=float, default=DEFAULT_STEP, help="grid spacing in expected goals")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        meta = build_table(args.step)
+        print(f"Built {meta['size']}x{meta['size']} table over xG {meta['low']}..{model_bounds()[1]}")
+    else:
+        print("Table is current" if load_table() else "Table missing or stale, run: python prob_table.py build")
@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+from cache import MATCHES_TTL
+from locking import atomic_write
+from logic import COMPETITIONS, DATA_DIR, find_team, synced_matches
+
+RATINGS_DIR = os.path.join(DATA_DIR, "ratings")
+
+# Time-decay per day (half-life ~1 year) and a small ridge penalty that
+# pins attack/defence levels so the intercept is identifiable
+XI = 0.0019
+REG = 0.01
+RHO_LIMIT = 0.2
+
+# ---------------- DIXON-COLES LIKELIHOOD ----------------
+
+def _loglik_grad(theta, hi, ai, x, y, w, n):
+    # Weighted Dixon-Coles log likelihood, its gradient and the curvature
+    # terms fit() needs. theta = [intercept, home, rho, attack(n), defence(n)]
+    c, h, rho = theta[0], theta[1], theta[2]
+    att, dfn = theta[3:3 + n], theta[3 + n:]
+    eta1 = c + h + att[hi] - dfn[ai]
+    eta2 = c + att[ai] - dfn[hi]
+    lam, mu = np.exp(eta1), np.exp(eta2)
+
+    tau = np.ones_like(lam)
+    dt1, dt2, dtr = np.zeros_like(lam), np.zeros_like(lam), np.zeros_like(lam)
+    m = (x == 0) & (y == 0)
+    tau[m] = 1 - lam[m] * mu[m] * rho
+    dt1[m] = dt2[m] = -lam[m] * mu[m] * rho
+    dtr[m] = -lam[m] * mu[m]
+    m = (x == 0) & (y == 1)
+    tau[m] = 1 + lam[m] * rho
+    dt1[m] = lam[m] * rho
+    dtr[m] = lam[m]
+    m = (x == 1) & (y == 0)
+    tau[m] = 1 + mu[m] * rho
+    dt2[m] = mu[m] * rho
+    dtr[m] = mu[m]
+    m = (x == 1) & (y == 1)
+    tau[m] = 1 - rho
+    dtr[m] = -1
+    tau = np.maximum(tau, 1e-10)
+
+    ll = np.sum(w * (np.log(tau) + x * eta1 - lam + y * eta2 - mu)) - REG * (att @ att + dfn @ dfn)
+    g1 = w * (x - lam + dt1 / tau)
+    g2 = w * (y - mu + dt2 / tau)
+
+    grad = np.empty_like(theta)
+    grad[0] = g1.sum() + g2.sum()
+    grad[1] = g1.sum()
+    grad[2] = np.sum(w * dtr / tau)
+    grad[3:3 + n] = np.bincount(hi, g1, n) + np.bincount(ai, g2, n) - 2 * REG * att
+    grad[3 + n:] = -np.bincount(ai, g1, n) - np.bincount(hi, g2, n) - 2 * REG * dfn
+    return ll, grad, (w * lam, w * mu, np.sum(w * (dtr / tau) ** 2))
+
+
+def _design(hi, ai, n):
+    # d(eta)/d(theta) for the home (j1) and away (j2) log-rates
+    rows = np.arange(len(hi))
+    j1 = np.zeros((len(hi), 3 + 2 * n))
+    j2 = np.zeros_like(j1)
+    j1[:, 0] = j1[:, 1] = j2[:, 0] = 1
+    j1[rows, 3 + hi] = 1
+    j1[rows, 3 + n + ai] = -1
+    j2[rows, 3 + ai] = 1
+    j2[rows, 3 + n + hi] = -1
+    return j1, j2
+
+
+def fit(matches, n_teams, as_of, theta0=None, max_iter=100, tol=1e-6):
+    # Newton ascent using the exact Poisson curvature plus the rho term
+    # (the small tau cross terms are left out), with step halving so the
+    # likelihood never drops. theta0 warm-starts from a previous fit, which
+    # usually needs only a couple of steps when a round of results lands.
+    hi, ai = np.asarray(matches["home"]), np.asarray(matches["away"])
+    x, y = np.asarray(matches["hg"], dtype=float), np.asarray(matches["ag"], dtype=float)
+    days = (np.datetime64(as_of, "D") - np.asarray(matches["date"], dtype="datetime64[D]")).astype(float)
+    w = np.exp(-XI * np.maximum(days, 0))
+    scale = w.sum()
+    j1, j2 = _design(hi, ai, n_teams)
+    ridge = np.r_[0, 0, 0, np.full(2 * n_teams, 2 * REG)]
+
+    theta = np.zeros(3 + 2 * n_teams) if theta0 is None else np.array(theta0, dtype=float)
+    if theta0 is None:
+        theta[0] = np.log(max((x * w).sum() + (y * w).sum(), 1e-9) / (2 * scale))
+    ll, grad, (wl, wm, rho_curv) = _loglik_grad(theta, hi, ai, x, y, w, n_teams)
+    it = 0
+    while it < max_iter and np.abs(grad).max() / scale > tol:
+        it += 1
+        hess = j1.T @ (j1 * wl[:, None]) + j2.T @ (j2 * wm[:, None]) + np.diag(ridge)
+        hess[2, 2] = rho_curv + 1e-9
+        step = np.linalg.solve(hess, grad)
+        t = 1.0
+        while t > 1e-4:
+            cand = theta + t * step
+            cand[2] = np.clip(cand[2], -RHO_LIMIT, RHO_LIMIT)
+            result = _loglik_grad(cand, hi, ai, x, y, w, n_teams)
+            if result[0] >= ll:
+                break
+            t /= 2
+        else:
+            break
+        theta = cand
+        ll, grad, (wl, wm, rho_curv) = result
+    return theta, ll, it
+
+# ---------------- LEAGUE STATE ----------------
+
+def _state_path(league):
+    return os.path.join(RATINGS_DIR, f"{COMPETITIONS.get(league, 2021)}.json")
+
+
+def load_state(league):
+    try:
+        with open(_state_path(league)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_state(league, state):
+    os.makedirs(RATINGS_DIR, exist_ok=True)
+    atomic_write(_state_path(league), lambda f: json.dump(state, f))
+
+
+def fetch_finished_matches(league, api_key):
+    comp_id = COMPETITIONS.get(league, 2021)
+    try:
+        data = synced_matches(f"/competitions/{comp_id}/matches?status=FINISHED", api_key, MATCHES_TTL)
+    except Exception as e:
+        print(f"API Error: {e}")
+        return None
+    return data.get("matches", []) if data else None
+
+
+def update_ratings(league, raw_matches, force=False):
+    # Folds newly finished matches into the stored fit. Unchanged data is
+    # a no-op; new matches or teams refit warm-started from the last theta.
+    state = load_state(league) or {
+        "league": league,
+        "teams": [],
+        "matches": {"id": [], "date": [], "home": [], "away": [], "hg": [], "ag": []},
+        "theta": None
+    }
+    teams, matches = state["teams"], state["matches"]
+    team_index = {t["id"]: i for i, t in enumerate(teams)}
+    known = set(matches["id"])
+    n_before = len(teams)
+
+    added = 0
+    for match in raw_matches:
+        score = match.get("score", {}).get("fullTime", {})
+        if match.get("id") in known or score.get("home") is None:
+            continue
+        for side in ("homeTeam", "awayTeam"):
+            team = match[side]
+            if team["id"] not in team_index:
+                team_index[team["id"]] = len(teams)
+                teams.append({"id": team["id"], "name": team.get("name", str(team["id"])),
+                              "shortName": team.get("shortName"), "tla": team.get("tla")})
+        matches["id"].append(match["id"])
+        matches["date"].append(match["utcDate"][:10])
+        matches["home"].append(team_index[match["homeTeam"]["id"]])
+        matches["away"].append(team_index[match["awayTeam"]["id"]])
+        matches["hg"].append(score["home"])
+        matches["ag"].append(score["away"])
+        added += 1
+
+    if not matches["id"] or (not added and state["theta"] is not None and not force):
+        return state, 0
+
+    n = len(teams)
+    theta0 = None
+    if state["theta"] is not None and not force:
+        old = np.array(state["theta"])
+        # New teams start at league average
+        theta0 = np.concatenate([old[:3], old[3:3 + n_before], np.zeros(n - n_before),
+                                 old[3 + n_before:], np.zeros(n - n_before)])
+
+    as_of = max(matches["date"])
+    theta, ll, iterations = fit(matches, n, as_of, theta0)
+    state.update({
+        "theta": theta.tolist(),
+        "log_lik": float(ll),
+        "iterations": int(iterations),
+        "as_of": as_of,
+        "fitted_at": datetime.now().isoformat()
+    })
+    save_state(league, state)
+    return state, added
+
+# ---------------- PREDICTION ----------------
+
+def team_ratings(state):
+    n = len(state["teams"])
+    theta = state["theta"]
+    return [
+        {"team": t["name"], "attack": round(theta[3 + i], 3), "defence": round(theta[3 + n + i], 3)}
+        for i, t in enumerate(state["teams"])
+    ]
+
+
+def predict_goals(state, home_name, away_name):
+    # (ega, egb, rho) straight from the fitted ratings, or None if a team is unknown
+    if not state or state.get("theta") is None:
+        return None
+    home = find_team(state["teams"], home_name)
+    away = find_team(state["teams"], away_name)
+    if not home or not away:
+        return None
+    n = len(state["teams"])
+    theta = state["theta"]
+    hi, ai = state["teams"].index(home), state["teams"].index(away)
+    c, h, rho = theta[0], theta[1], theta[2]
+    ega = np.exp(c + h + theta[3 + hi] - theta[3 + n + ai])
+    egb = np.exp(c + theta[3 + ai] - theta[3 + n + hi])
+    return float(ega), float(egb), float(rho)
+
+
+if __name__ == "__main__":
+    from config import FOOTBALL_DATA_API_KEY
+
+    parser = argparse.ArgumentParser(description="Fit or update Dixon-Coles team ratings")
+    parser.add_argument("--league", choices=list(COMPETITIONS), default="Premier League")
+    parser.add_argument("--force", action="store_true", help="refit from scratch")
+    parser.add_argument("--store", action="store_true", help="read matches from the local match store instead of the API")
+    args = parser.parse_args()
+
+    if args.store:
+        from match_store import match_store
+        known = [] if args.force else (load_state(args.league) or {"matches": {"id": []}})["matches"]["id"]
+        raw = match_store.raw_matches(COMPETITIONS[args.league], known)
+    else:
+        raw = fetch_finished_matches(args.league, FOOTBALL_DATA_API_KEY)
+    if raw is None:
+        parser.error("could not fetch matches, check API key")
+    state, added = update_ratings(args.league, raw, args.force)
+    print(f"{args.league}: {added} new matches, {len(state['matches']['id'])} total, "
+          f"{state.get('iterations')} iterations, home adv {state['theta'][1]:.3f}, rho {state['theta'][2]:.3f}")
+    for row in sorted(team_ratings(state), key=lambda r: r["attack"] - r["defence"], reverse=True):
+        print(f"  {row['team']:<30} att {row['attack']:+.3f}  def {row['defence']:+.3f}")
@@ -1,5 +1,16 @@
+import os
+import subprocess
 import streamlit.web.cli as stcli
 import sys
 
+# Background stats warmer next to the app; skip it with --no-warmer
+warmer = None
+if "--no-warmer" not in sys.argv:
+    warmer = subprocess.Popen([sys.executable, "warmer.py", "--parent", str(os.getpid())])
+
 sys.argv = ["streamlit", "run", "app.py"]
-stcli.main()
+try:
+    stcli.main()
+finally:
+    if warmer:
+        warmer.terminate()
@@ -0,0 +1,104 @@
+import numpy as np
+
+# Goals cutoff is picked so that the Poisson tail beyond it is below TAIL_MASS
+TAIL_MASS = 1e-10
+MIN_GOALS = 5
+MAX_GOALS_LIMIT = 30
+
+# ---------------- POISSON VECTORS ----------------
+
+def adaptive_max_goals(max_lambda, tail=TAIL_MASS):
+    lam = float(max_lambda)
+    if lam <= 0:
+        return MIN_GOALS
+    pmf = np.exp(-lam)
+    cdf = pmf
+    k = 0
+    while 1 - cdf > tail and k < MAX_GOALS_LIMIT:
+        k += 1
+        pmf *= lam / k
+        cdf += pmf
+    return max(MIN_GOALS, k)
+
+
+def poisson_pmf(lam, max_goals):
+    # Row i holds P(0..max_goals goals) for lam[i]; built with the
+    # recurrence p(k) = p(k-1) * lam / k, no factorials
+    lam = np.asarray(lam, dtype=float).reshape(-1, 1)
+    k = np.arange(1, max_goals + 1)
+    steps = np.concatenate([np.ones((lam.shape[0], 1)), lam / k], axis=1)
+    return np.exp(-lam) * np.cumprod(steps, axis=1)
+
+# ---------------- SCORE MATRIX ----------------
+
+def score_matrix(ega, egb, max_goals=None, rho=0.0):
+    # Joint P(home=i, away=j), shape (n, G+1, G+1). Independent Poisson
+    # goals, with the Dixon-Coles low-score correction when rho != 0.
+    ega = np.atleast_1d(np.asarray(ega, dtype=float))
+    egb = np.atleast_1d(np.asarray(egb, dtype=float))
+    ega, egb = np.broadcast_arrays(ega, egb)
+    if max_goals is None:
+        max_goals = adaptive_max_goals(max(ega.max(), egb.max()))
+    pa = poisson_pmf(ega, max_goals)
+    pb = poisson_pmf(egb, max_goals)
+    matrix = pa[:, :, None] * pb[:, None, :]
+    rho = np.asarray(rho, dtype=float)  # one value, or one per fixture
+    if np.any(rho):
+        matrix[:, 0, 0] *= 1 - ega * egb * rho
+        matrix[:, 0, 1] *= 1 + ega * rho
+        matrix[:, 1, 0] *= 1 + egb * rho
+        matrix[:, 1, 1] *= 1 - rho
+    total = matrix.sum(axis=(1, 2), keepdims=True)
+    return matrix / np.where(total > 0, total, 1)
+
+
+def outcome_probabilities(matrix):
+    win = np.tril(matrix, -1).sum(axis=(-2, -1))
+    draw = np.trace(matrix, axis1=-2, axis2=-1)
+    loss = np.triu(matrix, 1).sum(axis=(-2, -1))
+    return win, draw, loss
+
+
+def goal_difference_distribution(matrix):
+    # Column d + G holds P(home - away = d) for d in -G..G
+    g = matrix.shape[-1] - 1
+    values = np.arange(-g, g + 1)
+    dist = np.stack([np.trace(matrix, offset=-d, axis1=-2, axis2=-1) for d in values], axis=-1)
+    return values, dist
+
+
+def total_goals_distribution(matrix):
+    # Column t holds P(home + away = t) for t in 0..2G
+    g = matrix.shape[-1] - 1
+    flipped = np.flip(matrix, axis=-1)
+    values = np.arange(0, 2 * g + 1)
+    dist = np.stack([np.trace(flipped, offset=g - t, axis1=-2, axis2=-1) for t in values], axis=-1)
+    return values, dist
+
+
+def price_fixtures(ega, egb, max_goals=None, rho=0.0):
+    # Everything downstream comes from the one matrix. Scalars in, scalars
+    # out; arrays of fixtures in, one row per fixture out.
+    scalar = np.ndim(ega) == 0 and np.ndim(egb) == 0
+    matrix = score_matrix(ega, egb, max_goals, rho)
+    win, draw, loss = outcome_probabilities(matrix)
+    gd_values, gd_dist = goal_difference_distribution(matrix)
+    total_values, total_dist = total_goals_distribution(matrix)
+
+    result = {
+        'win': win,
+        'draw': draw,
+        'loss': loss,
+        'goal_diff_values': gd_values,
+        'goal_diff': gd_dist,
+        'total_values': total_values,
+        'total_goals': total_dist,
+        'expected_total': total_dist @ total_values,
+        'max_goals': matrix.shape[-1] - 1
+    }
+    if scalar:
+        for key in ('win', 'draw', 'loss', 'expected_total'):
+            result[key] = float(result[key][0])
+        result['goal_diff'] = result['goal_diff'][0]
+        result['total_goals'] = result['total_goals'][0]
+    return result
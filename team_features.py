@@ -0,0 +1,247 @@
+import os
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+from logic import DATA_DIR, expected_goals, find_team
+
+FEATURES_FILE = os.path.join(DATA_DIR, "team_features.npz")
+
+WINDOWS = (5, 10, 20)
+HALF_LIFE = 10  # matches, for the exponentially decayed aggregates
+SPLITS = ("all", "home", "away")
+METRICS = ("wins", "scored", "conceded")
+# Same window the live fetch and calibrate use, so the slider scale matches
+DEFAULT_WINDOW = 5
+# A league whose newest stored match is older than this has not been
+# ingested lately, and its form figures are not used for live lookups
+STORE_MAX_AGE_DAYS = 14
+
+# ---------------- ENGINE ----------------
+
+class FeatureEngine:
+    # Rolling per-team aggregates over the last 5/10/20 matches plus an
+    # exponentially decayed mean, each kept for all / home / away games.
+    # A ring buffer of the last max(WINDOWS) results per team and split
+    # lets every window add the new match and drop the one falling out,
+    # so a match costs the same however long the history is.
+
+    def __init__(self, n_teams=0):
+        self.decay = 0.5 ** (1 / HALF_LIFE)
+        self.max_window = max(WINDOWS)
+        self.ring = np.zeros((n_teams, len(SPLITS), self.max_window, len(METRICS)))
+        self.count = np.zeros((n_teams, len(SPLITS)), dtype=np.int64)
+        self.sums = np.zeros((len(WINDOWS), n_teams, len(SPLITS), len(METRICS)))
+        self.ewm = np.zeros((n_teams, len(SPLITS), len(METRICS)))
+        self.ewm_weight = np.zeros((n_teams, len(SPLITS)))
+        self.rows = 0  # match store rows folded in
+        self.last_date = None
+        self.fingerprint = ""  # store_fingerprint of those rows
+        self._windows = np.array(WINDOWS)
+
+    @property
+    def n_teams(self):
+        return len(self.count)
+
+    def _grow(self, n_teams):
+        extra = n_teams - self.n_teams
+        if extra <= 0:
+            return
+        self.ring = np.concatenate([self.ring, np.zeros((extra,) + self.ring.shape[1:])])
+        self.count = np.concatenate([self.count, np.zeros((extra, len(SPLITS)), dtype=np.int64)])
+        self.sums = np.concatenate([self.sums, np.zeros((len(WINDOWS), extra) + self.sums.shape[2:])], axis=1)
+        self.ewm = np.concatenate([self.ewm, np.zeros((extra,) + self.ewm.shape[1:])])
+        self.ewm_weight = np.concatenate([self.ewm_weight, np.zeros((extra, len(SPLITS)))])
+
+    def _push(self, team, split, values):
+        c = self.count[team, split]
+        leaving = c >= self._windows
+        if leaving.any():
+            self.sums[leaving, team, split] -= self.ring[team, split, (c - self._windows[leaving]) % self.max_window]
+        self.sums[:, team, split] += values
+        self.ring[team, split, c % self.max_window] = values
+        self.count[team, split] = c + 1
+        self.ewm[team, split] = self.decay * self.ewm[team, split] + values
+        self.ewm_weight[team, split] = self.decay * self.ewm_weight[team, split] + 1
+
+    def update(self, home, away, home_goals, away_goals):
+        # One finished match, O(1)
+        self._grow(max(home, away) + 1)
+        home_values = np.array([home_goals > away_goals, home_goals, away_goals], dtype=float)
+        away_values = np.array([away_goals > home_goals, away_goals, home_goals], dtype=float)
+        for split in (0, 1):
+            self._push(home, split, home_values)
+        for split in (0, 2):
+            self._push(away, split, away_values)
+
+    # ---------------- QUERIES ----------------
+
+    def aggregates(self, window=DEFAULT_WINDOW):
+        # Per-game means for every team at once: arrays of shape
+        # (n_teams, 3 splits) for games, win_rate, scored and conceded.
+        # window is one of WINDOWS or "ewm".
+        if window == "ewm":
+            games = self.ewm_weight
+            totals = self.ewm
+        else:
+            games = np.minimum(self.count, window).astype(float)
+            totals = self.sums[WINDOWS.index(window)]
+        safe = np.where(games > 0, games, 1)[..., None]
+        means = np.where(games[..., None] > 0, totals / safe, np.nan)
+        return {"games": games, "win_rate": means[..., 0], "scored": means[..., 1], "conceded": means[..., 2]}
+
+    def slider_stats(self, window=DEFAULT_WINDOW):
+        # The four 0-1 inputs of expected_goals for every team, scaled as
+        # team_stats_from_matches does. home_adv is the win rate over the
+        # window's home games only, not over whichever home games happen
+        # to be among the last few matches.
+        agg = self.aggregates(window)
+        form = agg["win_rate"][:, 0]
+        goal_diff = np.clip((agg["scored"][:, 0] - agg["conceded"][:, 0] + 3) / 6, 0, 1)
+        defense = np.clip(1 - agg["conceded"][:, 0] / 2, 0, 1)
+        home_adv = np.nan_to_num(agg["win_rate"][:, 1], nan=0.5)
+        return {"form": form, "goal_diff": goal_diff, "home_adv": home_adv, "defense": defense,
+                "games": agg["games"][:, 0]}
+
+    def team_stats(self, team, is_home=True, window=DEFAULT_WINDOW, min_games=3):
+        # Same dict shape as fetch_team_stats, or None without enough games
+        if team is None or team >= self.n_teams or self.count[team, 0] < min_games:
+            return None
+        stats = self.slider_stats(window)
+        result = {key: round(float(stats[key][team]), 2) for key in ("form", "goal_diff", "home_adv", "defense")}
+        if not is_home:
+            result["home_adv"] = 0.0  # Away team
+        return result
+
+    def expected_goals(self, home, away, window=DEFAULT_WINDOW):
+        # Vectorised expected_goals for arrays of home / away team indexes
+        stats = self.slider_stats(window)
+        home, away = np.asarray(home), np.asarray(away)
+        ega = expected_goals(stats["form"][home], stats["goal_diff"][home], stats["home_adv"][home], stats["defense"][home])
+        egb = expected_goals(stats["form"][away], stats["goal_diff"][away], 0.0, stats["defense"][away])
+        return ega, egb
+
+    def feature_matrix(self, home, away, window=DEFAULT_WINDOW):
+        # FEATURE_COLUMNS layout for arrays of fixtures, as feature_row builds it
+        stats = self.slider_stats(window)
+        home, away = np.asarray(home), np.asarray(away)
+        return np.column_stack([
+            stats["form"][home], stats["form"][away],
+            stats["goal_diff"][home], stats["goal_diff"][away],
+            stats["goal_diff"][home], stats["goal_diff"][away],
+            np.ones(len(home))
+        ])
+
+    # ---------------- SYNC / PERSISTENCE ----------------
+
+    def sync(self, store):
+        # Folds in match store rows added since the last sync. Rows are
+        # applied in date order. The engine replays everything when an
+        # append brought matches older than ones already applied (a
+        # back-filled season), since rolling windows depend on order, and
+        # when the store no longer holds the rows it was built from (fewer
+        # rows, or another match in its last row: a rebuilt store).
+        rows = store.rows()
+        cols = store.columns()
+        if rows < self.rows or store_fingerprint(cols, self.rows) != self.fingerprint:
+            return self._replay(cols, rows)
+        if rows == self.rows:
+            return 0
+        new = np.arange(self.rows, rows)
+        if self.last_date is not None and cols["date"][new].min() < self.last_date:
+            return self._replay(cols, rows)
+        self.sync_from(cols, new)
+        self.fingerprint = store_fingerprint(cols, rows)
+        return len(new)
+
+    def _replay(self, cols, rows):
+        fresh = FeatureEngine()
+        fresh.sync_from(cols, np.arange(rows))
+        fresh.fingerprint = store_fingerprint(cols, rows)
+        self.__dict__.update(fresh.__dict__)
+        return rows
+
+    def sync_from(self, cols, rows):
+        order = rows[np.lexsort((cols["match_id"][rows], cols["date"][rows]))]
+        for home, away, hg, ag in zip(cols["home"][order].tolist(), cols["away"][order].tolist(),
+                                      cols["home_goals"][order].tolist(), cols["away_goals"][order].tolist()):
+            self.update(home, away, hg, ag)
+        if len(order):
+            latest = cols["date"][order[-1]]
+            self.last_date = latest if self.last_date is None else max(self.last_date, latest)
+        self.rows = max(self.rows, int(rows.max()) + 1 if len(rows) else 0)
+
+    def save(self, path=FEATURES_FILE):
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, ring=self.ring, count=self.count, sums=self.sums, ewm=self.ewm, ewm_weight=self.ewm_weight,
+                 rows=self.rows, last_date=np.array(self.last_date if self.last_date is not None else "NaT", dtype="M8[D]"),
+                 fingerprint=np.array(self.fingerprint), config=np.array([*WINDOWS, HALF_LIFE]))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=FEATURES_FILE):
+        # None when missing or saved with other windows / half-life
+        try:
+            data = np.load(path)
+        except (OSError, ValueError):
+            return None
+        if data["config"].tolist() != [*WINDOWS, HALF_LIFE]:
+            return None
+        engine = cls()
+        engine.ring, engine.count, engine.sums = data["ring"], data["count"], data["sums"]
+        engine.ewm, engine.ewm_weight = data["ewm"], data["ewm_weight"]
+        engine.rows = int(data["rows"])
+        engine.last_date = None if np.isnat(data["last_date"]) else data["last_date"][()]
+        # Files saved without one never match, so the next sync replays
+        engine.fingerprint = str(data["fingerprint"]) if "fingerprint" in data.files else None
+        return engine
+
+
+def store_fingerprint(cols, rows):
+    # The first `rows` rows of a match store, told apart by their count and
+    # last match, so a rebuilt or replaced store is noticed
+    if not rows:
+        return ""
+    return f"{rows}:{int(cols['match_id'][rows - 1])}:{cols['date'][rows - 1]}"
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def feature_engine(store=None):
+    # Process-wide engine, brought up to date with the match store on each
+    # call (a no-op unless rows were appended) and saved when it changed
+    global _engine
+    from match_store import match_store
+    store = store or match_store
+    with _engine_lock:
+        if _engine is None:
+            _engine = FeatureEngine.load() or FeatureEngine()
+        if _engine.sync(store) and os.path.isdir(DATA_DIR):
+            _engine.save()
+        return _engine
+
+
+def store_team_stats(team_name, is_home=True, window=DEFAULT_WINDOW, comp_id=None, max_age_days=STORE_MAX_AGE_DAYS):
+    # Slider stats for a team from the local match history, or None. With
+    # comp_id the name is only matched against that competition's teams,
+    # and nothing is returned once its newest stored match is too old.
+    from match_store import match_store
+    if comp_id is None:
+        team = match_store.team_id(team_name)
+    else:
+        entry = match_store.competitions().get(str(comp_id))
+        if not entry or not entry["last_date"]:
+            return None
+        if date.fromisoformat(entry["last_date"]) < date.today() - timedelta(days=max_age_days):
+            return None
+        cols = match_store.columns()
+        rows = match_store.competition_rows(comp_id)
+        ids = np.unique(np.concatenate([cols["home"][rows], cols["away"][rows]])).tolist()
+        teams = match_store.teams()
+        by_name = {teams[i]["name"]: i for i in ids}
+        found = find_team([teams[i] for i in ids], team_name)
+        team = by_name[found["name"]] if found else None
+    return feature_engine().team_stats(team, is_home, window) if team is not None else None
@@ -0,0 +1,132 @@
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+# Club-type words that say nothing about which club it is
+STOP_TOKENS = {"fc", "afc", "cf", "sc", "ac", "as", "ssc", "club", "cd", "ud", "calcio"}
+
+# Common names -> a normalised fragment of the official API name
+ALIASES = {
+    "man utd": "manchester united",
+    "man united": "manchester united",
+    "man city": "manchester city",
+    "spurs": "tottenham hotspur",
+    "wolves": "wolverhampton wanderers",
+    "forest": "nottingham forest",
+    "villa": "aston villa",
+    "barca": "barcelona",
+    "atleti": "atletico",
+    "psg": "paris saint germain",
+    "om": "olympique de marseille",
+    "ol": "olympique lyonnais",
+    "juve": "juventus",
+    "inter": "internazionale",
+    "bayern": "bayern munchen",
+    "bvb": "borussia dortmund",
+    "gladbach": "borussia monchengladbach",
+    "leverkusen": "bayer 04 leverkusen"
+}
+
+MIN_SCORE = 0.5
+# Best match must beat the runner-up by this much to be picked on its own
+MARGIN = 0.1
+
+# ---------------- NORMALISATION ----------------
+
+def normalise(name):
+    # "1. FC Köln" -> "1 koln", "Manchester United FC" -> "manchester united"
+    text = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode().lower()
+    tokens = re.sub(r"[^a-z0-9]+", " ", text).split()
+    kept = [t for t in tokens if t not in STOP_TOKENS]
+    return " ".join(kept or tokens)
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# ---------------- INDEX ----------------
+
+class TeamIndex:
+    # Every team is reachable through several keys (normalised name, short
+    # name, TLA, aliases). Exact keys are a dict lookup; everything else
+    # goes through a trigram -> keys postings index, so a query only
+    # scores keys sharing at least one trigram with it.
+
+    def __init__(self, teams):
+        # teams: dicts with at least "name"; shortName / tla / league used when present
+        self.teams = list(teams)
+        self.keys = []          # (key, team position)
+        self.exact = {}         # key -> team positions
+        self.postings = {}      # trigram -> key positions
+        self.key_grams = []
+        for pos, team in enumerate(self.teams):
+            names = {normalise(team.get("name")), normalise(team.get("shortName")), (team.get("tla") or "").lower()}
+            full = normalise(team.get("name"))
+            names.update(alias for alias, target in ALIASES.items() if target in full)
+            for key in filter(None, names):
+                self._add(key, pos)
+
+    def _add(self, key, pos):
+        self.exact.setdefault(key, [])
+        if pos in self.exact[key]:
+            return
+        self.exact[key].append(pos)
+        k = len(self.keys)
+        self.keys.append((key, pos))
+        grams = trigrams(key)
+        self.key_grams.append(len(grams))
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(k)
+
+    def search(self, query, limit=5, league=None):
+        # Ranked [(team, score)], best first; score 1.0 is an exact key
+        q = normalise(query)
+        if not q:
+            return []
+        best = {}
+        for pos in self.exact.get(q, []):
+            best[pos] = 1.0
+
+        q_grams = trigrams(q)
+        shared = Counter(k for gram in q_grams for k in self.postings.get(gram, ()))
+        for k, n in shared.items():
+            key, pos = self.keys[k]
+            score = 2 * n / (len(q_grams) + self.key_grams[k])  # Dice coefficient
+            if key.startswith(q) or f" {q}" in key:
+                score = max(score, 0.6 + 0.35 * len(q) / len(key))  # typed the start of a word
+            if score > best.get(pos, 0):
+                best[pos] = min(score, 0.99) if key != q else 1.0
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1], self.teams[item[0]].get("name", "")))
+        if league:
+            ranked = [r for r in ranked if self.teams[r[0]].get("league") in (None, league)]
+        return [(self.teams[pos], round(score, 3)) for pos, score in ranked[:limit]]
+
+    def resolve(self, query, league=None, min_score=MIN_SCORE, margin=MARGIN):
+        # The single team a name refers to, or None when nothing is close
+        # enough or two clubs are about equally likely ("Manchester")
+        ranked = self.search(query, 2, league)
+        if not ranked or ranked[0][1] < min_score:
+            return None
+        if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < margin:
+            return None
+        return ranked[0][0]
+
+# ---------------- CACHED INDEXES ----------------
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def index_for(teams):
+    # One index per distinct team list, rebuilt only when the list changes
+    signature = tuple((t.get("id"), t.get("name")) for t in teams)
+    with _lock:
+        index = _indexes.get(signature)
+        if index is None:
+            if len(_indexes) > 32:
+                _indexes.clear()
+            index = _indexes[signature] = TeamIndex(teams)
+        return index
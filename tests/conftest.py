@@ -0,0 +1,64 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Modules live flat in the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ---------------- STUB API SERVER ----------------
+
+class StubServer:
+    # Local HTTP server answering with queued (status, headers, body)
+    # responses in order and recording (path, headers) of every request
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.requests.append((self.path, dict(self.headers)))
+                status, headers, body = stub.responses.pop(0) if stub.responses else (404, {}, None)
+                payload = b"" if body is None else json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v4"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def queue(self, status=200, body=None, **headers):
+        # Header keyword names use underscores: ETag=..., X_Requests_Available_Minute=...
+        self.responses.append((status, {k.replace("_", "-"): str(v) for k, v in headers.items()}, body))
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def client(stub):
+    from api_client import ApiClient
+    api = ApiClient(stub.url, rate_per_minute=6000, max_retries=2, timeout=5)
+    yield api
+    api.close()
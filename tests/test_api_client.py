@@ -0,0 +1,133 @@
+import pytest
+import requests
+
+import api_client
+from api_client import ApiClient, TokenBucket
+
+
+def test_sends_auth_token(stub, client):
+    stub.queue(body={"ok": 1})
+    assert client.get_json("/competitions", "secret") == {"ok": 1}
+    path, headers = stub.requests[0]
+    assert path == "/v4/competitions"
+    assert headers["X-Auth-Token"] == "secret"
+
+
+def test_retries_after_429(stub, client):
+    stub.queue(429, {"message": "slow down"}, X_RequestCounter_Reset=0)
+    stub.queue(body={"ok": 1})
+    assert client.get_json("/teams/1/matches", "k") == {"ok": 1}
+    assert client.stats["requests"] == 2
+    assert client.stats["throttled"] == 1
+
+
+def test_gives_up_after_max_retries(stub, client):
+    for _ in range(client.max_retries + 1):
+        stub.queue(429, X_RequestCounter_Reset=0)
+    assert client.get_json("/teams/1/matches", "k") is None
+    assert client.stats["requests"] == client.max_retries + 1
+
+
+def test_non_200_is_none(stub, client):
+    stub.queue(403, {"message": "forbidden"})
+    assert client.get_json("/teams/1", "k") is None
+
+
+def test_quota_headers_sync_bucket(stub, client):
+    stub.queue(body={}, X_Requests_Available_Minute=0, X_RequestCounter_Reset=30)
+    client.get_json("/competitions", "k")
+    assert client.quota[:2] == (0, 30)
+    assert client.bucket.available() == 0
+    assert client.bucket.blocked_until > 0
+
+
+def test_quota_headers_lower_tokens(stub, client):
+    stub.queue(body={}, X_Requests_Available_Minute=3, X_RequestCounter_Reset=40)
+    client.get_json("/competitions", "k")
+    assert client.bucket.available() <= 3
+
+
+def test_token_bucket_spaces_out_bursts():
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=lambda: now[0], sleep=sleep)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 1.0  # one token a second once the burst is spent
+    assert slept == [1.0]
+
+
+def test_conditional_get_etag(stub, client):
+    stub.queue(body={"teams": [1, 2, 3]}, ETag='"v1"')
+    status, data, validators, size = client.get_conditional("/competitions/2021/teams", "k")
+    assert (status, data) == (200, {"teams": [1, 2, 3]})
+    assert validators == {"etag": '"v1"'}
+
+    stub.queue(304, ETag='"v1"')
+    status, data, again, _ = client.get_conditional("/competitions/2021/teams", "k", validators, full_size=size)
+    assert status == 304 and data is None
+    assert again == validators
+    assert stub.requests[1][1]["If-None-Match"] == '"v1"'
+    assert client.stats["not_modified"] == 1
+    assert client.stats["saved_bytes"] == size
+
+
+def test_conditional_get_last_modified(stub, client):
+    stamp = "Sat, 17 Aug 2024 14:00:00 GMT"
+    stub.queue(body={}, Last_Modified=stamp)
+    _, _, validators, _ = client.get_conditional("/teams/1/matches", "k")
+    assert validators == {"last_modified": stamp}
+    stub.queue(304)
+    client.get_conditional("/teams/1/matches", "k", validators)
+    assert stub.requests[1][1]["If-Modified-Since"] == stamp
+    assert "If-None-Match" not in stub.requests[1][1]
+
+
+def test_usage_since_snapshot(stub, client):
+    stub.queue(body={"a": 1})
+    client.get_json("/x", "k")
+    before = client.usage()
+    stub.queue(body={"b": 2})
+    client.get_json("/y", "k")
+    usage = client.usage(before)
+    assert usage["requests"] == 1
+    assert usage["bytes"] == len('{"b": 2}')
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(api_client, "ERROR_BACKOFF", 0)
+
+
+def test_retries_a_dropped_connection(stub, client, no_backoff, monkeypatch):
+    real_get = client.session.get
+    calls = []
+
+    def flaky_get(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise requests.ConnectionError("connection reset")
+        return real_get(*args, **kwargs)
+
+    monkeypatch.setattr(client.session, "get", flaky_get)
+    stub.queue(body={"ok": 1})
+    assert client.get_json("/competitions", "k") == {"ok": 1}
+    assert client.stats["errors"] == 1
+    assert client.stats["requests"] == 1
+
+
+def test_unreachable_server_is_none(no_backoff):
+    api = ApiClient("http://127.0.0.1:9/v4", rate_per_minute=6000, max_retries=2, timeout=1)
+    try:
+        assert api.get("/competitions", "k") is None
+        assert api.get_json("/competitions", "k") is None
+        assert api.get_conditional("/competitions", "k")[:2] == (None, None)
+        assert api.stats["errors"] == 3 * (api.max_retries + 1)
+        assert api.stats["requests"] == 0
+    finally:
+        api.close()
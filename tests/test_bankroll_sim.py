@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from bankroll_sim import merge_pools, policy_fractions, pool_from_bets, pool_from_slate, simulate
+
+GD = {-1: 0.25, 0: 0.2, 1: 0.35, 2: 0.2}
+
+
+def planned(handicap, odds):
+    return {"fixture": "A vs B", "handicap": handicap, "odds": odds, "goal_diff": GD}
+
+
+def logged(handicap, odds, stake):
+    return {"handicap": handicap, "odds": odds, "stake": stake, "win_p": 0.55, "draw_p": 0.2, "loss_p": 0.25}
+
+
+def test_slate_prices_every_line_from_its_distribution():
+    pool = pool_from_slate([planned("AH -1.0", 2.8), planned("AH -0.5", 2.0)], stakes=[30.0, 20.0])
+    # -1.0: win by two 0.2, push on a one-goal win 0.35, loss 0.45
+    assert pool["probs"][0] == pytest.approx([0.2, 0, 0.35, 0, 0.45])
+    assert pool["ev"][0] == pytest.approx(0.2 * 1.8 - 0.45)
+    assert pool["stakes"].tolist() == [30.0, 20.0]
+    assert pool_from_slate([]) is None
+
+
+def test_open_and_planned_bets_merge():
+    open_pool, skipped = pool_from_bets([logged("AH -0.5", 2.0, 50.0), logged("AH -1.0", 2.5, 40.0)])
+    assert skipped == 1  # W/D/L alone cannot settle -1.0
+    merged = merge_pools(open_pool, pool_from_slate([planned("AH -0.75", 2.4)], stakes=[25.0]))
+    assert merged["odds"].tolist() == [2.0, 2.4]
+    assert merged["stakes"].tolist() == [50.0, 25.0]
+    assert "stakes" not in merge_pools(open_pool, pool_from_slate([planned("AH -0.75", 2.4)]))
+    assert merge_pools(None, None) is None
+
+
+def test_planned_stakes_policy():
+    pool = pool_from_slate([planned("AH -0.5", 2.2), planned("AH 0", 1.9)], stakes=[20.0, 10.0])
+    fractions = policy_fractions(pool, bankroll=1000.0)
+    assert list(fractions)[:2] == ["Current tiers", "Planned stakes"]
+    assert fractions["Planned stakes"] == pytest.approx([0.02, 0.01])
+    assert "Planned stakes" not in policy_fractions(pool)
+    results = simulate(pool, fractions, n_paths=2000, n_bets=20)
+    assert results["policy"].tolist()[1] == "Planned stakes"
+    assert results["avg_stake"][1] == pytest.approx(0.015)
+
+
+def test_missing_stake_drops_the_planned_policy():
+    pool, _ = pool_from_bets([logged("AH -0.5", 2.0, None), logged("AH 0", 1.9, 10.0)])
+    assert np.isnan(pool["stakes"][0])
+    assert "Planned stakes" not in policy_fractions(pool, bankroll=1000.0)
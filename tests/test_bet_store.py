@@ -0,0 +1,113 @@
+import csv
+
+import pytest
+
+import logic
+from bet_store import CSV_COLUMNS, BetStore
+from ledger import BankrollLedger
+
+
+def bet(handicap="AH -0.5", odds=2.0, stake=50.0, fixture=""):
+    return {"handicap": handicap, "odds": odds, "stake": stake, "ev": 0.05, "win_p": 0.5,
+            "draw_p": 0.25, "loss_p": 0.25, "fair_odds": 1.9, "fixture": fixture}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BetStore(str(tmp_path / "bets.db"))
+
+
+@pytest.fixture
+def bankroll(store, tmp_path, monkeypatch):
+    # logic's bet functions against the throwaway store and a 1000 bankroll
+    path = tmp_path / "bankroll.csv"
+    path.write_text("timestamp,amount\n")
+    ledger = BankrollLedger(str(path))
+    ledger.append(1000)
+    monkeypatch.setattr(logic, "_bet_store", store)
+    monkeypatch.setattr(logic, "_ledger", ledger)
+    return ledger
+
+# ---------------- OPEN BETS / SETTLING ----------------
+
+def test_several_bets_stay_open(store):
+    first = store.add_bet(bet(fixture="A v B"), "2024-08-17T12:00:00")
+    second = store.add_bet(bet(fixture="C v D"), "2024-08-17T12:05:00")
+    assert second > first
+    assert [b["id"] for b in store.open_bets()] == [first, second]
+    assert store.get_bet(first)["fixture"] == "A v B"
+    assert store.last_bet()["id"] == second
+
+
+def test_settle_by_id_leaves_other_bets_open(store):
+    first = store.add_bet(bet(), "2024-08-17T12:00:00")
+    second = store.add_bet(bet(), "2024-08-17T12:05:00")
+    assert store.settle(first, "WIN", 50.0)
+    assert [b["id"] for b in store.open_bets()] == [second]
+    settled = store.get_bet(first)
+    assert (settled["result"], settled["profit"], settled["settled"]) == ("WIN", 50.0, "YES")
+    assert not store.settle(first, "LOSS", -50.0)  # already settled
+    assert not store.settle(999, "WIN", 1.0)
+
+
+@pytest.mark.parametrize("result, profit", [
+    ("WIN", 60.0), ("HALF WIN", 30.0), ("PUSH", 0), ("HALF LOSS", -25.0), ("LOSS", -50.0)])
+def test_settlement_profit(result, profit):
+    assert logic.settlement_profit(50.0, 2.2, result) == pytest.approx(profit)
+
+
+def test_settle_bet_updates_the_bankroll_once(store, bankroll):
+    first = store.add_bet(bet(odds=2.2), "2024-08-17T12:00:00")
+    store.add_bet(bet(), "2024-08-17T12:05:00")
+    assert logic.settle_bet(first, "WIN") == (1060.0, None)
+    assert logic.settle_bet(first, "WIN") == (None, "This bet has already been settled")
+    assert logic.settle_bet(12345, "WIN") == (None, "Bet not found")
+    assert bankroll.balance() == 1060.0
+    assert len(logic.open_bets()) == 1
+
+
+def test_settle_last_bet_settles_the_newest(store, bankroll):
+    store.add_bet(bet(), "2024-08-17T12:00:00")
+    newest = store.add_bet(bet(), "2024-08-17T12:05:00")
+    assert logic.settle_last_bet("LOSS") == (950.0, None)
+    assert store.get_bet(newest)["settled"] == "YES"
+    assert len(store.open_bets()) == 1
+
+# ---------------- CSV IMPORT / EXPORT ----------------
+
+def write_old_csv(path):
+    # The bets.csv layout from before the store: no id or fixture columns
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        writer.writerow(["2024-08-10T10:00:00", "AH -0.5", "2.0", "40", "0.06", "0.5", "0.25", "0.25", "1.9",
+                         "WIN", "40.0", "YES"])
+        writer.writerow(["2024-08-11T10:00:00", "AH 0", "1.9", "30", "0.04", "0.45", "0.3", "0.25", "1.8",
+                         "", "", ""])
+
+
+def test_import_old_csv(store, tmp_path):
+    path = tmp_path / "bets.csv"
+    write_old_csv(path)
+    assert store.import_csv(str(path)) == 2
+    rows = store.all_bets()
+    assert [r["id"] for r in rows] == [1, 2]
+    assert rows[0]["odds"] == 2.0 and rows[0]["profit"] == 40.0
+    assert rows[1]["profit"] is None and rows[1]["fixture"] == ""
+    assert [b["id"] for b in store.open_bets()] == [2]
+
+
+def test_export_round_trip(store, tmp_path):
+    store.add_bet(bet(fixture="A v B"), "2024-08-17T12:00:00")
+    settled = store.add_bet(bet(odds=1.8), "2024-08-17T12:05:00")
+    store.settle(settled, "HALF LOSS", -25.0)
+    out = tmp_path / "export.csv"
+    assert store.export_csv(str(out)) == 2
+
+    with open(out, newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f))
+    assert header == CSV_COLUMNS + ["id", "fixture"]
+
+    copy = BetStore(str(tmp_path / "copy.db"))
+    assert copy.import_csv(str(out)) == 2
+    assert copy.all_bets() == store.all_bets()
@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from handicap import (STATES, find_best_lines, kelly_growth, parse_handicap, price_handicap, price_ladder,
+                      settlement_returns, settlement_states)
+
+GD = np.array([-1, 0, 1, 2])
+
+
+@pytest.mark.parametrize("line, expected", [
+    # 2 win, 1 half win, 0 push, -1 half loss, -2 loss at goal diff -1 / 0 / 1 / 2
+    (-0.5, [-2, -2, 2, 2]),
+    (-0.25, [-2, -1, 2, 2]),
+    (0.0, [-2, 0, 2, 2]),
+    (0.25, [-2, 1, 2, 2]),
+    (-0.75, [-2, -2, 1, 2]),
+    (-1.0, [-2, -2, 0, 2]),
+    (-1.25, [-2, -2, -1, 2]),
+    (1.0, [0, 2, 2, 2]),
+])
+def test_settlement_states(line, expected):
+    assert settlement_states([line], GD).tolist() == [expected]
+
+
+def test_settlement_states_grid_shape():
+    assert settlement_states([-0.5, 0.0, 0.5], GD).shape == (3, len(GD))
+
+
+def test_settlement_returns():
+    lines = np.array([-0.75, -0.75, -0.25, 0.0, -1.0])
+    goal_diff = np.array([1, 2, 0, 0, 1])
+    returns = settlement_returns(lines, goal_diff, 2.0)
+    assert returns.tolist() == [0.5, 1.0, -0.5, 0.0, 0.0]
+
+
+def test_price_handicap_whole_line():
+    priced = price_handicap("AH -1.0", {0: 0.5, 1: 0.25, 2: 0.25}, odds=2.0)
+    assert priced["line"] == -1.0
+    assert priced["win"] == pytest.approx(0.25)
+    assert priced["push"] == pytest.approx(0.25)
+    assert priced["loss"] == pytest.approx(0.5)
+    assert priced["ev"] == pytest.approx(-0.25)
+    assert priced["fair_odds"] == pytest.approx(3.0)
+
+
+def test_price_handicap_quarter_line():
+    priced = price_handicap(-0.25, {-1: 0.3, 0: 0.3, 1: 0.4}, odds=2.2)
+    assert priced["win"] == pytest.approx(0.4)
+    assert priced["half_loss"] == pytest.approx(0.3)
+    assert priced["loss"] == pytest.approx(0.3)
+    assert priced["ev"] == pytest.approx(0.4 * 1.2 - 0.3 - 0.15)
+
+
+def test_price_handicap_states_sum_to_one():
+    rng = np.random.default_rng(0)
+    dist = rng.dirichlet(np.ones(9))
+    gd = dict(zip(range(-4, 5), dist))
+    for line in np.arange(-12, 13) / 4.0:
+        priced = price_handicap(float(line), gd)
+        total = sum(priced[s] for s in ("win", "half_win", "push", "half_loss", "loss"))
+        assert total == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("text, line", [("AH -0.75", -0.75), ("AH 0", 0.0), ("+1.25", 1.25), (-1, -1.0)])
+def test_parse_handicap(text, line):
+    assert parse_handicap(text) == line
+
+
+@pytest.mark.parametrize("text", ["AH -0.3", "abc"])
+def test_invalid_line(text):
+    assert parse_handicap(text) is None
+    assert price_handicap(text, {0: 1.0}) is None
+
+# ---------------- BEST LINE FINDER ----------------
+
+GD_DIST = {-2: 0.1, -1: 0.15, 0: 0.25, 1: 0.3, 2: 0.2}
+
+
+def test_best_lines_ranked_by_ev_and_growth():
+    ladder = [("AH -0.5", 2.1), ("AH -1.0", 2.9), ("AH 0", 1.6), ("AH -0.25", 1.9)]
+    by_ev, by_growth = find_best_lines(GD_DIST, home_ladder=ladder)
+    assert len(by_ev) == len(by_growth) == 4
+    assert [r['ev'] for r in by_ev] == sorted((r['ev'] for r in by_ev), reverse=True)
+    assert [r['growth'] for r in by_growth] == sorted((r['growth'] for r in by_growth), reverse=True)
+    # -0.25 at 1.9: win 0.5, half loss on the draw 0.25, loss 0.25
+    assert by_ev[0]['handicap'] == "AH -0.25"
+    assert by_ev[0]['ev'] == pytest.approx(0.5 * 0.9 - 0.125 - 0.25, abs=1e-3)
+
+
+def test_away_side_settles_on_mirrored_distribution():
+    by_ev, _ = find_best_lines(GD_DIST, away_ladder=[("AH +0.5", 2.0)])
+    row = by_ev[0]
+    assert row['side'] == 'Team B'
+    assert row['win'] == pytest.approx(0.5)  # home fails to win
+    assert row['ev'] == pytest.approx(0.0, abs=1e-3)
+
+
+def test_half_line_kelly_is_the_classic_fraction():
+    _, by_growth = find_best_lines(GD_DIST, home_ladder=[("AH -0.5", 2.5)])
+    p, b = 0.5, 1.5
+    assert by_growth[0]['kelly'] == pytest.approx((p * b - (1 - p)) / b, abs=1e-4)
+
+
+def test_quarter_line_kelly_maximises_growth():
+    priced = price_ladder([-0.75], GD_DIST, [2.8])
+    fraction, growth = kelly_growth(priced)
+    assert 0 < fraction[0] < 1
+    odds = 2.8
+    returns = np.array([odds - 1, (odds - 1) / 2, 0, -0.5, -1])
+    probs = np.array([priced[name][0] for name in STATES])
+    grid = np.linspace(0, 0.99, 2000)
+    best = max(probs @ np.log1p(f * returns) for f in grid)
+    assert growth[0] == pytest.approx(best, abs=1e-6)
+
+
+def test_losing_lines_get_no_stake_and_bad_quotes_are_dropped():
+    ladder = [("AH -2.0", 1.5), ("AH -0.3", 3.0), ("AH 0", 1.0), ("AH +1.0", None)]
+    by_ev, _ = find_best_lines(GD_DIST, home_ladder=ladder)
+    assert [r['handicap'] for r in by_ev] == ["AH -2.0"]
+    assert by_ev[0]['ev'] < 0
+    assert by_ev[0]['kelly'] == 0
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from historical import FORM_WINDOW, MIN_MATCHES, STAT_KEYS, prematch_stats
+from logic import team_stats_from_matches
+
+
+def history(n, teams=8, seed=0):
+    rng = np.random.default_rng(seed)
+    home = rng.integers(0, teams, n)
+    away = (home + rng.integers(1, teams, n)) % teams
+    return pd.DataFrame({"home_team": [f"T{t}" for t in home], "away_team": [f"T{t}" for t in away],
+                         "home_goals": rng.poisson(1.5, n), "away_goals": rng.poisson(1.1, n)})
+
+
+def loop_stats(df):
+    # Reference: each side's previous FORM_WINDOW matches through the live scorer
+    past = {}
+    rows = []
+    for home, away, hg, ag in zip(df["home_team"], df["away_team"], df["home_goals"], df["away_goals"]):
+        a, b = past.get(home, [])[-FORM_WINDOW:], past.get(away, [])[-FORM_WINDOW:]
+        if len(a) >= MIN_MATCHES and len(b) >= MIN_MATCHES:
+            stats_a = team_stats_from_matches(home, a, is_home=True)
+            stats_b = team_stats_from_matches(away, b, is_home=False)
+            rows.append([stats_a[k] for k in STAT_KEYS] + [stats_b[k] for k in STAT_KEYS])
+        else:
+            rows.append([np.nan] * 2 * len(STAT_KEYS))
+        match = {"homeTeam": {"id": home}, "awayTeam": {"id": away},
+                 "score": {"fullTime": {"home": int(hg), "away": int(ag)}}}
+        past.setdefault(home, []).append(match)
+        past.setdefault(away, []).append(match)
+    return np.array(rows)
+
+
+@pytest.mark.parametrize("n, teams", [(400, 8), (300, 40)])
+def test_prematch_stats_match_the_live_scorer(n, teams):
+    df = history(n, teams)
+    stats = prematch_stats(df)
+    expected = loop_stats(df)
+    np.testing.assert_array_equal(stats.drop(columns="usable").to_numpy(), expected)
+    assert stats["usable"].tolist() == (~np.isnan(expected).any(axis=1)).tolist()
+
+
+def test_first_matches_are_not_usable():
+    df = history(12, teams=2)  # the same two clubs every match
+    usable = prematch_stats(df)["usable"].tolist()
+    assert usable == [False] * MIN_MATCHES + [True] * (len(df) - MIN_MATCHES)
+
+
+def test_empty_history():
+    stats = prematch_stats(history(0))
+    assert len(stats) == 0
+    assert list(stats.columns[-1:]) == ["usable"]
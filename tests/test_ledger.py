@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from ledger import BankrollLedger
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    path = tmp_path / "bankroll.csv"
+    path.write_text("timestamp,amount\n")
+    ledger = BankrollLedger(str(path))
+    for amount in (5000, -200, 150.5):
+        ledger.append(amount)
+    return ledger
+
+
+def edit_checkpoint(ledger, **changes):
+    with open(ledger.checkpoint_path) as f:
+        checkpoint = json.load(f)
+    checkpoint.update(changes)
+    with open(ledger.checkpoint_path, "w") as f:
+        json.dump(checkpoint, f)
+
+
+def test_balance_and_verify(ledger):
+    assert ledger.balance() == 4950.5
+    assert ledger.verify() == (True, 4950.5, 4950.5)
+
+
+def test_verify_without_checkpoint(ledger):
+    assert ledger.verify() == (False, 4950.5, None)
+
+
+def test_checkpoint_behind_the_log_is_consistent(ledger):
+    ledger.balance()
+    ledger.append(49.5)
+    ok, scanned, checkpointed = ledger.verify()
+    assert ok
+    assert (scanned, checkpointed) == (5000.0, 4950.5)
+
+
+def test_corrupted_balance_is_reported_not_repaired(ledger):
+    ledger.balance()
+    edit_checkpoint(ledger, balance=9999.0)
+    with open(ledger.checkpoint_path) as f:
+        before = f.read()
+    assert ledger.verify() == (False, 4950.5, 9999.0)
+    with open(ledger.checkpoint_path) as f:
+        assert f.read() == before  # verify leaves the checkpoint alone
+
+
+def test_corrupted_checkpoint_behind_the_log(ledger):
+    ledger.balance()
+    edit_checkpoint(ledger, balance=100.0)
+    ledger.append(10)
+    ok, scanned, checkpointed = ledger.verify()
+    assert not ok
+    assert (scanned, checkpointed) == (4960.5, 100.0)
+
+
+def test_rewritten_log_fails_the_guard(ledger):
+    ledger.balance()
+    with open(ledger.path) as f:
+        text = f.read()
+    with open(ledger.path, "w") as f:
+        f.write(text.replace("-200", "-300"))
+    ok, scanned, _ = ledger.verify()
+    assert not ok
+    assert scanned == 4850.5
+
+
+def test_truncated_log(ledger):
+    ledger.balance()
+    with open(ledger.path) as f:
+        lines = f.readlines()
+    with open(ledger.path, "w") as f:
+        f.writelines(lines[:-1])
+    assert not ledger.verify()[0]
+
+
+def test_repair_rebuilds_from_the_log(ledger):
+    ledger.balance()
+    edit_checkpoint(ledger, balance=1.0, rows=1)
+    assert ledger.repair() == 4950.5
+    assert ledger.repairs == 1
+    assert ledger.verify() == (True, 4950.5, 4950.5)
+    assert ledger.balance() == 4950.5
+
+
+def test_balance_rebuilds_a_mismatched_guard(ledger):
+    ledger.balance()
+    edit_checkpoint(ledger, guard="0" * 40)
+    ledger.append(-0.5)  # the guard is only read when the log has grown
+    assert ledger.balance() == 4950.0
+    assert ledger.repairs == 1
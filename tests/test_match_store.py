@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from match_store import COLUMNS, MatchStore
+
+TEAMS = {1: "Arsenal FC", 2: "Chelsea FC", 3: "Liverpool FC", 4: "Everton FC"}
+
+
+def match(match_id, date, home, away, score=(1, 0)):
+    return {"id": match_id, "utcDate": f"{date}T15:00:00Z",
+            "homeTeam": {"id": home, "name": TEAMS[home]}, "awayTeam": {"id": away, "name": TEAMS[away]},
+            "score": {"fullTime": {"home": score[0], "away": score[1]}}}
+
+
+ROUND_ONE = [match(11, "2024-08-17", 1, 2, (2, 1)), match(12, "2024-08-17", 3, 4, (0, 0))]
+ROUND_TWO = [match(13, "2024-08-24", 2, 3, (1, 3)), match(14, "2024-08-24", 4, 1, (2, 2))]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MatchStore(str(tmp_path / "matches"))
+
+
+def test_empty_store(store):
+    assert store.rows() == 0
+    assert len(store.team_rows(0)) == 0
+    assert len(store.competition_rows(2021)) == 0
+
+
+def test_append_skips_stored_and_unplayed_matches(store):
+    assert store.append(ROUND_ONE, 2021) == 2
+    unplayed = match(15, "2024-08-31", 1, 3)
+    unplayed["score"]["fullTime"] = {"home": None, "away": None}
+    assert store.append(ROUND_ONE + ROUND_TWO + [unplayed], 2021) == 2
+    assert store.append(ROUND_TWO, 2021) == 0
+    assert store.rows() == 4
+    assert store.columns()["match_id"].tolist() == [11, 12, 13, 14]
+    assert store.competitions()["2021"]["last_date"] == "2024-08-24"
+
+
+def test_reopen_sees_the_same_matches(store):
+    store.append(ROUND_ONE + ROUND_TWO, 2021)
+    reopened = MatchStore(store.root)
+    assert reopened.rows() == 4
+    assert isinstance(reopened.columns()["home_goals"], np.memmap)
+    for name in COLUMNS:
+        assert reopened.columns()[name].tolist() == store.columns()[name].tolist()
+    assert [t["name"] for t in reopened.teams()] == [t["name"] for t in store.teams()]
+
+
+def test_readers_pick_up_appends_from_another_instance(store):
+    store.append(ROUND_ONE, 2021)
+    assert store.rows() == 2
+    MatchStore(store.root).append(ROUND_TWO, 2021)
+    assert store.rows() == 4
+
+
+def test_team_matches_in_date_order(store):
+    store.append(ROUND_TWO, 2021)
+    store.append(ROUND_ONE, 2021)
+    arsenal = store.team_id("Arsenal")
+    played = store.team_matches(arsenal)
+    assert played["match_id"].tolist() == [11, 14]
+    assert played["date"].astype(str).tolist() == ["2024-08-17", "2024-08-24"]
+    assert store.team_matches(arsenal, last=1)["match_id"].tolist() == [14]
+
+
+def test_competitions_are_kept_apart(store):
+    store.append(ROUND_ONE, 2021)
+    store.append([match(21, "2024-08-20", 1, 4)], 2001)
+    assert store.competition_matches(2021)["match_id"].tolist() == [11, 12]
+    assert store.competition_matches(2001)["match_id"].tolist() == [21]
+    store.append(ROUND_TWO, 2021)
+    assert store.competition_matches(2021, since="2024-08-20")["match_id"].tolist() == [13, 14]
+
+
+def test_torn_tail_is_invisible_and_trimmed(store):
+    store.append(ROUND_ONE, 2021)
+    # A crashed append: bytes written to one column, meta.json never updated
+    with open(store._path("match_id.bin"), "ab") as f:
+        f.write(np.array([99, 98], dtype=COLUMNS["match_id"]).tobytes())
+    reader = MatchStore(store.root)
+    assert reader.rows() == 2
+    assert reader.columns()["match_id"].tolist() == [11, 12]
+
+    store.append(ROUND_TWO, 2021)
+    assert MatchStore(store.root).columns()["match_id"].tolist() == [11, 12, 13, 14]
+
+
+def test_frame_and_raw_matches(store):
+    store.append(ROUND_ONE + ROUND_TWO, 2021)
+    df = store.frame()
+    assert list(df.columns) == ["date", "competition", "home_team", "away_team", "home_goals", "away_goals", "match_id"]
+    assert df["home_team"].tolist() == ["Arsenal FC", "Liverpool FC", "Chelsea FC", "Everton FC"]
+    raw = store.raw_matches(2021, exclude_ids=[11, 12])
+    assert [m["id"] for m in raw] == [13, 14]
+    assert raw[0]["homeTeam"]["name"] == "Chelsea FC"
+    assert raw[0]["score"]["fullTime"] == {"home": 1, "away": 3}
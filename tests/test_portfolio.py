@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from portfolio import (MAX_BET_FRACTION, MAX_EXPOSURE, exact_scenarios, expected_log_growth, optimize,
+                       portfolio_stakes, project, scenario_returns)
+
+# Home side wins 55% of the time, by one goal or two
+EDGE = {-1: 0.25, 0: 0.2, 1: 0.35, 2: 0.2}
+
+
+def bet(fixture, line=-0.5, odds=2.0, goal_diff=EDGE):
+    return {"fixture": fixture, "line": line, "odds": odds, "goal_diff": goal_diff}
+
+
+def test_single_bet_is_the_kelly_fraction():
+    returns, weights = exact_scenarios([bet("A v B")])
+    result = optimize(returns, weights, cap=1.0, total=1.0)
+    assert result["fractions"][0] == pytest.approx(0.55 - 0.45 / 1.0, abs=1e-5)
+    assert result["gap"] < 1e-7
+
+
+def test_per_bet_cap_binds():
+    returns, weights = exact_scenarios([bet("A v B")])
+    assert optimize(returns, weights)["fractions"][0] == pytest.approx(MAX_BET_FRACTION)
+
+
+def test_exposure_cap_over_many_bets():
+    result = portfolio_stakes([bet(f"match {i}", odds=2.3) for i in range(10)], n_scenarios=5000)
+    f = result["fractions"]
+    assert f.sum() <= MAX_EXPOSURE + 1e-9
+    assert f.max() <= MAX_BET_FRACTION + 1e-9
+    assert result["exposure"] == pytest.approx(MAX_EXPOSURE)
+
+
+def test_losing_bet_gets_nothing():
+    returns, weights = exact_scenarios([bet("A v B"), bet("C v D", odds=1.6)])
+    fractions = optimize(returns, weights, cap=1.0, total=1.0)["fractions"]
+    assert fractions[0] > 0
+    assert fractions[1] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_lines_on_one_fixture_share_their_outcome():
+    # The same bet twice on one match is one bet split in two; on two
+    # independent matches the combined stake grows
+    same = exact_scenarios([bet("A v B"), bet("A v B")])
+    apart = exact_scenarios([bet("A v B"), bet("C v D")])
+    assert len(same[1]) == len(EDGE)
+    together = optimize(*same, cap=1.0, total=1.0)["fractions"].sum()
+    separate = optimize(*apart, cap=1.0, total=1.0)["fractions"].sum()
+    assert together == pytest.approx(0.1, abs=1e-5)
+    assert separate > together + 0.05
+
+
+def test_optimum_beats_a_grid_search():
+    bets = [bet("A v B", line=-0.25, odds=1.95), bet("A v B", line=-1.0, odds=2.9),
+            bet("C v D", line=0.0, odds=1.8)]
+    returns, weights = exact_scenarios(bets)
+    result = optimize(returns, weights, cap=0.2, total=0.3)
+    grid = np.linspace(0, 0.2, 21)
+    best = max(expected_log_growth(np.array(f), returns, weights)
+               for f in np.array(np.meshgrid(grid, grid, grid)).reshape(3, -1).T if sum(f) <= 0.3)
+    assert result["growth"] >= best - 1e-9
+
+
+def test_sampled_solution_is_close_to_the_exact_one():
+    bets = [bet("A v B", odds=2.1), bet("C v D", line=-0.75, odds=2.5), bet("E v F", line=0.25, odds=1.7)]
+    exact = optimize(*exact_scenarios(bets), cap=0.2, total=0.3)["fractions"]
+    sampled = portfolio_stakes(bets, cap=0.2, total=0.3, n_scenarios=50_000)["fractions"]
+    assert sampled == pytest.approx(exact, abs=0.02)
+
+
+def test_project_onto_the_capped_simplex():
+    f = project(np.array([0.2, 0.1, 0.08, -0.3]), cap=0.1, total=0.15)
+    assert f.sum() == pytest.approx(0.15)
+    assert f.min() >= 0 and f.max() <= 0.1 + 1e-12
+    assert f[3] == 0
+    assert project(np.array([0.01, 0.02]), cap=0.1, total=0.15) == pytest.approx([0.01, 0.02])
+
+
+def test_fixture_zero_is_a_fixture():
+    returns = scenario_returns([bet(0), bet(0)], n_scenarios=2000)
+    np.testing.assert_array_equal(returns[:, 0], returns[:, 1])
+    assert len(exact_scenarios([bet(0), bet(0)])[1]) == len(EDGE)
+
+
+def test_bets_without_a_fixture_stand_alone():
+    # Bet 1 has no fixture; it must not share draws with fixture id 1
+    bets = [bet(1), {"line": -0.5, "odds": 2.0, "goal_diff": EDGE}, bet(None)]
+    returns, weights = exact_scenarios(bets)
+    assert len(weights) == len(EDGE) ** 3
+    sampled = scenario_returns(bets, n_scenarios=2000)
+    assert not np.array_equal(sampled[:, 0], sampled[:, 1])
+    assert not np.array_equal(sampled[:, 1], sampled[:, 2])
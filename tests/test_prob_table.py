@@ -0,0 +1,75 @@
+import json
+
+import numpy as np
+import pytest
+
+import prob_table
+from logic import match_distribution, match_probabilities
+
+STEP = 0.05
+
+
+@pytest.fixture
+def table(tmp_path, monkeypatch):
+    # A coarse table built into a throwaway directory
+    monkeypatch.setattr(prob_table, "TABLE_META", str(tmp_path / "prob_table.json"))
+    monkeypatch.setattr(prob_table, "TABLE_WDL", str(tmp_path / "prob_table_wdl.npy"))
+    monkeypatch.setattr(prob_table, "TABLE_GD", str(tmp_path / "prob_table_gd.npy"))
+    prob_table._table.clear()
+    meta = prob_table.build_table(STEP)
+    yield meta
+    prob_table._table.clear()
+
+
+def test_grid_points_match_the_engine(table):
+    ega = table["low"] + 7 * STEP
+    egb = table["low"] + 12 * STEP
+    probs, goal_diff = prob_table.lookup(ega, egb)
+    exact = match_probabilities(ega, egb, max_goals=table["max_goals"])
+    for key in ('win', 'draw', 'loss'):
+        assert probs[key] == pytest.approx(exact[key], abs=1e-6)
+
+
+@pytest.mark.parametrize("ega, egb", [(1.23, 2.12), (2.018, 1.577), (1.49, 1.31)])
+def test_interpolation_is_close_to_the_exact_result(table, ega, egb):
+    probs, goal_diff = prob_table.lookup(ega, egb)
+    exact = match_probabilities(ega, egb)
+    exact_gd = match_distribution(ega, egb)
+    for key in ('win', 'draw', 'loss'):
+        assert probs[key] == pytest.approx(exact[key], abs=1e-3)
+    for gd, p in goal_diff.items():
+        assert p == pytest.approx(exact_gd.get(gd, 0.0), abs=1e-3)
+    assert sum(goal_diff.values()) == pytest.approx(1.0, abs=1e-5)
+
+
+def test_interpolation_error_shrinks_with_the_step(table):
+    ega, egb = 1.913, 2.087
+    exact = match_probabilities(ega, egb)['win']
+    coarse = abs(prob_table.lookup(ega, egb)[0]['win'] - exact)
+    prob_table.build_table(STEP / 5)
+    fine = abs(prob_table.lookup(ega, egb)[0]['win'] - exact)
+    assert fine < coarse
+
+
+def test_outside_the_grid_falls_back_to_the_engine(table):
+    high = prob_table.model_bounds()[1]
+    assert prob_table.lookup(high + 0.5, 1.0) is None
+    probs, goal_diff = prob_table.probabilities(high + 0.5, 1.0)
+    assert probs == match_probabilities(high + 0.5, 1.0)
+
+
+def test_stale_table_is_ignored(table):
+    with open(prob_table.TABLE_META) as f:
+        meta = json.load(f)
+    meta["fingerprint"] = "0" * 40
+    with open(prob_table.TABLE_META, "w") as f:
+        json.dump(meta, f)
+    prob_table._table.clear()
+    assert prob_table.load_table() is None
+    assert prob_table.lookup(1.0, 1.0) is None
+
+
+def test_table_files_are_memory_mapped(table):
+    loaded = prob_table.load_table()
+    assert isinstance(loaded["wdl"], np.memmap)
+    assert loaded["wdl"].shape == (table["size"], table["size"], 3)
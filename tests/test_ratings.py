@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+import ratings
+
+ATTACK = np.array([0.35, 0.15, 0.0, -0.1, -0.15, -0.25])
+DEFENCE = np.array([0.3, 0.1, 0.05, -0.05, -0.15, -0.25])
+HOME, BASE = 0.25, 0.1
+
+
+def simulate(seasons=25, seed=3):
+    # Double round robin per season, scores drawn from the model itself
+    rng = np.random.default_rng(seed)
+    n = len(ATTACK)
+    matches = []
+    match_id = 0
+    for season in range(seasons):
+        day = np.datetime64("2000-08-01") + 365 * season
+        for h in range(n):
+            for a in range(n):
+                if h == a:
+                    continue
+                lam = np.exp(BASE + HOME + ATTACK[h] - DEFENCE[a])
+                mu = np.exp(BASE + ATTACK[a] - DEFENCE[h])
+                match_id += 1
+                matches.append({"id": match_id, "utcDate": f"{day}T15:00:00Z",
+                                "homeTeam": {"id": 100 + h, "name": f"Team {h}"},
+                                "awayTeam": {"id": 100 + a, "name": f"Team {a}"},
+                                "score": {"fullTime": {"home": int(rng.poisson(lam)), "away": int(rng.poisson(mu))}}})
+                day += 1
+    return matches
+
+
+@pytest.fixture
+def ratings_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ratings, "RATINGS_DIR", str(tmp_path / "ratings"))
+    monkeypatch.setattr(ratings, "XI", 0.0)  # no time decay: every season counts the same
+
+
+def test_gradient_matches_finite_differences():
+    rng = np.random.default_rng(0)
+    n = 4
+    hi, ai = rng.integers(0, n, 60), rng.integers(0, n, 60)
+    x, y = rng.poisson(1.4, 60).astype(float), rng.poisson(1.1, 60).astype(float)
+    w = rng.uniform(0.5, 1.0, 60)
+    theta = rng.normal(0, 0.2, 3 + 2 * n)
+    theta[2] = 0.05
+    _, grad, _ = ratings._loglik_grad(theta, hi, ai, x, y, w, n)
+    eps = 1e-6
+    for k in range(len(theta)):
+        up, down = theta.copy(), theta.copy()
+        up[k] += eps
+        down[k] -= eps
+        numeric = (ratings._loglik_grad(up, hi, ai, x, y, w, n)[0]
+                   - ratings._loglik_grad(down, hi, ai, x, y, w, n)[0]) / (2 * eps)
+        assert grad[k] == pytest.approx(numeric, abs=1e-4)
+
+
+def test_fit_recovers_the_simulated_ratings(ratings_dir):
+    state, added = ratings.update_ratings("Premier League", simulate(seasons=60))
+    assert added == 60 * 30
+    assert state["iterations"] < 100
+    theta = np.array(state["theta"])
+    n = len(ATTACK)
+    assert theta[1] == pytest.approx(HOME, abs=0.05)
+    assert abs(theta[2]) < ratings.RHO_LIMIT
+    # Attack and defence are only identified up to a shared shift
+    attack, defence = theta[3:3 + n], theta[3 + n:]
+    assert attack - attack.mean() == pytest.approx(ATTACK - ATTACK.mean(), abs=0.06)
+    assert defence - defence.mean() == pytest.approx(DEFENCE - DEFENCE.mean(), abs=0.06)
+
+
+def test_incremental_update_matches_a_full_refit(ratings_dir):
+    matches = simulate()
+    ratings.update_ratings("Premier League", matches[:600])
+    state, added = ratings.update_ratings("Premier League", matches)
+    assert added == len(matches) - 600
+    full, _ = ratings.update_ratings("Premier League", matches, force=True)
+    assert state["theta"] == pytest.approx(full["theta"], abs=1e-4)
+
+
+def test_unchanged_data_is_a_no_op(ratings_dir):
+    matches = simulate(seasons=5)
+    state, _ = ratings.update_ratings("Premier League", matches)
+    again, added = ratings.update_ratings("Premier League", matches)
+    assert added == 0
+    assert again["fitted_at"] == state["fitted_at"]
+
+
+def test_unplayed_matches_are_skipped(ratings_dir):
+    matches = simulate(seasons=5)
+    matches[-1]["score"]["fullTime"] = {"home": None, "away": None}
+    _, added = ratings.update_ratings("Premier League", matches)
+    assert added == len(matches) - 1
+
+
+def test_predict_goals(ratings_dir):
+    state, _ = ratings.update_ratings("Premier League", simulate())
+    ega, egb, rho = ratings.predict_goals(state, "Team 0", "Team 5")
+    n = len(state["teams"])
+    theta = state["theta"]
+    assert ega == pytest.approx(np.exp(theta[0] + theta[1] + theta[3] - theta[3 + n + 5]))
+    assert ega > egb
+    assert rho == theta[2]
+    assert ratings.predict_goals(state, "Team 0", "Nobody FC") is None
+    assert ratings.predict_goals(None, "Team 0", "Team 5") is None
@@ -0,0 +1,105 @@
+import math
+
+import numpy as np
+import pytest
+
+from score_matrix import (MAX_GOALS_LIMIT, MIN_GOALS, TAIL_MASS, adaptive_max_goals,
+                          goal_difference_distribution, outcome_probabilities, price_fixtures,
+                          score_matrix, total_goals_distribution)
+
+
+def poisson(k, lam):
+    return math.exp(-lam) * lam ** k / math.factorial(k)
+
+
+def brute_force(ega, egb, goals=40):
+    win = draw = loss = 0.0
+    for i in range(goals):
+        for j in range(goals):
+            p = poisson(i, ega) * poisson(j, egb)
+            if i > j:
+                win += p
+            elif i == j:
+                draw += p
+            else:
+                loss += p
+    return win, draw, loss
+
+# ---------------- CUTOFF ----------------
+
+@pytest.mark.parametrize("lam", [0.3, 1.0, 1.6, 2.8, 4.5])
+def test_cutoff_keeps_tail_below_tail_mass(lam):
+    g = adaptive_max_goals(lam)
+    tail = 1 - sum(poisson(k, lam) for k in range(g + 1))
+    assert tail < TAIL_MASS
+    assert g >= MIN_GOALS
+
+
+def test_cutoff_is_the_smallest_that_works():
+    lam = 2.8
+    g = adaptive_max_goals(lam)
+    assert 1 - sum(poisson(k, lam) for k in range(g)) > TAIL_MASS
+
+
+def test_cutoff_bounds():
+    assert adaptive_max_goals(0) == MIN_GOALS
+    assert adaptive_max_goals(0.01) == MIN_GOALS
+    assert adaptive_max_goals(50) == MAX_GOALS_LIMIT
+
+# ---------------- MATRIX MASS ----------------
+
+def test_matrix_mass_and_shape():
+    matrix = score_matrix([0.8, 1.5, 3.2], [1.1, 0.9, 2.5])
+    g = adaptive_max_goals(3.2)
+    assert matrix.shape == (3, g + 1, g + 1)
+    assert matrix.sum(axis=(1, 2)) == pytest.approx(np.ones(3))
+
+
+def test_matrix_cells_are_poisson_products():
+    matrix = score_matrix(1.4, 0.9)[0]
+    assert matrix[2, 1] == pytest.approx(poisson(2, 1.4) * poisson(1, 0.9), rel=1e-9)
+    assert matrix[0, 0] == pytest.approx(math.exp(-2.3), rel=1e-9)
+
+
+@pytest.mark.parametrize("ega, egb", [(1.4, 1.1), (0.5, 2.7), (3.5, 0.6)])
+def test_outcomes_match_brute_force(ega, egb):
+    win, draw, loss = outcome_probabilities(score_matrix(ega, egb))
+    assert (win[0], draw[0], loss[0]) == pytest.approx(brute_force(ega, egb), abs=1e-9)
+
+
+def test_distributions_agree_with_outcomes():
+    matrix = score_matrix([1.2, 2.0], [0.7, 1.9])
+    win, draw, loss = outcome_probabilities(matrix)
+    values, gd = goal_difference_distribution(matrix)
+    assert gd[:, values > 0].sum(axis=1) == pytest.approx(win)
+    assert gd[:, values == 0][:, 0] == pytest.approx(draw)
+    assert gd[:, values < 0].sum(axis=1) == pytest.approx(loss)
+    _, totals = total_goals_distribution(matrix)
+    assert totals.sum(axis=1) == pytest.approx(np.ones(2))
+
+
+def test_fixed_cutoff_is_renormalised():
+    probs = price_fixtures(1.5, 1.2, max_goals=5)
+    assert probs['max_goals'] == 5
+    assert probs['win'] + probs['draw'] + probs['loss'] == pytest.approx(1.0)
+
+# ---------------- BATCH PRICING ----------------
+
+def test_array_pricing_matches_scalar_calls():
+    ega = np.array([0.6, 1.3, 2.2, 3.1])
+    egb = np.array([1.8, 1.0, 0.9, 2.4])
+    batch = price_fixtures(ega, egb)
+    for i in range(len(ega)):
+        single = price_fixtures(ega[i], egb[i], max_goals=batch['max_goals'])
+        assert batch['win'][i] == pytest.approx(single['win'])
+        assert batch['goal_diff'][i] == pytest.approx(single['goal_diff'])
+        assert batch['expected_total'][i] == pytest.approx(ega[i] + egb[i], abs=1e-6)
+
+
+def test_match_probabilities_keeps_dict_return():
+    import logic
+    probs = logic.match_probabilities(1.6, 1.1)
+    assert set(probs) == {'win', 'draw', 'loss'}
+    assert sum(probs.values()) == pytest.approx(1.0)
+    dist = logic.match_distribution(1.6, 1.1)
+    assert sum(v for gd, v in dist.items() if gd > 0) == pytest.approx(probs['win'])
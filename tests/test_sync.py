@@ -0,0 +1,118 @@
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import logic
+from api_client import ApiClient
+from cache import ResponseCache
+
+
+def match(match_id, day, home=1, away=2, score=(1, 0)):
+    return {"id": match_id, "utcDate": f"2024-08-{day:02d}T15:00:00Z", "homeTeam": {"id": home},
+            "awayTeam": {"id": away}, "score": {"fullTime": {"home": score[0], "away": score[1]}}}
+
+
+@pytest.fixture
+def api(stub, tmp_path, monkeypatch):
+    # logic's fetchers against the stub server and a throwaway cache
+    cache = ResponseCache(str(tmp_path / "cache"))
+    client = ApiClient(stub.url, rate_per_minute=6000)
+    monkeypatch.setattr(logic, "response_cache", cache)
+    monkeypatch.setattr(logic, "get_client", lambda: client)
+    yield cache, client
+    client.close()
+
+
+def query(path):
+    return {k: v[0] for k, v in parse_qs(urlparse(path).query).items()}
+
+# ---------------- DELTA PATH / MERGE ----------------
+
+def test_delta_path_drops_limit_and_keeps_filters():
+    path = logic.delta_path("/teams/7/matches?status=FINISHED&limit=5", "2024-08-10", "2024-08-20")
+    assert path.startswith("/teams/7/matches?")
+    assert query(path) == {"status": "FINISHED", "dateFrom": "2024-08-10", "dateTo": "2024-08-20"}
+
+
+def test_delta_path_replaces_previous_window():
+    once = logic.delta_path("/competitions/2021/matches?status=FINISHED", "2024-08-01", "2024-08-05")
+    twice = logic.delta_path(once, "2024-08-05", "2024-08-09")
+    assert query(twice) == {"status": "FINISHED", "dateFrom": "2024-08-05", "dateTo": "2024-08-09"}
+
+
+def test_merge_matches_dedupes_sorts_and_trims():
+    stored = [match(3, 10), match(1, 3), match(2, 6)]
+    new = [match(3, 10, score=(2, 2)), match(4, 14)]
+    merged = logic.merge_matches(stored, new)
+    assert [m["id"] for m in merged] == [1, 2, 3, 4]
+    assert merged[2]["score"]["fullTime"] == {"home": 2, "away": 2}  # newer copy wins
+    assert [m["id"] for m in logic.merge_matches(stored, new, keep=2)] == [3, 4]
+
+
+def test_merge_matches_nothing_new():
+    stored = [match(1, 3), match(2, 6)]
+    assert logic.merge_matches(stored, []) == stored
+
+# ---------------- SYNCED FETCHES ----------------
+
+def test_synced_matches_fetches_only_new_matches(stub, api):
+    cache, _ = api
+    path = logic.team_matches_path(7)
+    stub.queue(body={"matches": [match(i, 2 * i, home=7) for i in range(1, 6)]})
+    first = logic.synced_matches(path, "k", 60, keep=5)
+    assert len(first["matches"]) == 5
+    assert stub.requests[0][0] == "/v4" + path
+
+    # Expired: only matches from the newest stored match day are asked for
+    stub.queue(body={"matches": [match(5, 10, home=7), match(6, 12, home=7)]})
+    second = logic.synced_matches(path, "k", 0, keep=5)
+    params = query(stub.requests[1][0])
+    assert params["dateFrom"] == "2024-08-10"
+    assert params["dateTo"] == datetime.now(timezone.utc).date().isoformat()
+    assert "limit" not in params
+    assert [m["id"] for m in second["matches"]] == [2, 3, 4, 5, 6]
+    assert cache.peek(path)["value"] == second  # merged in place
+
+
+def test_synced_matches_304_keeps_stored_copy(stub, api):
+    path = "/competitions/2021/matches?status=FINISHED"
+    stub.queue(body={"matches": [match(1, 3)]})
+    logic.synced_matches(path, "k", 60)
+    stub.queue(body={"matches": []}, ETag='"w1"')
+    logic.synced_matches(path, "k", 0)
+    stub.queue(304)
+    again = logic.synced_matches(path, "k", 0)
+    assert stub.requests[2][1]["If-None-Match"] == '"w1"'
+    assert [m["id"] for m in again["matches"]] == [1]
+
+
+def test_synced_matches_falls_back_to_full_fetch(stub, api):
+    path = "/competitions/2021/matches?status=FINISHED"
+    stub.queue(body={"matches": [match(1, 3)]})
+    logic.synced_matches(path, "k", 60)
+    stub.queue(400, {"message": "dateFrom not supported"})
+    stub.queue(body={"matches": [match(1, 3), match(2, 9)]})
+    data = logic.synced_matches(path, "k", 0)
+    assert stub.requests[2][0] == "/v4" + path
+    assert [m["id"] for m in data["matches"]] == [1, 2]
+
+
+def test_cached_api_get_revalidates_expired_copy(stub, api):
+    cache, client = api
+    path = "/competitions/2021/teams"
+    stub.queue(body={"teams": [{"id": 1}]}, ETag='"t1"')
+    assert logic.cached_api_get(path, "k", 60) == {"teams": [{"id": 1}]}
+    assert logic.cached_api_get(path, "k", 60) == {"teams": [{"id": 1}]}
+    assert len(stub.requests) == 1  # served from the cache
+
+    stub.queue(304)
+    assert logic.cached_api_get(path, "k", 0) == {"teams": [{"id": 1}]}
+    assert stub.requests[1][1]["If-None-Match"] == '"t1"'
+    assert cache.age(path) < 5  # TTL restarted
+    assert client.stats["not_modified"] == 1
+
+
+def test_cached_api_get_failure_returns_none(stub, api):
+    stub.queue(500)
+    assert logic.cached_api_get("/competitions/2021/teams", "k", 60) is None
@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+from match_store import MatchStore
+from team_features import FeatureEngine, WINDOWS
+
+
+def season(start_id, year, n_teams=6, seed=0):
+    # Double round robin, two matches a day, random scores
+    rng = np.random.default_rng(seed)
+    matches = []
+    day = np.datetime64(f"{year}-08-01")
+    match_id = start_id
+    for h in range(n_teams):
+        for a in range(n_teams):
+            if h != a:
+                goals = rng.poisson(1.3, 2)
+                matches.append({"id": match_id, "utcDate": f"{day + (match_id - start_id) // 2}T15:00:00Z",
+                                "homeTeam": {"id": 100 + h, "name": f"Team {h}"},
+                                "awayTeam": {"id": 100 + a, "name": f"Team {a}"},
+                                "score": {"fullTime": {"home": int(goals[0]), "away": int(goals[1])}}})
+                match_id += 1
+    return matches
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MatchStore(str(tmp_path / "matches"))
+
+
+def rebuilt(store):
+    engine = FeatureEngine()
+    engine.sync_from(store.columns(), np.arange(store.rows()))
+    return engine
+
+
+def assert_same(engine, other):
+    assert engine.rows == other.rows
+    assert engine.last_date == other.last_date
+    np.testing.assert_array_equal(engine.count, other.count)
+    np.testing.assert_allclose(engine.sums, other.sums)
+    np.testing.assert_allclose(engine.ewm, other.ewm)
+    np.testing.assert_allclose(engine.ewm_weight, other.ewm_weight)
+
+
+def test_incremental_sync_equals_full_rebuild(store):
+    matches = season(1, 2023) + season(1000, 2024, seed=1)
+    engine = FeatureEngine()
+    for start in range(0, len(matches), 7):
+        store.append(matches[start:start + 7], 2021)
+        engine.sync(store)
+    assert engine.sync(store) == 0
+    assert_same(engine, rebuilt(store))
+
+
+def test_backfilled_season_replays(store):
+    engine = FeatureEngine()
+    store.append(season(1000, 2024, seed=1), 2021)
+    engine.sync(store)
+    store.append(season(1, 2023), 2021)  # older matches arrive later
+    assert engine.sync(store) == store.rows()
+    expected = FeatureEngine()
+    ordered = MatchStore(store.root + "_ordered")
+    ordered.append(season(1, 2023) + season(1000, 2024, seed=1), 2021)
+    expected.sync(ordered)
+    # Same matches replayed in date order; store row numbers differ
+    np.testing.assert_allclose(engine.sums, expected.sums)
+    np.testing.assert_allclose(engine.ewm, expected.ewm)
+
+
+def test_window_sums_match_a_direct_rolling_sum(store):
+    store.append(season(1, 2023) + season(1000, 2024, seed=1), 2021)
+    engine = rebuilt(store)
+    team = store.team_id("Team 2")
+    played = store.team_matches(team)
+    home = played["home"] == team
+    scored = np.where(home, played["home_goals"], played["away_goals"])
+    conceded = np.where(home, played["away_goals"], played["home_goals"])
+    for w, window in enumerate(WINDOWS):
+        assert engine.sums[w, team, 0, 1] == scored[-window:].sum()
+        assert engine.sums[w, team, 0, 2] == conceded[-window:].sum()
+        assert engine.sums[w, team, 1, 1] == scored[home][-window:].sum()
+    agg = engine.aggregates(5)
+    assert agg["scored"][team, 0] == pytest.approx(scored[-5:].mean())
+
+
+def test_save_and_load(store, tmp_path):
+    store.append(season(1, 2023), 2021)
+    engine = rebuilt(store)
+    path = str(tmp_path / "team_features.npz")
+    engine.save(path)
+    assert_same(FeatureEngine.load(path), engine)
+    assert FeatureEngine.load(str(tmp_path / "missing.npz")) is None
+
+
+def test_team_stats_needs_three_games(store):
+    store.append(season(1, 2023)[:4], 2021)
+    engine = rebuilt(store)
+    assert engine.team_stats(store.team_id("Team 0")) is not None  # four home games
+    assert engine.team_stats(store.team_id("Team 5")) is None
+    assert engine.team_stats(None) is None
+    stats = engine.team_stats(store.team_id("Team 0"), is_home=False)
+    assert set(stats) == {"form", "goal_diff", "home_adv", "defense"}
+    assert stats["home_adv"] == 0.0
+
+
+def test_smaller_store_rebuilds(store, tmp_path):
+    store.append(season(1, 2023) + season(1000, 2024, seed=1), 2021)
+    engine = FeatureEngine()
+    engine.sync(store)
+    smaller = MatchStore(str(tmp_path / "smaller"))
+    smaller.append(season(1, 2023), 2021)
+    assert engine.sync(smaller) == smaller.rows()
+    assert_same(engine, rebuilt(smaller))
+    empty = MatchStore(str(tmp_path / "empty"))
+    assert engine.sync(empty) == 0
+    assert engine.rows == 0 and engine.count.size == 0
+
+
+def test_rebuilt_store_with_the_same_rows_replays(store, tmp_path):
+    engine = FeatureEngine()
+    store.append(season(1, 2023), 2021)
+    engine.sync(store)
+    other = MatchStore(str(tmp_path / "other"))
+    other.append(season(500, 2023, seed=7), 2021)
+    assert other.rows() == store.rows()
+    assert engine.sync(other) == other.rows()
+    assert_same(engine, rebuilt(other))
+    assert engine.sync(other) == 0
+
+
+def test_loaded_engine_checks_the_store(store, tmp_path):
+    store.append(season(1, 2023), 2021)
+    engine = FeatureEngine()
+    engine.sync(store)
+    path = str(tmp_path / "team_features.npz")
+    engine.save(path)
+    loaded = FeatureEngine.load(path)
+    assert loaded.fingerprint == engine.fingerprint
+    assert loaded.sync(store) == 0
+    other = MatchStore(str(tmp_path / "other"))
+    other.append(season(500, 2023, seed=7), 2021)
+    assert FeatureEngine.load(path).sync(other) == other.rows()
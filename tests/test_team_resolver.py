@@ -0,0 +1,84 @@
+import pytest
+
+import logic
+from cache import ResponseCache
+from logic import find_team
+from team_resolver import MARGIN, TeamIndex, index_for, normalise
+
+TEAMS = [
+    {"id": 57, "name": "Arsenal FC", "shortName": "Arsenal", "tla": "ARS", "league": "Premier League"},
+    {"id": 65, "name": "Manchester City FC", "shortName": "Man City", "tla": "MCI", "league": "Premier League"},
+    {"id": 66, "name": "Manchester United FC", "shortName": "Man United", "tla": "MUN", "league": "Premier League"},
+    {"id": 73, "name": "Tottenham Hotspur FC", "shortName": "Tottenham", "tla": "TOT", "league": "Premier League"},
+    {"id": 76, "name": "Wolverhampton Wanderers FC", "shortName": "Wolverhampton", "tla": "WOL",
+     "league": "Premier League"},
+    {"id": 1, "name": "1. FC Köln", "shortName": "1. FC Köln", "tla": "KOE", "league": "Bundesliga"},
+    {"id": 5, "name": "FC Bayern München", "shortName": "Bayern", "tla": "FCB", "league": "Bundesliga"},
+    {"id": 81, "name": "FC Barcelona", "shortName": "Barça", "tla": "FCB", "league": "La Liga"},
+]
+
+
+@pytest.fixture
+def index():
+    return TeamIndex(TEAMS)
+
+
+@pytest.mark.parametrize("name, normalised", [
+    ("1. FC Köln", "1 koln"), ("Manchester United FC", "manchester united"), ("FC Bayern München", "bayern munchen"),
+    ("  AC  ", "ac"), (None, "")])
+def test_normalise(name, normalised):
+    assert normalise(name) == normalised
+
+
+@pytest.mark.parametrize("query, team_id", [
+    ("Arsenal", 57), ("arsenal fc", 57), ("ARS", 57), ("Man Utd", 66), ("man city", 65), ("Spurs", 73),
+    ("wolves", 76), ("Koln", 1), ("1. FC Koeln", 1), ("Bayern", 5), ("barca", 81), ("Tottenhm", 73)])
+def test_resolves(index, query, team_id):
+    assert index.resolve(query)["id"] == team_id
+
+
+@pytest.mark.parametrize("query", ["Manchester", "Chelsea", "", "zzz"])
+def test_ambiguous_or_unknown_is_none(index, query):
+    assert index.resolve(query) is None
+
+
+def test_ambiguous_name_lists_both_clubs(index):
+    ranked = index.search("Manchester")
+    assert {team["id"] for team, _ in ranked[:2]} == {65, 66}
+    assert ranked[0][1] - ranked[1][1] < MARGIN
+
+
+def test_exact_key_scores_one(index):
+    assert index.search("MUN")[0] == (TEAMS[2], 1.0)
+
+
+def test_shared_tla_is_settled_by_league(index):
+    assert index.resolve("FCB") is None
+    assert index.resolve("FCB", league="La Liga")["id"] == 81
+    assert [team["id"] for team, _ in index.search("FCB", league="Bundesliga")] == [5]
+
+
+def test_index_is_cached_per_team_list():
+    assert index_for(TEAMS) is index_for(list(TEAMS))
+    assert index_for(TEAMS[:3]) is not index_for(TEAMS)
+
+
+def test_find_team_goes_through_the_index():
+    assert find_team(TEAMS, "Man Utd")["id"] == 66
+    assert find_team(TEAMS, "Manchester") is None
+    assert find_team([], "Arsenal") is None
+
+
+def test_team_index_is_built_once_per_cache_generation(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(logic, "response_cache", cache)
+    path = f"/competitions/{logic.COMPETITIONS['Premier League']}/teams"
+    cache.set(path, {"teams": TEAMS[:5]})
+    first = logic.team_index(["Extra Town"])
+    assert first.resolve("Man Utd")["league"] == "Premier League"
+    assert logic.team_index(["Extra Town"]) is first
+    assert cache.stats["memory_hits"] == cache.stats["disk_hits"] == cache.stats["misses"] == 0
+
+    cache.set(path, {"teams": TEAMS[:2]})  # refetched list: new generation
+    assert logic.team_index(["Extra Town"]) is not first
+    assert logic.team_index(["Extra Town"]).resolve("Tottenham") is None
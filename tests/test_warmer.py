@@ -0,0 +1,116 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import requests
+
+import logic
+import warmer
+from cache import MATCHES_TTL, ResponseCache
+
+NOW = datetime(2024, 8, 16, 12, 0, tzinfo=timezone.utc)
+
+
+def fixture(hours, home, away, league="Premier League"):
+    return {"league": league, "kickoff": NOW + timedelta(hours=hours),
+            "home": {"id": home, "name": f"Team {home}"}, "away": {"id": away, "name": f"Team {away}"}}
+
+
+@pytest.mark.parametrize("hours, seconds", [
+    (0.5, MATCHES_TTL - 5 * 60), (24, MATCHES_TTL - 5 * 60), (30, 6 * 3600), (72, 6 * 3600),
+    (100, 24 * 3600), (warmer.HORIZON_DAYS * 24, 24 * 3600), (warmer.HORIZON_DAYS * 24 + 1, None)])
+def test_max_age_tiers(hours, seconds):
+    assert warmer.max_age(hours) == seconds
+
+
+def test_nearest_tier_stays_inside_the_app_ttl():
+    assert warmer.REFRESH_TIERS[0][1] < MATCHES_TTL
+
+
+def test_schedule_soonest_kickoff_first():
+    ages = {1: None, 2: 100.0, 3: 7 * 3600, 4: 3 * 3600}
+    fixtures = [fixture(50, 3, 4), fixture(5, 1, 2), fixture(200, 5, 6)]
+    queue = warmer.schedule(fixtures, NOW, age=lambda team: ages[team["id"]])
+    assert [e["id"] for e in queue] == [1, 2, 3, 4]  # 200 h is past the horizon
+    assert [e["due"] for e in queue] == [True, False, True, False]
+    assert queue[0]["max_age"] == warmer.REFRESH_TIERS[0][1]
+    assert queue[2]["max_age"] == 6 * 3600
+
+
+def test_schedule_keeps_each_team_at_its_next_kickoff():
+    # Two hours old is fine a few days out but too old for a kickoff today
+    queue = warmer.schedule([fixture(100, 1, 3), fixture(10, 2, 1)], NOW, age=lambda team: 2 * 3600)
+    assert len(queue) == 3
+    first = next(e for e in queue if e["id"] == 1)
+    assert first["kickoff"] == NOW + timedelta(hours=10)
+    assert first["max_age"] == warmer.REFRESH_TIERS[0][1]
+    assert first["due"] is True
+    assert next(e for e in queue if e["id"] == 3)["due"] is False
+
+
+def test_schedule_skips_teams_without_an_id():
+    game = fixture(5, 1, 2)
+    game["away"] = {"id": None, "name": "TBD"}
+    assert [e["id"] for e in warmer.schedule([game], NOW, age=lambda team: None)] == [1]
+
+
+def test_next_sleep():
+    due = {"age": None, "max_age": 100}
+    assert warmer.next_sleep([]) == warmer.MAX_SLEEP
+    assert warmer.next_sleep([due]) == warmer.MIN_SLEEP
+    assert warmer.next_sleep([{"age": 1000.0, "max_age": 1600}]) == 600
+    assert warmer.next_sleep([{"age": 10.0, "max_age": 20}]) == warmer.MIN_SLEEP
+    assert warmer.next_sleep([{"age": 0.0, "max_age": 86400}]) == warmer.MAX_SLEEP
+
+
+class Quota:
+    def __init__(self, available, reset, at):
+        self.quota = (available, reset, at)
+
+
+def test_quota_wait_holds_off_near_the_limit():
+    assert warmer.quota_wait(Quota(None, None, 0.0)) == 0.0
+    assert warmer.quota_wait(Quota(warmer.RESERVE + 1, 30, time.monotonic())) == 0.0
+    wait = warmer.quota_wait(Quota(warmer.RESERVE, 30, time.monotonic()))
+    assert 29 < wait <= 30
+    assert warmer.quota_wait(Quota(0, 30, time.monotonic() - 40)) == 0.0
+
+
+@pytest.mark.parametrize("seconds, text", [(42, "42s"), (600, "10 min"), (5400, "1.5 h"), (3 * 86400, "3 d")])
+def test_format_age(seconds, text):
+    assert warmer.format_age(seconds) == text
+
+# ---------------- REFRESH PASS ----------------
+
+class Client:
+    quota = (None, None, None)
+
+    def usage(self, since=None):
+        return {"requests": 0, "bytes": 0, "not_modified": 0, "saved_bytes": 0}
+
+
+def test_failing_league_and_team_do_not_stop_the_pass(tmp_path, monkeypatch):
+    soon = datetime.now(timezone.utc) + timedelta(hours=5)
+
+    def upcoming(api_key, league, now):
+        if league == "La Liga":
+            raise requests.ConnectionError("connection reset")
+        home = 10 * list(logic.COMPETITIONS).index(league)
+        return [{"league": league, "kickoff": soon, "home": {"id": home + 1, "name": f"{league} A"},
+                 "away": {"id": home + 2, "name": f"{league} B"}}]
+
+    def refresh(team_id, api_key):
+        if team_id == 2:
+            raise requests.Timeout("read timed out")
+        return team_id != 1
+
+    monkeypatch.setattr(logic, "response_cache", ResponseCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(warmer, "cached_api_get", lambda *args: None)
+    monkeypatch.setattr(warmer, "upcoming_fixtures", upcoming)
+    monkeypatch.setattr(warmer, "refresh_team", refresh)
+    queue, refreshed, failed, _ = warmer.run_cycle("k", Client())
+    leagues = len(logic.COMPETITIONS)
+    assert len(queue) == 2 * (leagues - 1)
+    assert refreshed == 2 * (leagues - 2)
+    assert failed == 3  # La Liga's fixtures, team 1, team 2
+    assert [e["due"] for e in queue[:2]] == [True, True]
@@ -0,0 +1,127 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import GridSearchCV, TimeSeriesSplit
+
+from features import FEATURE_COLUMNS, feature_row
+from historical import HISTORY_FILE, load_history, prematch_stats
+from logic import DATA_DIR
+from model_cache import MODEL_PATH
+
+MODELS_DIR = os.path.join(DATA_DIR, "models")
+
+PARAM_GRID = {
+    "n_estimators": [200, 400],
+    "max_depth": [4, 8, None],
+    "min_samples_leaf": [1, 5, 20],
+    "max_features": ["sqrt", None]
+}
+
+# ---------------- DATASET ----------------
+
+def build_dataset(df):
+    stats = prematch_stats(df)
+    usable = stats["usable"].to_numpy()
+    rows = [
+        feature_row(
+            {"form": r.a_form, "goal_diff": r.a_goal_diff},
+            {"form": r.b_form, "goal_diff": r.b_goal_diff},
+            home=1.0
+        )
+        for r in stats[usable].itertuples()
+    ]
+    labels = np.sign(df["home_goals"].to_numpy() - df["away_goals"].to_numpy())[usable].astype(int)
+    return np.array(rows, dtype=float).reshape(-1, len(FEATURE_COLUMNS)), labels
+
+# ---------------- TRAINING ----------------
+
+def train(X, y, folds=5, n_jobs=-1):
+    # Grid search over a process pool; folds respect time order
+    search = GridSearchCV(
+        RandomForestClassifier(random_state=42),
+        PARAM_GRID,
+        cv=TimeSeriesSplit(n_splits=folds),
+        scoring="neg_log_loss",
+        n_jobs=n_jobs
+    )
+    start = time.perf_counter()
+    search.fit(X, y)
+    return search, time.perf_counter() - start
+
+
+def inference_latency(model, X, repeats=5):
+    model.n_jobs = -1
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.predict_proba(X)
+    batch = (time.perf_counter() - start) / repeats / len(X)
+
+    model.n_jobs = 1
+    row = X[:1]
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.predict_proba(row)
+    single = (time.perf_counter() - start) / repeats
+    return batch, single
+
+
+def save_model(model, metadata):
+    # Versioned copy under data/models/, then the file the app loads
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    version = metadata["version"]
+    versioned = os.path.join(MODELS_DIR, f"random_forest_model_{version}.joblib")
+    joblib.dump(model, versioned, compress=3)
+    with open(versioned.replace(".joblib", ".json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    tmp = MODEL_PATH + ".tmp"
+    shutil.copyfile(versioned, tmp)
+    os.replace(tmp, MODEL_PATH)
+    shutil.copyfile(versioned.replace(".joblib", ".json"), MODEL_PATH.replace(".joblib", ".json"))
+    return versioned
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the Random Forest used by the ML panel")
+    parser.add_argument("--history", default=HISTORY_FILE, help="CSV with date, home_team, away_team, home_goals, away_goals")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="worker processes for the search (-1 = all cores)")
+    args = parser.parse_args()
+
+    df = load_history(args.history)
+    X, y = build_dataset(df)
+    print(f"{len(df)} matches -> {len(X)} training rows")
+
+    search, wall = train(X, y, args.folds, args.jobs)
+    model = search.best_estimator_
+    batch, single = inference_latency(model, X)
+
+    version = datetime.now().strftime("%Y%m%d%H%M%S")
+    metadata = {
+        "version": version,
+        "trained_at": datetime.now().isoformat(),
+        "history_file": args.history,
+        "features": FEATURE_COLUMNS,
+        "classes": [int(c) for c in model.classes_],
+        "n_samples": int(len(X)),
+        "best_params": search.best_params_,
+        "cv_log_loss": round(-search.best_score_, 4),
+        "train_seconds": round(wall, 2),
+        "inference_us_per_row_batch": round(batch * 1e6, 2),
+        "inference_ms_single_row": round(single * 1e3, 3),
+        "sklearn_version": sklearn.__version__
+    }
+    path = save_model(model, metadata)
+
+    print(f"Best params: {search.best_params_} | CV log loss: {metadata['cv_log_loss']}")
+    print(f"Training wall time: {wall:.1f}s over {len(search.cv_results_['params'])} candidates x {args.folds} folds")
+    print(f"Inference: {metadata['inference_us_per_row_batch']} us/row batched, {metadata['inference_ms_single_row']} ms single row")
+    print(f"Saved {path} -> {MODEL_PATH}")
@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from api_client import TokenBucket, get_client
+from cache import MATCHES_TTL, TEAMS_TTL
+from locking import atomic_write, file_lock
+from logic import COMPETITIONS, DATA_DIR, cached_api_get, stats_age, synced_matches, team_matches_path
+
+# Keeps the cached match data behind fetch_team_stats fresh for every team
+# with a kickoff in the next few days, so the app's fetch buttons are cache
+# hits. Runs as its own process next to the app (run_app.py starts it) and
+# leaves a status file the app reads to show how old the data is.
+
+STATUS_FILE = os.path.join(DATA_DIR, "warmer.json")
+
+# The free tier's 10 requests a minute are shared with the app: the warmer
+# paces itself below that and pauses whenever the server reports fewer
+# than RESERVE requests left, so a user's own fetch never waits on it
+WARM_REQUESTS_PER_MINUTE = 6
+RESERVE = 3
+
+HORIZON_DAYS = 7
+FIXTURES_TTL = 3 * 3600
+# (kickoff within hours, refresh once cached stats are older than seconds);
+# the nearest tier stays inside MATCHES_TTL so the app never sees a miss
+REFRESH_TIERS = [(24, MATCHES_TTL - 5 * 60), (72, 6 * 3600), (HORIZON_DAYS * 24, 24 * 3600)]
+MIN_SLEEP = 30
+MAX_SLEEP = 15 * 60
+
+# ---------------- FIXTURES ----------------
+
+def parse_kickoff(utc_date):
+    try:
+        return datetime.fromisoformat(utc_date.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+
+
+def upcoming_fixtures(api_key, league, now):
+    comp_id = COMPETITIONS[league]
+    start, end = now.date(), (now + timedelta(days=HORIZON_DAYS)).date()
+    data = cached_api_get(f"/competitions/{comp_id}/matches?dateFrom={start}&dateTo={end}", api_key, FIXTURES_TTL)
+    if data is None:
+        return []
+    fixtures = []
+    for match in data.get("matches", []):
+        kickoff = parse_kickoff(match.get("utcDate"))
+        if match.get("status") not in ("SCHEDULED", "TIMED") or kickoff is None or kickoff < now:
+            continue
+        fixtures.append({"league": league, "kickoff": kickoff, "home": match["homeTeam"], "away": match["awayTeam"]})
+    return fixtures
+
+# ---------------- SCHEDULE ----------------
+
+def max_age(hours_to_kickoff):
+    for hours, seconds in REFRESH_TIERS:
+        if hours_to_kickoff <= hours:
+            return seconds
+    return None
+
+
+def schedule(fixtures, now, age=stats_age):
+    # One entry per team at its next kickoff, soonest kickoff first, with
+    # the age of its cached stats and whether that is too old for its tier
+    teams = {}
+    for fixture in sorted(fixtures, key=lambda f: f["kickoff"]):
+        limit = max_age((fixture["kickoff"] - now).total_seconds() / 3600)
+        if limit is None:
+            continue
+        for team in (fixture["home"], fixture["away"]):
+            if team.get("id") is None or team["id"] in teams:
+                continue
+            cached = age(team)
+            teams[team["id"]] = {
+                "id": team["id"],
+                "name": team.get("name"),
+                "league": fixture["league"],
+                "kickoff": fixture["kickoff"],
+                "age": cached,
+                "max_age": limit,
+                "due": cached is None or cached >= limit
+            }
+    return list(teams.values())
+
+
+def quota_wait(client, reserve=RESERVE):
+    # Seconds to hold off because the server says the shared quota is
+    # nearly used up for this minute
+    available, reset, at = client.quota
+    if available is None or available > reserve:
+        return 0.0
+    return max(0.0, at + (reset if reset is not None else 60) - time.monotonic())
+
+
+def next_sleep(queue):
+    # Until the first team falls out of its tier, within MIN/MAX_SLEEP
+    waits = [e["max_age"] - e["age"] if e["age"] is not None else MIN_SLEEP for e in queue]
+    return min(max(min(waits, default=MAX_SLEEP), MIN_SLEEP), MAX_SLEEP)
+
+# ---------------- REFRESH ----------------
+
+def refresh_team(team_id, api_key):
+    # Always asks the API (ttl 0), but only for matches since the cached ones
+    return synced_matches(team_matches_path(team_id), api_key, 0, keep=5) is not None
+
+
+def run_cycle(api_key, client, sleep=time.sleep):
+    now = datetime.now(timezone.utc)
+    before = client.usage()
+    fixtures = []
+    refreshed = failed = 0
+    for league, comp_id in COMPETITIONS.items():
+        # One league or team failing leaves the rest of the pass to run
+        try:
+            # Team list fetch_team_stats resolves names against, weekly
+            cached_api_get(f"/competitions/{comp_id}/teams", api_key, TEAMS_TTL)
+            fixtures.extend(upcoming_fixtures(api_key, league, now))
+        except Exception as e:
+            print(f"API Error: {league}: {e}")
+            failed += 1
+
+    queue = schedule(fixtures, now)
+    for entry in queue:
+        if not entry["due"]:
+            continue
+        wait = quota_wait(client)
+        if wait:
+            sleep(wait)
+        try:
+            ok = refresh_team(entry["id"], api_key)
+        except Exception as e:
+            print(f"API Error: {entry['name']}: {e}")
+            ok = False
+        if ok:
+            entry["age"], entry["due"] = 0.0, False
+            refreshed += 1
+        else:
+            failed += 1
+    return queue, refreshed, failed, client.usage(before)
+
+# ---------------- STATUS ----------------
+
+def write_status(queue, refreshed, failed, usage, client, started_at, path=STATUS_FILE):
+    now = time.time()
+    status = {
+        "pid": os.getpid(),
+        "started_at": started_at,
+        "updated_at": now,
+        "requests": client.stats["requests"],
+        "throttled": client.stats["throttled"],
+        "bytes": client.stats["bytes"],
+        "saved_bytes": client.stats["saved_bytes"],
+        "refreshed": refreshed,
+        "failed": failed,
+        "last_pass": usage,
+        "teams": [
+            {
+                "id": e["id"],
+                "name": e["name"],
+                "league": e["league"],
+                "kickoff": e["kickoff"].isoformat(),
+                "refreshed_at": None if e["age"] is None else now - e["age"],
+                "max_age": e["max_age"]
+            }
+            for e in queue
+        ]
+    }
+    atomic_write(path, lambda f: json.dump(status, f))
+
+
+def warmer_status(path=STATUS_FILE):
+    # Last status the warmer wrote, or None; a file read, never the network
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def format_age(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    if seconds < 48 * 3600:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 86400:.0f} d"
+
+# ---------------- WORKER ----------------
+
+def run(api_key, once=False, parent=None, status_path=STATUS_FILE):
+    # Refresh pass, status file, sleep until something is due; exits when
+    # the parent process (run_app.py) is gone
+    client = get_client()
+    client.bucket = TokenBucket(WARM_REQUESTS_PER_MINUTE)
+    started_at = time.time()
+    while True:
+        try:
+            queue, refreshed, failed, usage = run_cycle(api_key, client)
+        except Exception as e:
+            # Only reached when the schedule itself cannot be built
+            print(f"API Error: {e}")
+            queue, refreshed, failed, usage = [], 0, 0, client.usage()
+        write_status(queue, refreshed, failed, usage, client, started_at, status_path)
+        if once:
+            return queue, refreshed, failed, usage
+
+        wake = time.monotonic() + next_sleep(queue)
+        while time.monotonic() < wake:
+            if parent is not None and os.getppid() != parent:
+                return queue, refreshed, failed, usage
+            time.sleep(min(5, max(0.0, wake - time.monotonic())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep team stats warm ahead of upcoming kickoffs")
+    parser.add_argument("--once", action="store_true", help="one refresh pass, then exit")
+    parser.add_argument("--status", action="store_true", help="print the last status and exit")
+    parser.add_argument("--parent", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.status:
+        status = warmer_status()
+        if not status:
+            raise SystemExit("warmer has not run yet")
+        now = time.time()
+        last = status.get("last_pass", {})
+        print(f"last pass {format_age(now - status['updated_at'])} ago: {last.get('requests', 0)} requests, "
+              f"{format_bytes(last.get('bytes', 0))} ({format_bytes(last.get('saved_bytes', 0))} saved by delta / 304)")
+        print(f"since start: {status['requests']} requests, {format_bytes(status.get('bytes', 0))} "
+              f"({format_bytes(status.get('saved_bytes', 0))} saved)")
+        for team in status["teams"]:
+            age = "never" if team["refreshed_at"] is None else format_age(now - team["refreshed_at"])
+            print(f"  {team['kickoff'][:16]}  {team['league']:<15} {team['name']:<30} stats {age}")
+        raise SystemExit
+
+    from config import FOOTBALL_DATA_API_KEY
+    if not FOOTBALL_DATA_API_KEY:
+        raise SystemExit("no API key configured, nothing to warm")
+    os.makedirs(DATA_DIR, exist_ok=True)
+    if args.once:
+        queue, refreshed, failed, usage = run(FOOTBALL_DATA_API_KEY, once=True)
+        print(f"{len(queue)} teams with kickoffs in the next {HORIZON_DAYS} days, {refreshed} refreshed, {failed} failed; "
+              f"{usage['requests']} requests, {format_bytes(usage['bytes'])} "
+              f"({format_bytes(usage['saved_bytes'])} saved, {usage['not_modified']} not modified)")
+    else:
+        # A second warmer waits here and takes over if the first one exits
+        with file_lock(STATUS_FILE):
+            run(FOOTBALL_DATA_API_KEY, parent=args.parent)